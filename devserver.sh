@@ -1,3 +1,4 @@
 #!/bin/sh
 source .venv/bin/activate
-python mysite/apiBack/manage.py runserver $PORT
+# ASGI server: the live feed (activites/<code>/flux/) streams server-sent events
+cd mysite/apiBack && uvicorn apiBack.asgi:application --reload --port ${PORT:-8000}
@@ -3,11 +3,18 @@ from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.forms import UserCreationForm, UserChangeForm
 from django import forms
 import copy # Needed to modify fieldsets
+import logging
 # Import Http response
 from django.http import HttpResponseRedirect
 
 # Import updated models
+from django.db.models import Count
+
 from .models import Users, Categorie, Activite, Affirmation, Reponse, Debrief
+from . import search
+from .changelist import AutocompleteFilter, AutocompleteFilterMixin, EstimatedCountMixin
+
+logger = logging.getLogger(__name__)
 
 # --- Categorie Admin ---
 @admin.register(Categorie)
@@ -33,14 +40,23 @@ class ActiviteAffirmationInline(admin.TabularInline):
 
 # --- Activite Admin ---
 @admin.register(Activite)
-class ActiviteAdmin(admin.ModelAdmin):
-    list_display = ('code_activite', 'titre', 'encadrant', 'destine_a', 'nbr_affirmations_associe', 'created_at')
+class ActiviteAdmin(AutocompleteFilterMixin, admin.ModelAdmin):
+    list_display = ('code_activite', 'titre', 'encadrant', 'destine_a', 'nombre_affirmations', 'created_at')
     search_fields = ('code_activite', 'titre', 'encadrant__username', 'encadrant__email')
-    list_filter = ('destine_a', 'encadrant')
+    list_filter = ('destine_a', ('encadrant', AutocompleteFilter))
+    list_select_related = ('encadrant', 'destine_a')
     inlines = [ActiviteEtudiantInline, ActiviteAffirmationInline]
     readonly_fields = ('nbr_affirmations_associe', 'created_at')
     autocomplete_fields = ['destine_a', 'encadrant']
 
+    def get_queryset(self, request):
+        # One grouped query instead of nbr_affirmations_associe's COUNT per row
+        return super().get_queryset(request).annotate(nombre_affirmations=Count('affirmations_associes', distinct=True))
+
+    @admin.display(description="Nbr affirmations associées", ordering='nombre_affirmations')
+    def nombre_affirmations(self, obj):
+        return obj.nombre_affirmations
+
 
 # --- Affirmation Admin ---
 @admin.register(Affirmation)
@@ -62,20 +78,31 @@ class AffirmationAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_search_results(self, request, queryset, search_term):
+        # Use the full-text index instead of icontains scans over both columns
+        if not search_term:
+            return queryset, False
+        return search.filter_queryset(queryset, search_term), False
+
 # --- Reponse Admin ---
 @admin.register(Reponse)
-class ReponseAdmin(admin.ModelAdmin):
+class ReponseAdmin(AutocompleteFilterMixin, EstimatedCountMixin, admin.ModelAdmin):
     list_display = ('id', 'etudiant', 'activite', 'affirmation', 'reponse_vf', 'reponse_choisie_qcm', 'timestamp')
     search_fields = ('etudiant__username', 'etudiant__email', 'activite__code_activite', 'affirmation__affirmation')
-    list_filter = ('activite', 'affirmation')
+    # Autocomplete filters: the default ones render every activity and affirmation
+    list_filter = (('activite', AutocompleteFilter), ('affirmation', AutocompleteFilter), ('etudiant', AutocompleteFilter))
+    list_select_related = ('etudiant', 'activite', 'affirmation')
     readonly_fields = ('timestamp',)
     autocomplete_fields = ['etudiant', 'activite', 'affirmation']
 
 # --- Debrief Admin ---
 @admin.register(Debrief)
-class DebriefAdmin(admin.ModelAdmin):
+class DebriefAdmin(AutocompleteFilterMixin, EstimatedCountMixin, admin.ModelAdmin):
     list_display = ('id', 'encadrant', 'reponse', 'feedback')
     search_fields = ('feedback', 'reponse__etudiant__username', 'encadrant__username')
+    list_filter = (('encadrant', AutocompleteFilter),)
+    # str(reponse) reads its student, activity and affirmation
+    list_select_related = ('encadrant', 'reponse__etudiant', 'reponse__activite', 'reponse__affirmation')
     autocomplete_fields = ['reponse', 'encadrant']
 
 
@@ -90,23 +117,17 @@ class UsersCreationForm(UserCreationForm):
         model = Users
         fields = ('username', 'email', 'first_name', 'last_name', 'role')
 
-    # Keep the previous save debug prints just in case
+    # Keep the previous save debug logs just in case (never the cleaned data: it holds the password)
     def save(self, commit=True):
-        print("--- Attempting to save user via UsersCreationForm ---")
-        # print(f"Form is valid: {self.is_valid()}") # is_valid already checked by view
-        print(f"Cleaned data: {self.cleaned_data}")
+        logger.debug("Saving user %s via UsersCreationForm (commit=%s)", self.cleaned_data.get('username'), commit)
         try:
             user = super().save(commit=False)
-            print(f"User object before commit: {user.__dict__}")
             if commit:
-                print("--- Committing user save ---")
                 user.save()
-                print("--- User save committed successfully ---")
-            else:
-                print("--- Skipping user commit (commit=False) ---")
+                logger.debug("User %s saved", user.pk)
             return user
-        except Exception as e:
-            print(f"--- ERROR during UsersCreationForm save: {e} ---")
+        except Exception:
+            logger.exception("Error during UsersCreationForm save")
             raise
 
 class UsersChangeForm(UserChangeForm):
@@ -149,16 +170,8 @@ class UsersAdmin(BaseUserAdmin):
     # Override add_view for debugging (can likely be removed later)
     def add_view(self, request, form_url="", extra_context=None):
         if request.method == 'POST':
-            print("--- Entering UsersAdmin add_view (POST request) ---")
             form = self.get_form(request)(request.POST, request.FILES)
-            print("--- Checking if form is valid --- ")
-            if form.is_valid():
-                print("--- Form IS valid, proceeding to save --- ")
-                # ... (rest of default save logic is handled by super().add_view) ...
-            else:
-                print("--- Form IS NOT valid --- ")
-                print(f"Form errors: {form.errors.as_json()}")
-        else:
-            print("--- Entering UsersAdmin add_view (GET request) ---")
+            if not form.is_valid():
+                logger.debug("UsersAdmin add_view: invalid form %s", form.errors.as_json())
         return super().add_view(request, form_url, extra_context)
 
@@ -0,0 +1,133 @@
+"""
+Per-activity answer statistics, computed in SQL (conditional aggregates
+grouped by affirmation) and cached until the next answer.
+
+The signals (api/signals.py) invalidate them whenever a Reponse is created,
+edited or deleted, and when an activity's affirmations or students change.
+Invalidation takes effect when the transaction commits: a concurrent
+computation cannot cache not-yet-committed data under the new version.
+
+The cache must be shared by every process (CACHES setting): with a
+process-local cache (LocMemCache), an answer received by one worker would
+not invalidate the others, so statistics are then computed on every call.
+"""
+import logging
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from .models import ArchiveActivite, CompteurEtudiant, Reponse
+
+CACHE_PREFIX = 'analytics:activite:'
+
+logger = logging.getLogger(__name__)
+_warned_local_cache = False
+
+
+def _cache_is_shared():
+    global _warned_local_cache
+    if not isinstance(caches['default'], LocMemCache):
+        return True
+    if not _warned_local_cache:
+        _warned_local_cache = True
+        logger.warning("Process-local cache backend: answer statistics are not cached (configure a shared CACHES)")
+    return False
+
+
+def _version_key(code_activite):
+    return f"{CACHE_PREFIX}{code_activite}:version"
+
+
+def _current_version(code_activite):
+    # A random token (not a counter) so an evicted version can never match stale data
+    version = cache.get(_version_key(code_activite))
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(_version_key(code_activite), version, None):
+            version = cache.get(_version_key(code_activite), version)
+    return version
+
+
+def invalidate(code_activite):
+    """Makes the activity's cached statistics stale once the current transaction commits."""
+    transaction.on_commit(lambda: cache.set(_version_key(code_activite), uuid.uuid4().hex, None))
+
+
+def _distribution_rows(activite):
+    """One row per affirmation with at least one answer, in a single query."""
+    has_justification = Q(justification__isnull=False) & ~Q(justification='')
+    no_answer = Q(reponse_vf__isnull=True, reponse_choisie_qcm__isnull=True)
+    return (
+        Reponse.objects.filter(activite=activite)
+        .values('affirmation_id')
+        .annotate(
+            total=Count('id'),
+            vrai=Count('id', filter=Q(reponse_vf=True)),
+            faux=Count('id', filter=Q(reponse_vf=False)),
+            choix_1=Count('id', filter=Q(reponse_choisie_qcm=1)),
+            choix_2=Count('id', filter=Q(reponse_choisie_qcm=2)),
+            choix_3=Count('id', filter=Q(reponse_choisie_qcm=3)),
+            choix_4=Count('id', filter=Q(reponse_choisie_qcm=4)),
+            sans_reponse=Count('id', filter=no_answer),
+            avec_justification=Count('id', filter=has_justification),
+        )
+        .order_by()
+    )
+
+
+def compute_answer_distribution(activite):
+    """Computes the activity's statistics (uncached)."""
+    rows = {row['affirmation_id']: row for row in _distribution_rows(activite)}
+    affirmations = activite.affirmations_associes.order_by('id').values('id', 'affirmation', 'nbr_reponses')
+
+    results = []
+    for affirmation in affirmations:
+        row = rows.get(affirmation['id'], {})
+        if affirmation['nbr_reponses'] == 4:
+            repartition = {str(i): row.get(f'choix_{i}', 0) for i in range(1, 5)}
+        else:
+            repartition = {'vrai': row.get('vrai', 0), 'faux': row.get('faux', 0)}
+        results.append({
+            'affirmation_id': affirmation['id'],
+            'affirmation': affirmation['affirmation'],
+            'nbr_reponses': affirmation['nbr_reponses'],
+            'total': row.get('total', 0),
+            'repartition': repartition,
+            'sans_reponse': row.get('sans_reponse', 0),
+            'avec_justification': row.get('avec_justification', 0),
+        })
+
+    # Per-student counters (api/counters.py) instead of a second pass over Reponse
+    totals = CompteurEtudiant.objects.filter(activite=activite, total__gt=0).aggregate(
+        reponses=Sum('total'), repondants=Count('id')
+    )
+    return {
+        'code_activite': activite.code_activite,
+        'nombre_etudiants': activite.etudiants_autorises.count(),
+        'nombre_repondants': totals['repondants'],
+        'nombre_reponses': totals['reponses'] or 0,
+        'affirmations': results,
+    }
+
+
+def get_answer_distribution(activite):
+    """The activity's statistics, served from the cache if no answer arrived since."""
+    if activite.est_archivee:
+        # Its responses are in the archive file (api/archives.py): statistics frozen when archiving
+        archive = ArchiveActivite.objects.filter(activite=activite).values_list('statistiques', flat=True).first()
+        if archive is not None:
+            return archive
+    if not _cache_is_shared():
+        return compute_answer_distribution(activite)
+    # Computing under the version read beforehand means an answer arriving
+    # mid-computation leaves the result under an already-stale key.
+    key = f"{CACHE_PREFIX}{activite.code_activite}:{_current_version(activite.code_activite)}"
+    data = cache.get(key)
+    if data is None:
+        data = compute_answer_distribution(activite)
+        cache.set(key, data, getattr(settings, 'ANALYTICS_CACHE_TIMEOUT', 3600))
+    return data
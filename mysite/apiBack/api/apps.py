@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from django.contrib.auth.signals import user_logged_in
+
+        from . import session_user, signals  # noqa: F401  (registers signal receivers)
+
+        # Replaces django.contrib.auth's receiver (same dispatch_uid): throttled last_login writes
+        user_logged_in.disconnect(dispatch_uid='update_last_login')
+        user_logged_in.connect(session_user.update_last_login, dispatch_uid='update_last_login')
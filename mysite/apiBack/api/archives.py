@@ -0,0 +1,208 @@
+"""
+Archiving of cold activities' responses (ARCHIVES settings).
+
+An unpublished activity with no recent response or debrief can be archived
+(`manage.py archiver_activites` or POST activites/<code>/archive/): its
+responses and debriefs move to one gzipped JSON file per activity under
+ARCHIVES['DIR'], and their rows are deleted from the database. What stays in
+the database:
+
+- the counters (CompteurReponse, CompteurEtudiant), which the raw deletion
+  does not decrement: progress is still served as is;
+- ArchiveActivite, with the statistics frozen at archiving time (served by
+  analytics.get_answer_distribution).
+
+The deleted rows leave tombstones (Suppression): delta-sync clients drop
+them from their copy.
+
+An archived activity refuses new answers and edits (409). Its encadrant
+restores it explicitly (POST activites/<code>/restore/): `rehydrater()` puts
+the rows back with their original ids and deletes the archive. Restored
+rows get a fresh `updated_at`: delta-sync clients receive them again. A
+read (GET) never restores anything.
+"""
+import datetime
+import gzip
+import hashlib
+import json
+import os
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import analytics, counters
+from .models import Activite, Affirmation, ArchiveActivite, Debrief, Reponse, Suppression, Users
+
+DEFAULTS = {
+    'DIR': os.path.join(settings.BASE_DIR, 'archives'),
+    'INACTIVE_DAYS': 180,
+    'BATCH_SIZE': 500,
+}
+
+VERSION = 1
+REPONSE_FIELDS = ('id', 'affirmation_id', 'etudiant_id', 'reponse_vf', 'reponse_choisie_qcm', 'justification',
+                  'timestamp', 'updated_at')
+DEBRIEF_FIELDS = ('id', 'reponse_id', 'encadrant_id', 'feedback', 'updated_at')
+
+
+class ArchiveError(Exception):
+    """Archiving or restoring is impossible (message meant for the encadrant)."""
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'ARCHIVES', {})}
+
+
+def _path(fichier):
+    return os.path.join(get_config()['DIR'], fichier)
+
+
+def _encode(value):
+    # Full precision (DjangoJSONEncoder cuts datetimes to milliseconds)
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} non sérialisable")
+
+
+def _write(code_activite, data):
+    """Writes the archive (temporary file, then rename); returns (file, size, sha256)."""
+    fichier = f"{code_activite}.json.gz"
+    path = _path(fichier)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    content = gzip.compress(json.dumps(data, default=_encode, separators=(',', ':')).encode('utf-8'))
+    with open(f"{path}.tmp", 'wb') as handle:
+        handle.write(content)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(f"{path}.tmp", path)
+    return fichier, len(content), hashlib.sha256(content).hexdigest()
+
+
+def _read(archive):
+    try:
+        with open(_path(archive.fichier), 'rb') as handle:
+            content = handle.read()
+    except FileNotFoundError:
+        raise ArchiveError(f"Fichier d'archive introuvable : {archive.fichier}.")
+    if hashlib.sha256(content).hexdigest() != archive.sha256:
+        raise ArchiveError(f"Fichier d'archive altéré : {archive.fichier}.")
+    return json.loads(gzip.decompress(content))
+
+
+def remove_file(fichier):
+    try:
+        os.remove(_path(fichier))
+    except FileNotFoundError:
+        pass
+
+
+def candidates(jours=None):
+    """Unpublished, unarchived activities with no response or debrief changed in `jours` days."""
+    jours = get_config()['INACTIVE_DAYS'] if jours is None else jours
+    limit = timezone.now() - datetime.timedelta(days=jours)
+    recent = (Reponse.objects.filter(updated_at__gte=limit) | Reponse.objects.filter(debrief__updated_at__gte=limit))
+    return (
+        Activite.objects.filter(is_published=False, est_archivee=False, updated_at__lt=limit, reponse__isnull=False)
+        .exclude(pk__in=recent.values('activite_id'))
+        .distinct()
+        .order_by('pk')
+    )
+
+
+def _tombstones(code_activite, data):
+    """The same tombstones as the delete signals (api/signals.py), for the archived rows."""
+    supprime_le = timezone.now()
+    return [
+        Suppression(modele='reponse', objet_id=str(row['id']), activite_code=code_activite,
+                    etudiant_id=row['etudiant_id'], supprime_le=supprime_le)
+        for row in data['reponses']
+    ] + [
+        Suppression(modele='debrief', objet_id=str(row['id']), encadrant_id=row['encadrant_id'], supprime_le=supprime_le)
+        for row in data['debriefs']
+    ]
+
+
+def archiver(activite):
+    """Moves the responses and debriefs of `activite` to its archive file; returns the ArchiveActivite."""
+    with transaction.atomic():
+        # Locks the activity: an answer saved meanwhile would be lost
+        activite = Activite.objects.select_for_update().get(pk=activite.pk)
+        if activite.est_archivee:
+            raise ArchiveError("Cette activité est déjà archivée.")
+        if activite.is_published:
+            raise ArchiveError("Dépubliez l'activité avant de l'archiver : les étudiants pourraient encore y répondre.")
+
+        reponses = Reponse.objects.filter(activite=activite)
+        debriefs = Debrief.objects.filter(reponse__activite=activite)
+        data = {
+            'version': VERSION,
+            'activite': activite.pk,
+            'archive_le': timezone.now(),
+            'reponses': list(reponses.order_by('id').values(*REPONSE_FIELDS)),
+            'debriefs': list(debriefs.order_by('id').values(*DEBRIEF_FIELDS)),
+        }
+        statistiques = analytics.compute_answer_distribution(activite)
+        fichier, taille, sha256 = _write(activite.pk, data)
+
+        # Raw deletes skip the Reponse/Debrief signals: the counters stay as the
+        # summary left behind, and the sync tombstones are written here in bulk
+        debriefs._raw_delete(DEFAULT_DB_ALIAS)
+        reponses._raw_delete(DEFAULT_DB_ALIAS)
+        Suppression.objects.bulk_create(_tombstones(activite.pk, data), batch_size=get_config()['BATCH_SIZE'])
+        archive = ArchiveActivite.objects.create(
+            activite=activite, fichier=fichier, taille=taille, sha256=sha256, statistiques=statistiques,
+            nombre_reponses=len(data['reponses']), nombre_debriefs=len(data['debriefs']),
+            archive_le=data['archive_le'],
+        )
+        Activite.objects.filter(pk=activite.pk).update(est_archivee=True)
+    analytics.invalidate(activite.pk)
+    return archive
+
+
+def _existing(model, ids):
+    return set(model.objects.filter(pk__in=set(ids)).values_list('pk', flat=True))
+
+
+def rehydrater(activite):
+    """
+    Puts the archived responses and debriefs of `activite` back in the
+    database. Returns the (responses, debriefs) restored, or None if it was
+    no longer archived.
+    """
+    batch_size = get_config()['BATCH_SIZE']
+    with transaction.atomic():
+        archive = ArchiveActivite.objects.select_for_update().filter(activite_id=activite.pk).first()
+        if archive is None:
+            # Rehydrated by a concurrent request
+            activite.est_archivee = False
+            return None
+        data = _read(archive)
+
+        # Affirmations or students deleted since the archiving took their answers with them
+        affirmations = _existing(Affirmation, [row['affirmation_id'] for row in data['reponses']])
+        users = _existing(Users, [row['etudiant_id'] for row in data['reponses']]
+                          + [row['encadrant_id'] for row in data['debriefs']])
+        rows = [row for row in data['reponses'] if row['affirmation_id'] in affirmations and row['etudiant_id'] in users]
+        timestamps = {row['id']: parse_datetime(row['timestamp']) for row in rows}
+        reponses = Reponse.objects.bulk_create(
+            [Reponse(activite_id=activite.pk, **{**row, 'updated_at': None}) for row in rows], batch_size=batch_size,
+        )
+        # bulk_create applies auto_now_add: put the original answer times back
+        for reponse in reponses:
+            reponse.timestamp = timestamps[reponse.pk]
+        Reponse.objects.bulk_update(reponses, ['timestamp'], batch_size=batch_size)
+        debriefs = Debrief.objects.bulk_create(
+            [Debrief(**{**row, 'updated_at': None}) for row in data['debriefs']
+             if row['reponse_id'] in timestamps and row['encadrant_id'] in users],
+            batch_size=batch_size,
+        )
+
+        archive.delete()  # the file goes once committed (api/signals.py)
+        Activite.objects.filter(pk=activite.pk).update(est_archivee=False)
+        if len(reponses) != len(data['reponses']):
+            counters.rebuild(activite.pk)
+    activite.est_archivee = False
+    analytics.invalidate(activite.pk)
+    return len(reponses), len(debriefs)
@@ -0,0 +1,147 @@
+"""
+Async variants of the most frequent reads, served under `async/`.
+
+Under ASGI (uvicorn), a synchronous APIView holds a thread for the whole
+request. These async Django views only wait on the database through the
+async ORM (`aget`, `afirst`, `aexists`, `async for` iteration), so a worker
+serves many slow clients at once without one thread per client. They
+return the same data as their synchronous counterparts:
+
+- `async/activites/<code>/`: ActiviteAPIView (detail);
+- `async/activites/<code>/demarrage/`: ActiviteDemarrageAPIView;
+- `async/reponses/`: ReponseAPIView's list (without `?since`, which the
+  synchronous view still serves).
+
+Authentication: activity token (no query) or session. Comparison with the
+synchronous path: `manage.py loadtest --lectures async`.
+"""
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+from django.views import View
+from rest_framework import exceptions
+
+from .authentication import ActivityTokenAuthentication, authorizes
+from .models import Activite, Reponse
+from .serializers import ActiviteSerializer, ReponseSerializerGET, with_related
+from .views import ActiviteDemarrageAPIView
+
+
+async def authenticate(request):
+    """Sets request.user / request.auth; returns an error response or None."""
+    try:
+        result = ActivityTokenAuthentication().authenticate(request)
+    except exceptions.AuthenticationFailed as e:
+        return JsonResponse({"detail": str(e.detail)}, status=401)
+    request.user, request.auth = result or (await request.auser(), None)
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "Authentification requise."}, status=401)
+    return None
+
+
+def _serialize(serializer_class, instance, request, many):
+    return serializer_class(instance, many=many, context={'request': request}).data
+
+
+async def serialize(serializer_class, instance, request, many=False):
+    """
+    Serializes in a thread: everything is already loaded, but on the loop a
+    large batch (a whole class's responses) would block every other client.
+    """
+    return await sync_to_async(_serialize, thread_sensitive=False)(serializer_class, instance, request, many)
+
+
+class AsyncActiviteDetailView(View):
+    """Activity detail (owning encadrant, or authorized student on a published activity)."""
+
+    async def get(self, request, pk):
+        if error := await authenticate(request):
+            return error
+        user = request.user
+        try:
+            activite = await with_related(Activite.objects.all(), ActiviteSerializer).aget(pk=pk.upper())
+        except Activite.DoesNotExist:
+            return JsonResponse({"error": "Activité introuvable."}, status=404)
+
+        is_encadrant_owner = user.role == 'encadrant' and activite.encadrant_id == user.pk
+        is_authorized_etudiant = user.role == 'etudiant' and (
+            authorizes(request, activite.pk)
+            # Already prefetched for the serializer: no extra query
+            or any(etudiant.pk == user.pk for etudiant in activite.etudiants_autorises.all())
+        )
+        if not (is_encadrant_owner or is_authorized_etudiant):
+            return JsonResponse({"error": "Vous n'êtes pas autorisé à accéder à cette activité spécifique."}, status=403)
+        if is_authorized_etudiant and not activite.is_published:
+            return JsonResponse({"error": "Cette activité n'est pas encore publiée."}, status=403)
+        return JsonResponse(await serialize(ActiviteSerializer, activite, request))
+
+
+class AsyncActiviteDemarrageView(View):
+    """Student start screen: same queries, cache and ETag as ActiviteDemarrageAPIView."""
+
+    async def get(self, request, pk):
+        if error := await authenticate(request):
+            return error
+        user = request.user
+        if user.role != 'etudiant':
+            return JsonResponse({"error": "Réservé aux étudiants."}, status=403)
+        base = ActiviteDemarrageAPIView
+        activite = await base.activites(request, user, pk.upper()).afirst()
+        if activite is None:
+            return JsonResponse({"error": "Vous n'êtes pas autorisé à accéder à cette activité spécifique."}, status=403)
+        if not activite.pop('is_published'):
+            return JsonResponse({"error": "Cette activité n'est pas encore publiée."}, status=403)
+
+        reponses = base.reponses_by_affirmation([row async for row in base.reponses(activite, user)])
+        etag = base.etag(activite, reponses)
+        if etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponse(status=304)
+        else:
+            key = base.cache_key(activite)
+            payload = await cache.aget(key)
+            if payload is None:
+                payload = base.build_payload(activite, [row async for row in base.affirmations(activite)])
+                await cache.aset(key, payload, base.CACHE_TIMEOUT)
+            response = JsonResponse({**payload, 'reponses': reponses})
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+class AsyncReponseListView(View):
+    """
+    Responses: the logged-in student's own (`activity_code`, `affirmation_id`
+    filters), or all those of one of the encadrant's activities
+    (`activity_code` required).
+    """
+
+    async def get(self, request):
+        if error := await authenticate(request):
+            return error
+        user = request.user
+        activity_code = request.GET.get('activity_code')
+        if 'since' in request.GET:
+            return JsonResponse({"error": "La synchronisation delta (?since) est servie par reponses/."}, status=400)
+
+        reponses = with_related(Reponse.objects.all(), ReponseSerializerGET)
+        if user.role == 'etudiant':
+            reponses = reponses.filter(etudiant=user)
+            if activity_code:
+                reponses = reponses.filter(activite__code_activite=activity_code.upper())
+            affirmation_id = request.GET.get('affirmation_id')
+            if affirmation_id:
+                try:
+                    reponses = reponses.filter(affirmation__id=int(affirmation_id))
+                except ValueError:
+                    return JsonResponse({"error": "Le paramètre 'affirmation_id' doit être un entier."}, status=400)
+        elif user.role == 'encadrant':
+            if not activity_code:
+                return JsonResponse({"error": "Le paramètre 'activity_code' est requis pour les encadrants pour lister les réponses."}, status=400)
+            if not await Activite.objects.filter(pk=activity_code.upper(), encadrant=user).aexists():
+                return JsonResponse({"error": "Activité introuvable."}, status=404)
+            reponses = reponses.filter(activite_id=activity_code.upper())
+        else:
+            return JsonResponse({"error": "Permission refusée pour ce rôle."}, status=403)
+
+        rows = [reponse async for reponse in reponses]
+        return JsonResponse(await serialize(ReponseSerializerGET, rows, request, many=True), safe=False)
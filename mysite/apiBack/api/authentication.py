@@ -0,0 +1,90 @@
+"""
+Stateless signed activity token for students.
+
+ActiviteLoginView returns a signed token (HMAC, SECRET_KEY) carrying the
+student's id, role, displayed profile (PROFILE_FIELDS) and the code of the
+activity the login was checked for. Sent as `Authorization: Activite
+<token>`, it is verified by `ActivityTokenAuthentication` without any query:
+no session, no Users row (the other fields stay deferred). Nodes share no
+storage.
+
+`request.auth` is then an `ActivityToken`; `authorizes(request, code)` lets
+views skip the etudiants_autorises check for the token's activity. The
+token cannot be revoked: a deactivation or removal from the activity is
+only seen when it expires (ACTIVITY_TOKEN['MAX_AGE']).
+
+SessionAuthentication stays first in DEFAULT_AUTHENTICATION_CLASSES, so
+anonymous requests get a 403; the views that use the token list this class
+first themselves.
+"""
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core import signing
+from rest_framework import authentication, exceptions
+
+from .session_user import build_user
+
+DEFAULTS = {
+    'MAX_AGE': 4 * 3600,
+    'KEYWORD': 'Activite',
+}
+
+SALT = 'api.authentication.activity-token'
+PROFILE_FIELDS = ('username', 'email', 'first_name', 'last_name')
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'ACTIVITY_TOKEN', {})}
+
+
+@dataclass(frozen=True)
+class ActivityToken:
+    user_id: int
+    role: str
+    code_activite: str
+    profil: dict
+
+
+def issue_token(user, code_activite):
+    """Signed token for `user` on the `code_activite` activity."""
+    profil = {field: getattr(user, field) for field in PROFILE_FIELDS}
+    return signing.dumps({'u': user.pk, 'r': user.role, 'a': code_activite, 'p': profil}, salt=SALT, compress=True)
+
+
+def read_token(token):
+    """ActivityToken of the token, or signing.BadSignature (SignatureExpired if too old)."""
+    data = signing.loads(token, salt=SALT, max_age=get_config()['MAX_AGE'])
+    return ActivityToken(user_id=data['u'], role=data['r'], code_activite=data['a'], profil=data['p'])
+
+
+def authorizes(request, code_activite):
+    """True if the request carries an activity token issued for `code_activite`."""
+    return isinstance(request.auth, ActivityToken) and request.auth.code_activite == code_activite
+
+
+class ActivityTokenAuthentication(authentication.BaseAuthentication):
+    """`Authorization: Activite <token>`; without that header, defers to the other classes."""
+
+    def authenticate(self, request):
+        parts = authentication.get_authorization_header(request).split()
+        if not parts or parts[0].decode('latin-1').lower() != get_config()['KEYWORD'].lower():
+            return None
+        if len(parts) != 2:
+            raise exceptions.AuthenticationFailed("En-tête d'authentification invalide.")
+        try:
+            token = read_token(parts[1].decode('latin-1'))
+        except signing.SignatureExpired:
+            raise exceptions.AuthenticationFailed("Jeton d'activité expiré, reconnectez-vous.")
+        except (signing.BadSignature, KeyError, TypeError, ValueError):
+            raise exceptions.AuthenticationFailed("Jeton d'activité invalide.")
+        # Only issued to active students: the flags are fixed so that permission
+        # checks never load the deferred row
+        user = build_user({
+            **token.profil, 'id': token.user_id, 'role': token.role,
+            'is_active': True, 'is_staff': False, 'is_superuser': False,
+        })
+        return user, token
+
+    def authenticate_header(self, request):
+        return get_config()['KEYWORD']
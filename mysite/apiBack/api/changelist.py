@@ -0,0 +1,178 @@
+"""
+Admin changelists on the large tables (responses, debriefs, activities).
+
+- AutocompleteFilter: foreign key filter picked with the admin autocomplete
+  (AutocompleteJsonView), instead of the default filter that loads and
+  lists every activity, statement or user. The target model's admin must
+  have search_fields. Used like Django's filters:
+  `list_filter = [('activite', AutocompleteFilter)]`.
+- EstimatedCountPaginator: without filter or search, the row count comes
+  from the engine statistics (pg_class.reltuples on PostgreSQL,
+  information_schema on MySQL) instead of a COUNT(*) over the whole table.
+  Engines without statistics (SQLite) get an exact COUNT(*) instead, kept
+  in the cache for EXACT_COUNT_CACHE_SECONDS once the table reaches
+  EXACT_COUNT_BELOW rows, so the table is counted at most once per period
+  rather than on every page. Below EXACT_COUNT_BELOW the count is always
+  exact. An estimate that is too high (stale statistics after a purge, or a
+  cached count) would lead to empty pages: the requested page is then
+  moved back to the real last page. EstimatedCountMixin installs it on a
+  ModelAdmin, with `show_full_result_count = False`: the filtered list does
+  not count the whole table either.
+"""
+from django import forms
+from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+# Below this, the exact count is cheap enough (and estimates are least reliable)
+EXACT_COUNT_BELOW = 10000
+# Engines without statistics: how long an exact count of a large table is reused
+EXACT_COUNT_CACHE_SECONDS = 60
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    template = 'admin/api/filtre_autocomplete.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f'{field_path}__{field.target_field.name}__exact'
+        super().__init__(field, request, params, model, model_admin, field_path)
+        value = self.used_parameters.get(self.lookup_kwarg)
+        self.lookup_val = value[-1] if isinstance(value, list) else value
+        self.admin_site = model_admin.admin_site
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def choices(self, changelist):
+        # Only the "all" link: values are picked in the autocomplete box
+        yield {
+            'selected': self.lookup_val is None,
+            'query_string': changelist.get_query_string(remove=[self.lookup_kwarg]),
+            'display': "Tout",
+        }
+
+    @property
+    def widget(self):
+        """Autocomplete field; only the selected value is loaded (one query)."""
+        field = forms.ModelChoiceField(
+            queryset=self.field.remote_field.model._default_manager.all(),
+            to_field_name=self.field.target_field.name,
+            widget=AutocompleteSelect(self.field, self.admin_site),
+            required=False,
+        )
+        try:
+            return field.widget.render(self.lookup_kwarg, self.lookup_val, attrs={'id': f'filtre_{self.field_path}'})
+        except (ValueError, TypeError):
+            # Malformed value in the URL: the changelist reports it on its own
+            return field.widget.render(self.lookup_kwarg, None, attrs={'id': f'filtre_{self.field_path}'})
+
+    @staticmethod
+    def media(model_admin, field_name):
+        """select2 / autocomplete scripts to add to the admin `media`."""
+        return AutocompleteSelect(model_admin.model._meta.get_field(field_name), model_admin.admin_site).media
+
+
+class AutocompleteFilterMixin:
+    """ModelAdmin: loads the scripts of the AutocompleteFilters in list_filter."""
+
+    @property
+    def media(self):
+        media = super().media
+        for list_filter in self.list_filter:
+            if isinstance(list_filter, (list, tuple)) and issubclass(list_filter[1], AutocompleteFilter):
+                # Every autocomplete filter needs the same scripts
+                return media + AutocompleteFilter.media(self, list_filter[0].split('__')[0])
+        return media
+
+
+def estimated_count(queryset):
+    """Row count of the table of `queryset` according to the engine, or None if it does not know."""
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    if connection.vendor not in ('postgresql', 'mysql'):
+        return None
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)", [table])
+            row = cursor.fetchone()
+            # -1: never analyzed
+            return row[0] if row and row[0] >= 0 else None
+        cursor.execute(
+            "SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s",
+            [table],
+        )
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+
+class EstimatedCountPaginator(Paginator):
+    estimated = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is None or query.where or query.combinator or query.distinct:
+            return super().count
+        estimate = estimated_count(queryset)
+        if estimate is None:
+            return self._cached_count()
+        if estimate < EXACT_COUNT_BELOW:
+            return super().count
+        self.estimated = True
+        return estimate
+
+    def _cached_count(self):
+        key = f'changelist:count:{self.object_list.db}:{self.object_list.model._meta.db_table}'
+        count = cache.get(key)
+        if count is not None:
+            self.estimated = True
+            return count
+        count = super().count
+        if count >= EXACT_COUNT_BELOW:
+            cache.set(key, count, EXACT_COUNT_CACHE_SECONDS)
+        return count
+
+    def _count_exactly(self):
+        self.estimated = False
+        self.__dict__['count'] = Paginator.count.func(self)
+        self.__dict__.pop('num_pages', None)
+
+    def page(self, number):
+        try:
+            page = super().page(number)
+        except EmptyPage:
+            if not self.estimated or int(number) < 1:
+                raise
+            # Underestimated: the page may exist after all
+            self._count_exactly()
+            return super().page(min(int(number), self.num_pages))
+        if self.estimated and page.number > 1 and not page.object_list:
+            # Overestimated: past the real last page
+            self._count_exactly()
+            return super().page(self.num_pages)
+        return page
+
+
+class EstimatedCountChangeList(ChangeList):
+    def get_results(self, request):
+        super().get_results(request)
+        # The paginator may have traded its estimate for an exact count and moved the page
+        if self.result_count != self.paginator.count:
+            self.result_count = self.paginator.count
+            self.can_show_all = self.result_count <= self.list_max_show_all
+            self.multi_page = self.result_count > self.list_per_page
+        self.page_num = min(self.page_num, self.paginator.num_pages)
+
+
+class EstimatedCountMixin:
+    """ModelAdmin: estimated row count (EstimatedCountPaginator), without recounting the whole table."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return EstimatedCountChangeList
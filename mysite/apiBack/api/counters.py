@@ -0,0 +1,135 @@
+"""
+Denormalized response counters (CompteurReponse, CompteurEtudiant).
+
+Reponse's signals (api/signals.py) update them with F() increments inside a
+transaction, which saves the COUNT(*) over Reponse on progress screens. Bulk
+operations (bulk_create, update(), queryset delete() without signals) skip
+this module: run `rebuild()` or `manage.py compteurs_reponses` after them.
+
+Archived activities (api/archives.py) no longer have their responses in the
+database: their counters are kept as they are, outside verify() and rebuild().
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import CompteurEtudiant, CompteurReponse, Reponse
+
+
+def choice_key(reponse_vf, reponse_choisie_qcm):
+    """Choice key of a response, as stored in CompteurReponse.choix."""
+    if reponse_vf is not None:
+        return 'vrai' if reponse_vf else 'faux'
+    if reponse_choisie_qcm is not None:
+        return str(reponse_choisie_qcm)
+    return 'aucun'
+
+
+def _increment(model, lookup, delta):
+    """Applies `delta` to the counter identified by `lookup`, creating it if needed."""
+    if model.objects.filter(**lookup).update(total=F('total') + delta) or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(total=delta, **lookup)
+    except IntegrityError:
+        # Created concurrently between our UPDATE and INSERT
+        model.objects.filter(**lookup).update(total=F('total') + delta)
+
+
+def _deltas(state, sign):
+    activite_id, affirmation_id, etudiant_id, reponse_vf, reponse_choisie_qcm = state
+    return {
+        (CompteurReponse, (('activite_id', activite_id), ('affirmation_id', affirmation_id),
+                           ('choix', choice_key(reponse_vf, reponse_choisie_qcm)))): sign,
+        (CompteurEtudiant, (('activite_id', activite_id), ('etudiant_id', etudiant_id))): sign,
+    }
+
+
+def apply(previous_state=None, new_state=None):
+    """
+    Applies a response's change from `previous_state` to `new_state` (tuples
+    from Reponse.etat_compteurs(), None = absent) to the counters.
+    """
+    deltas = Counter()
+    if previous_state is not None:
+        deltas.update(_deltas(previous_state, -1))
+    if new_state is not None:
+        deltas.update(_deltas(new_state, 1))
+    changes = [(model, dict(lookup), delta) for (model, lookup), delta in deltas.items() if delta]
+    if not changes:
+        return
+    with transaction.atomic():
+        # Decrements first: they never insert, so they cannot collide on the unique keys
+        for model, lookup, delta in sorted(changes, key=lambda change: change[2]):
+            _increment(model, lookup, delta)
+
+
+def _expected(activite_code=None):
+    """Expected counters, recomputed from Reponse with two grouped queries."""
+    reponses = Reponse.objects.exclude(activite__est_archivee=True)
+    if activite_code:
+        reponses = reponses.filter(activite_id=activite_code)
+    by_choice = Counter()
+    rows = reponses.values('activite_id', 'affirmation_id', 'reponse_vf', 'reponse_choisie_qcm') \
+        .annotate(n=Count('id')).order_by()
+    for row in rows:
+        key = (row['activite_id'], row['affirmation_id'], choice_key(row['reponse_vf'], row['reponse_choisie_qcm']))
+        by_choice[key] += row['n']
+    by_student = Counter({
+        (row['activite_id'], row['etudiant_id']): row['n']
+        for row in reponses.values('activite_id', 'etudiant_id').annotate(n=Count('id')).order_by()
+    })
+    return by_choice, by_student
+
+
+def _stored(activite_code=None):
+    choices = CompteurReponse.objects.exclude(activite__est_archivee=True)
+    students = CompteurEtudiant.objects.exclude(activite__est_archivee=True)
+    if activite_code:
+        choices = choices.filter(activite_id=activite_code)
+        students = students.filter(activite_id=activite_code)
+    by_choice = Counter({
+        (a, f, c): total
+        for a, f, c, total in choices.values_list('activite_id', 'affirmation_id', 'choix', 'total') if total
+    })
+    by_student = Counter({
+        (a, e): total for a, e, total in students.values_list('activite_id', 'etudiant_id', 'total') if total
+    })
+    return by_choice, by_student
+
+
+def verify(activite_code=None):
+    """List of mismatches [(kind, key, stored, expected)]; empty when everything matches."""
+    expected_choice, expected_student = _expected(activite_code)
+    stored_choice, stored_student = _stored(activite_code)
+    differences = []
+    for kind, expected, stored in (('reponse', expected_choice, stored_choice),
+                                   ('etudiant', expected_student, stored_student)):
+        for key in sorted(set(expected) | set(stored), key=str):
+            if expected[key] != stored[key]:
+                differences.append((kind, key, stored[key], expected[key]))
+    return differences
+
+
+@transaction.atomic
+def rebuild(activite_code=None):
+    """Recomputes the counters (of one activity or all of them) from Reponse."""
+    by_choice, by_student = _expected(activite_code)
+    choices = CompteurReponse.objects.exclude(activite__est_archivee=True)
+    students = CompteurEtudiant.objects.exclude(activite__est_archivee=True)
+    if activite_code:
+        choices = choices.filter(activite_id=activite_code)
+        students = students.filter(activite_id=activite_code)
+    choices.delete()
+    students.delete()
+    CompteurReponse.objects.bulk_create(
+        [CompteurReponse(activite_id=a, affirmation_id=f, choix=c, total=n) for (a, f, c), n in by_choice.items()],
+        batch_size=1000,
+    )
+    CompteurEtudiant.objects.bulk_create(
+        [CompteurEtudiant(activite_id=a, etudiant_id=e, total=n) for (a, e), n in by_student.items()],
+        batch_size=1000,
+    )
+    return len(by_choice), len(by_student)
@@ -0,0 +1,220 @@
+"""
+Live feed of an activity's responses (SSE or long-poll), for the
+encadrants' debrief screen.
+
+A client follows the activity from a "<updated_at in µs>-<id>" cursor: it
+receives the responses created or edited after that cursor, in (updated_at,
+id) order. All clients of one activity share a single `ActivityFeed` per
+asyncio loop: one query every POLL_INTERVAL seconds, however many clients
+are connected. The poller stops when its last subscriber disconnects.
+
+Only rows older than SETTLE seconds are published, so that a transaction
+committed shortly after its timestamp does not fall behind the cursor.
+"""
+import asyncio
+import contextvars
+import datetime
+import logging
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Reponse
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'POLL_INTERVAL': 1.0,
+    'SETTLE': 0.5,
+    'HEARTBEAT': 15.0,
+    'LONG_POLL_TIMEOUT': 25.0,
+    'BATCH_SIZE': 500,
+}
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+FIELDS = (
+    'id', 'affirmation_id', 'etudiant_id', 'etudiant__username',
+    'reponse_vf', 'reponse_choisie_qcm', 'justification', 'timestamp', 'updated_at',
+)
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'LIVE_FEED', {})}
+
+
+def format_cursor(key):
+    if key is None:
+        return ''
+    updated_at, pk = key
+    return f"{(updated_at - _EPOCH) // _MICROSECOND}-{pk}"
+
+
+def parse_cursor(value):
+    """Text cursor -> (updated_at, id) key; None if empty. Raises ValueError if invalid."""
+    if not value:
+        return None
+    micros, pk = value.split('-', 1)
+    return _EPOCH + int(micros) * _MICROSECOND, int(pk)
+
+
+def _row_key(row):
+    return row['updated_at'], row['id']
+
+
+def serialize(row):
+    return {
+        'id': row['id'],
+        'affirmation': row['affirmation_id'],
+        'etudiant': {'id': row['etudiant_id'], 'username': row['etudiant__username']},
+        'reponse_vf': row['reponse_vf'],
+        'reponse_choisie_qcm': row['reponse_choisie_qcm'],
+        'justification': row['justification'],
+        'timestamp': row['timestamp'].isoformat(),
+        'updated_at': row['updated_at'].isoformat(),
+    }
+
+
+def _settled_queryset(code_activite):
+    settle = datetime.timedelta(seconds=get_config()['SETTLE'])
+    return Reponse.objects.filter(activite_id=code_activite, updated_at__lte=timezone.now() - settle)
+
+
+def _fetch_changes(code_activite, cursor):
+    batch_size = get_config()['BATCH_SIZE']
+    rows = []
+    while True:
+        queryset = _settled_queryset(code_activite)
+        if cursor is not None:
+            updated_at, pk = cursor
+            queryset = queryset.filter(updated_at__gte=updated_at).exclude(updated_at=updated_at, id__lte=pk)
+        batch = list(queryset.order_by('updated_at', 'id').values(*FIELDS)[:batch_size])
+        rows.extend(batch)
+        if len(batch) < batch_size:
+            return rows
+        cursor = _row_key(batch[-1])
+
+
+def _latest_cursor(code_activite):
+    row = _settled_queryset(code_activite).order_by('-updated_at', '-id').values('updated_at', 'id').first()
+    return _row_key(row) if row else None
+
+
+# Not thread-sensitive: the poller must not queue behind the shared sync thread
+# that sync middleware keeps busy for the duration of a long-poll request.
+fetch_changes = sync_to_async(_fetch_changes, thread_sensitive=False)
+fetch_changes.__doc__ = "Every response changed after `cursor` (a key or None), in batches of BATCH_SIZE."
+latest_cursor = sync_to_async(_latest_cursor, thread_sensitive=False)
+
+
+class ActivityFeed:
+    """Shared poller of one activity; each subscriber receives the batches in its queue."""
+
+    def __init__(self, code_activite, registry):
+        self.code_activite = code_activite
+        self.cursor = None
+        self.subscribers = set()
+        self._registry = registry
+        self._task = None
+        self._started = asyncio.Event()
+
+    async def subscribe(self):
+        queue = asyncio.Queue()
+        self.subscribers.add(queue)
+        if self._task is None:
+            # Start cursor fixed before returning, so a catch-up query issued by
+            # the caller afterwards overlaps it instead of leaving a gap.
+            # Fresh context: the poller outlives the request that started it, and must
+            # not run its queries on that request's (soon closed) sync thread.
+            self._task = asyncio.get_running_loop().create_task(self._run(), context=contextvars.Context())
+            try:
+                self.cursor = await latest_cursor(self.code_activite)
+            finally:
+                self._started.set()
+        else:
+            await self._started.wait()
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+    async def _run(self):
+        config = get_config()
+        try:
+            await self._started.wait()
+            while self.subscribers:
+                try:
+                    rows = await fetch_changes(self.code_activite, self.cursor)
+                except Exception:
+                    logger.exception("Live feed poll failed for activity %s", self.code_activite)
+                    rows = []
+                if rows:
+                    self.cursor = _row_key(rows[-1])
+                    for queue in self.subscribers:
+                        queue.put_nowait(rows)
+                await asyncio.sleep(config['POLL_INTERVAL'])
+        finally:
+            # No await between the emptiness check and this: subscribe() cannot interleave
+            if self._registry.get(self.code_activite) is self:
+                del self._registry[self.code_activite]
+
+
+# One registry per event loop: feeds (and their tasks) are bound to the loop that created them
+_feeds = weakref.WeakKeyDictionary()
+
+
+def get_feed(code_activite):
+    registry = _feeds.setdefault(asyncio.get_running_loop(), {})
+    feed = registry.get(code_activite)
+    if feed is None:
+        feed = registry[code_activite] = ActivityFeed(code_activite, registry)
+    return feed
+
+
+class Subscription:
+    """
+    One client's subscription: catch-up from its cursor, then the shared
+    poller's batches, without duplicates or gaps. Use with `async with`.
+    """
+
+    def __init__(self, code_activite, cursor):
+        self.code_activite = code_activite
+        self.cursor = cursor
+        self._feed = None
+        self._queue = None
+
+    async def __aenter__(self):
+        self._feed = get_feed(self.code_activite)
+        self._queue = await self._feed.subscribe()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._feed.unsubscribe(self._queue)
+
+    def _accept(self, rows):
+        fresh = [row for row in rows if self.cursor is None or _row_key(row) > self.cursor]
+        if fresh:
+            self.cursor = _row_key(fresh[-1])
+        return fresh
+
+    async def catch_up(self):
+        return self._accept(await fetch_changes(self.code_activite, self.cursor))
+
+    async def next_batch(self, timeout):
+        """Next batch of new responses, or [] if nothing arrives within `timeout` seconds."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return []
+            try:
+                rows = await asyncio.wait_for(self._queue.get(), remaining)
+            except asyncio.TimeoutError:
+                return []
+            fresh = self._accept(rows)
+            if fresh:
+                return fresh
@@ -0,0 +1,247 @@
+"""
+Affirmation generation with Gemini, shared by the views and the
+pre-generation pool (see generation_pool.py).
+"""
+import json
+import logging
+import math
+import re
+
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from . import llm
+from .logs import log_llm_payload
+from .similarity import SimilarityIndex, get_corpus_index, normalize_text
+
+logger = logging.getLogger(__name__)
+
+class MockGenAI:
+    """Stands in for google.generativeai when the package cannot be imported."""
+    api_key = None
+
+    def configure(self, **kwargs):
+        pass
+
+    def GenerativeModel(self, *args, **kwargs):
+        return MockGenerativeModel()
+
+
+class MockGenerativeModel:
+    def generate_content(self, *args, **kwargs):
+        return MockResponse()
+
+
+class MockResponse:
+    def __init__(self):
+        self.text = "Google Generative AI is not available due to compatibility issues."
+
+
+def _load_genai():
+    # google.generativeai pulls in grpc, protobuf and google-api-core (about half
+    # a second): only the generation views pay for it, on first use
+    try:
+        import google.generativeai as module
+    except Exception as e:
+        logger.warning("Google Generative AI not available: %s", e)
+        return MockGenAI()
+    api_key = getattr(settings, 'GEMINI_API_KEY', '')
+    if not api_key:
+        logger.warning("GEMINI_API_KEY environment variable not set.")
+    else:
+        module.configure(api_key=api_key)
+    return module
+
+
+# Imported and configured on first attribute access
+genai = SimpleLazyObject(_load_genai)
+
+
+class GenerationFormatError(ValueError):
+    """Gemini's response does not have the expected structure."""
+
+    def __init__(self, message, raw_response=None):
+        super().__init__(message)
+        self.raw_response = raw_response
+
+
+def extract_json_from_gemini(input_text):
+    """Helper function to clean and parse JSON from Gemini response."""
+    # Remove markdown code block fences and language specifier
+    cleaned_text = re.sub(r'^```json\s*', '', input_text.strip(), flags=re.MULTILINE)
+    cleaned_text = re.sub(r'\s*```$', '', cleaned_text, flags=re.MULTILINE)
+    cleaned_text = cleaned_text.strip()
+
+    try:
+        parsed_json = json.loads(cleaned_text)
+        return parsed_json
+    except json.JSONDecodeError as e:
+        logger.warning("Error decoding JSON: %s", e, extra={'event': 'llm_format_error'})
+        # Fallback: Try to find the first valid JSON structure (list or dict)
+        match = re.search(r"(\[.*\]|\{.*\})", cleaned_text, re.DOTALL)
+        if match:
+            try:
+                parsed_json = json.loads(match.group(0))
+                logger.warning("Used fallback regex to extract JSON.")
+                return parsed_json
+            except json.JSONDecodeError:
+                logger.warning("Fallback JSON extraction failed.")
+        return None # Indicate failure
+
+
+# Variable-count generation is split into sub-generations of at most CHUNK_SIZE
+# (long answers get truncated by max_output_tokens), run in waves of at most
+# LLM_RESILIENCE['MAX_FANOUT'] so one request cannot take the whole LLM pool
+CHUNK_SIZE = 10             # Max affirmations asked per sub-generation
+MAX_AFFIRMATIONS = 100      # Cap per request
+MAX_ROUNDS = 2              # Top-up rounds after deduplication
+
+
+def build_affirmations_prompt(question, count, serie=None):
+    angle = ""
+    if serie:
+        angle = f"\n            Série {serie[0]} sur {serie[1]} : privilégie des aspects de la question différents de ceux des autres séries, sans répéter d'idée.\n"
+    return f"""
+            Vous êtes un expert en connaissances médicales. Votre tâche consiste à produire exactement {count} affirmations médicales fausses mais plausibles qui répondent directement à la question: "{question}" donnée tout en prenant en compte le contexte suivant.
+{angle}
+            Chaque affirmation doit :
+            1. Être complexe et difficile à juger comme fausse au premier abord.
+            2. Paraître scientifiquement plausible et liée au sujet médical de la question.
+            3. Être directement en lien avec le contexte fourni.
+            4. assure toi de respecter le formatage
+
+
+            Les affirmations doivent toutes être fausses, mais paraître scientifiquement crédibles.
+
+            Réponds **uniquement** avec un objet JSON structuré comme ceci ({count} éléments dans la liste), sans texte avant ou après:
+            {{
+              "affirmations": [
+                {{
+                  "affirmation": "texte de l'affirmation fausse",
+                  "is_correct_vf": false,
+                  "explication": "explication détaillée de pourquoi cette affirmation est fausse"
+                }}
+              ]
+            }}
+            """
+
+
+def _affirmations_model():
+    generation_config = {
+        "temperature": 0.9, # Slightly creative
+        "top_p": 0.95,
+        "top_k": 40,
+        "max_output_tokens": 8192,
+        "response_mime_type": "text/plain", # Expecting plain text containing JSON
+    }
+    return genai.GenerativeModel(
+        model_name="gemini-1.5-flash", # Or "gemini-1.5-flash" for speed/cost
+        generation_config=generation_config,
+    )
+
+
+def parse_false_affirmations(response_text, count, strict=True):
+    """Affirmations from Gemini's raw response; raises GenerationFormatError if unusable."""
+    log_llm_payload('generate_affirmations', response_text)
+
+    affirmations_data = extract_json_from_gemini(response_text)
+    if not affirmations_data or 'affirmations' not in affirmations_data:
+        raise GenerationFormatError("Impossible de décoder la réponse JSON de l'API Gemini.", response_text)
+
+    affirmations = affirmations_data['affirmations']
+    if not strict and isinstance(affirmations, list):
+        affirmations = [aff for aff in affirmations if isinstance(aff, dict) and aff.get('affirmation')][:count]
+    if not isinstance(affirmations, list) or not affirmations or (strict and len(affirmations) != count):
+        logger.warning("Gemini returned unexpected structure or count: %s items",
+                       len(affirmations) if isinstance(affirmations, list) else 0, extra={'event': 'llm_format_error'})
+        raise GenerationFormatError("Format de réponse incorrect (nombre/structure) depuis l'API Gemini.", response_text)
+
+    # Ensure is_correct_vf is explicitly false
+    for aff in affirmations:
+        aff['is_correct_vf'] = False # Override anything Gemini might have put
+    return affirmations
+
+
+def generate_false_affirmations(question, count=3, hedge=True, serie=None, strict=True):
+    """
+    Generates `count` false but plausible affirmations for `question`.
+
+    Returns a list of {affirmation, is_correct_vf, explication} dicts. Raises
+    GenerationFormatError if the response is unusable, and llm's errors
+    (LLMTimeoutError, LLMUnavailableError) unchanged. With strict=False, a
+    list of another size is accepted (truncated to count).
+    """
+    prompt = build_affirmations_prompt(question, count, serie)
+    response = llm.generate_content(_affirmations_model(), prompt, operation='generate_affirmations', hedge=hedge)
+    return parse_false_affirmations(response.text, count, strict)
+
+
+def _split_chunks(number):
+    """Splits `number` into balanced series of at most CHUNK_SIZE affirmations."""
+    count = max(1, math.ceil(number / CHUNK_SIZE))
+    base, extra = divmod(number, count)
+    return [base + 1] * extra + [base] * (count - extra)
+
+
+def generate_many_false_affirmations(question, number):
+    """
+    Generates `number` distinct false affirmations, parallelizing the request.
+
+    The request is split into series of at most CHUNK_SIZE affirmations, run
+    in waves of MAX_FANOUT concurrent calls on llm's pool (without hedging:
+    they already use several threads). Duplicates across series and near
+    duplicates of affirmations already in the bank are dropped, then a top-up
+    round runs if needed.
+
+    Trade-off: each call stays short and complete, but the duration grows
+    with the number of waves (MAX_AFFIRMATIONS takes 5 waves with the
+    defaults). Raising MAX_FANOUT shortens them at the cost of a larger share
+    of the pool for a single request.
+
+    Returns (affirmations, errors); raises the first error if no
+    sub-generation succeeded.
+    """
+    results = []
+    batch_index = SimilarityIndex()
+    corpus_index = get_corpus_index()
+    errors = []
+    model = _affirmations_model()
+
+    for _ in range(MAX_ROUNDS):
+        missing = number - len(results)
+        if missing <= 0:
+            break
+        chunks = _split_chunks(missing)
+        fanout = max(1, llm.get_config()['MAX_FANOUT'])
+        round_succeeded = False
+        for start in range(0, len(chunks), fanout):
+            pending = []
+            for index in range(start, min(start + fanout, len(chunks))):
+                size = chunks[index]
+                prompt = build_affirmations_prompt(question, size, (index + 1, len(chunks)) if len(chunks) > 1 else None)
+                try:
+                    pending.append((size, llm.submit(model, prompt, operation='generate_affirmations', hedge=False)))
+                except llm.LLMError as e:
+                    errors.append(e)
+            # Keep submission order so results are deterministic for a given set of responses
+            for size, call in pending:
+                try:
+                    affirmations = parse_false_affirmations(call.result().text, size, strict=False)
+                except (llm.LLMError, GenerationFormatError) as e:
+                    errors.append(e)
+                    continue
+                round_succeeded = True
+                for aff in affirmations:
+                    text = aff['affirmation']
+                    if not normalize_text(text) or batch_index.query(text, limit=1) or corpus_index.query(text, limit=1):
+                        continue
+                    batch_index.add(len(results), text)
+                    results.append(aff)
+            if any(isinstance(e, llm.LLMUnavailableError) for e in errors):
+                break
+        if not round_succeeded or any(isinstance(e, llm.LLMUnavailableError) for e in errors):
+            break
+
+    if not results and errors:
+        raise errors[0]
+    return results[:number], errors
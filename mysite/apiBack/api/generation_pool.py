@@ -0,0 +1,152 @@
+"""
+Pre-generation pool of affirmations, per category and popular question.
+
+Each (category, normalized question) key keeps up to SIZE sets of
+affirmations ready to serve. A served set leaves the pool (never served
+twice) and a refill is scheduled in the background. Only questions asked at
+least MIN_REQUESTS times are kept warm, at most MAX_TOPICS_PER_CATEGORY per
+category; sets older than TTL are discarded.
+
+The pool lives in the process: each worker has its own.
+"""
+import logging
+import threading
+import time
+from collections import Counter, deque
+from concurrent import futures
+
+from django.conf import settings
+
+from . import llm
+from .generation import GenerationFormatError, generate_false_affirmations
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'SIZE': 2,                       # Ready sets per key
+    'TTL': 6 * 3600,                 # Lifetime (s) of a pre-generated set
+    'MIN_REQUESTS': 2,               # Requests before a question is kept warm
+    'MAX_TOPICS_PER_CATEGORY': 10,   # Warm questions per category
+    'WORKERS': 2,                    # Concurrent refills
+    'MAX_TRACKED_QUESTIONS': 1000,   # Tracked questions before trimming
+}
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'GENERATION_POOL', {}))
+    return config
+
+
+def normalize_question(question):
+    return ' '.join(question.lower().split())
+
+
+class AffirmationPool:
+    def __init__(self, config):
+        self.config = config
+        self._entries = {}           # key -> deque[(created_at, question, affirmations)]
+        self._popularity = Counter() # key -> number of requests
+        self._refilling = set()
+        self._lock = threading.Lock()
+        self._executor = futures.ThreadPoolExecutor(
+            max_workers=config['WORKERS'], thread_name_prefix='generation-pool'
+        )
+
+    @staticmethod
+    def make_key(question, categorie_id=None):
+        return (categorie_id, normalize_question(question))
+
+    def take(self, question, categorie_id=None):
+        """Removes and returns a ready set, or None; schedules the refill."""
+        key = self.make_key(question, categorie_id)
+        with self._lock:
+            self._popularity[key] += 1
+            self._trim()
+            entries = self._purge_expired(key)
+            affirmations = entries.popleft()[2] if entries else None
+        self.schedule_refill(question, categorie_id)
+        return affirmations
+
+    def schedule_refill(self, question, categorie_id=None):
+        key = self.make_key(question, categorie_id)
+        with self._lock:
+            if key in self._refilling or not self._is_popular(key):
+                return False
+            if len(self._purge_expired(key)) >= self.config['SIZE']:
+                return False
+            self._refilling.add(key)
+        self._executor.submit(self._refill, key, question)
+        return True
+
+    def _is_popular(self, key):
+        if self._popularity[key] < self.config['MIN_REQUESTS']:
+            return False
+        categorie_id = key[0]
+        ranked = sorted(
+            (count, k) for k, count in self._popularity.items() if k[0] == categorie_id
+        )
+        top = {k for _, k in ranked[-self.config['MAX_TOPICS_PER_CATEGORY']:]}
+        return key in top
+
+    def _trim(self):
+        """Forgets the least requested questions when tracking grows too large."""
+        limit = self.config['MAX_TRACKED_QUESTIONS']
+        if len(self._popularity) <= limit:
+            return
+        self._popularity = Counter(dict(self._popularity.most_common(limit // 2)))
+        for key in list(self._entries):
+            if key not in self._popularity and key not in self._refilling:
+                del self._entries[key]
+
+    def _purge_expired(self, key):
+        entries = self._entries.setdefault(key, deque())
+        limit = time.monotonic() - self.config['TTL']
+        while entries and entries[0][0] < limit:
+            entries.popleft()
+        return entries
+
+    def _refill(self, key, question):
+        try:
+            while True:
+                with self._lock:
+                    if len(self._purge_expired(key)) >= self.config['SIZE']:
+                        return
+                # Leave the API alone while the breaker is open
+                if llm.get_breaker().state != llm.CircuitBreaker.CLOSED:
+                    return
+                affirmations = generate_false_affirmations(question, hedge=False)
+                with self._lock:
+                    self._entries.setdefault(key, deque()).append((time.monotonic(), question, affirmations))
+        except (llm.LLMError, GenerationFormatError) as e:
+            logger.warning("Refill failed for %s: %s", key, e, extra={'event': 'pool_refill_failed'})
+        except Exception as e:
+            logger.exception("Unexpected refill error for %s", key)
+        finally:
+            with self._lock:
+                self._refilling.discard(key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'keys': len(self._entries),
+                'ready_sets': sum(len(entries) for entries in self._entries.values()),
+                'refilling': len(self._refilling),
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """The process's pool, or None when disabled."""
+    global _pool
+    config = get_config()
+    if not config['ENABLED']:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = AffirmationPool(config)
+        return _pool
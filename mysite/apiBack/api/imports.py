@@ -0,0 +1,84 @@
+"""
+Reading of imported affirmation batches (AffirmationImportAPIView).
+
+Accepted formats:
+
+- JSON: a list of objects, or {"affirmations": [...], "activity_code": ...,
+  "rejeter_doublons": ...};
+- CSV: a `text/csv` body or a multipart `fichier` file, with a header line
+  (COLONNES). `,` `;` or tab separator, UTF-8 (Excel's BOM accepted). Empty
+  cells mean "not provided"; vrai/faux and oui/non are accepted for
+  is_correct_vf.
+
+Each row becomes a dict passed as is to AffirmationSerializer, with its
+number (`ligne`) for the errors: position in the JSON list (from 1) or line
+number in the CSV file.
+"""
+import csv
+import io
+
+COLONNES = ('affirmation', 'explication', 'nbr_reponses', 'is_correct_vf', 'reponse_correcte_qcm')
+OPTIONS = ('activity_code', 'rejeter_doublons')
+BOOLEENS = {'vrai': True, 'oui': True, 'faux': False, 'non': False}
+
+
+class InvalidBatch(ValueError):
+    """Batch unreadable as a whole (message meant for the encadrant)."""
+
+
+def _csv_rows(content):
+    try:
+        text = content.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise InvalidBatch("Le fichier CSV doit être encodé en UTF-8.")
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.DictReader(io.StringIO(text), dialect=dialect)
+    if not reader.fieldnames or 'affirmation' not in [name.strip() for name in reader.fieldnames]:
+        raise InvalidBatch(f"En-tête CSV attendu : {', '.join(COLONNES)}.")
+    rows = []
+    for record in reader:
+        row = {}
+        for name, value in record.items():
+            if name is None or value is None:
+                continue
+            name, value = name.strip(), value.strip()
+            if name not in COLONNES or value == '':
+                continue
+            if name == 'is_correct_vf':
+                value = BOOLEENS.get(value.lower(), value)
+            row[name] = value
+        if row:
+            # Physical line where the record ends (the header is line 1)
+            rows.append((reader.line_num, row))
+    return rows
+
+
+def read_batch(request):
+    """
+    Returns (rows, options) where rows = [(number, dict)] and options holds
+    the OPTIONS fields read from the body (JSON object or multipart form),
+    else from the query string (the only way with a text/csv body); raises
+    InvalidBatch if the batch is unreadable.
+    """
+    options = {name: request.query_params.get(name) for name in OPTIONS}
+    if request.content_type.startswith('text/csv'):
+        return _csv_rows(request.body), options
+
+    data = request.data
+    if isinstance(data, dict):
+        options.update({name: data[name] for name in OPTIONS if data.get(name) not in (None, '')})
+    fichier = request.FILES.get('fichier')
+    if fichier is not None:
+        return _csv_rows(fichier.read()), options
+
+    if isinstance(data, dict):
+        data = data.get('affirmations')
+    if not isinstance(data, list):
+        raise InvalidBatch("Envoyez une liste d'affirmations (JSON), un corps text/csv ou un fichier CSV 'fichier'.")
+    rows = []
+    for numero, row in enumerate(data, start=1):
+        rows.append((numero, row if isinstance(row, dict) else {}))
+    return rows, options
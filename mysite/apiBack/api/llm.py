@@ -0,0 +1,380 @@
+"""
+Resilience layer around LLM (Gemini) calls.
+
+Every call goes through `generate_content()` (or `submit()` to start several
+at once), which applies:
+- a per-call deadline, counted from the moment a pool thread picks the call
+  up (the request thread never waits longer); a call left in the queue for
+  more than QUEUE_TIMEOUT is dropped and counted as rejected, without
+  penalizing the breaker (the API was never contacted),
+- a circuit breaker that fails fast while the recent error rate is too high,
+- an optional hedged request, sent again when the first one exceeds an
+  observed latency percentile, only if a pool thread is free.
+
+A thread whose call timed out stays busy until the call ends, which the
+`timeout` passed to the SDK bounds.
+
+Breaker state and call timings are exposed by `snapshot()`.
+"""
+import threading
+import time
+from collections import deque
+from concurrent import futures
+
+from django.conf import settings
+
+DEFAULTS = {
+    'TIMEOUT': 30.0,             # Max duration (s) of a call once started
+    'QUEUE_TIMEOUT': 10.0,       # Max wait (s) for a free pool thread
+    'MAX_WORKERS': 8,            # Concurrent LLM calls per process
+    'MAX_FANOUT': 2,             # Concurrent calls for one request (generation.py)
+    'BREAKER_WINDOW': 20,        # Number of recent calls considered
+    'BREAKER_MIN_CALLS': 5,      # Minimum calls before the breaker can open
+    'BREAKER_ERROR_RATE': 0.5,   # Error rate that opens the breaker
+    'BREAKER_COOLDOWN': 30.0,    # Time (s) spent open before a probe
+    'HEDGE_PERCENTILE': None,    # E.g. 95 to enable hedged requests
+    'HEDGE_MIN_SAMPLES': 20,     # Samples required before hedging
+    'LATENCY_SAMPLES': 200,      # Size of the latency window
+}
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'LLM_RESILIENCE', {}))
+    return config
+
+
+class LLMError(Exception):
+    """Base error of the LLM layer."""
+
+
+class LLMTimeoutError(LLMError):
+    """The call did not complete within its deadline."""
+
+
+class LLMUnavailableError(LLMError):
+    """The breaker is open: the call is refused without contacting the API."""
+
+
+class CircuitBreaker:
+    """Sliding-window circuit breaker (closed / open / half-open)."""
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, window, min_calls, error_rate, cooldown):
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.cooldown = cooldown
+        self._outcomes = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow(self):
+        """Whether a call may go out (a single probe while half-open)."""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._state = self.CLOSED
+                self._outcomes.clear()
+            self._outcomes.append(True)
+
+    def release(self):
+        """Allowed call that never went out: frees the half-open probe, if any."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._trip()
+                return
+            self._outcomes.append(False)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.error_rate:
+                self._trip()
+
+    def _trip(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+    def error_rate_observed(self):
+        with self._lock:
+            if not self._outcomes:
+                return 0.0
+            return self._outcomes.count(False) / len(self._outcomes)
+
+
+class _OperationStats:
+    """Counters and recent latencies for one named LLM operation."""
+
+    def __init__(self, samples):
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.hedged = 0
+        self.latency_total = 0.0
+        self.latencies = deque(maxlen=samples)
+
+    def as_dict(self):
+        latencies = sorted(self.latencies)
+        return {
+            'calls': self.calls,
+            'successes': self.successes,
+            'failures': self.failures,
+            'timeouts': self.timeouts,
+            'rejected': self.rejected,
+            'hedged': self.hedged,
+            'latency_seconds_total': round(self.latency_total, 6),
+            'latency_p50': _percentile(latencies, 50),
+            'latency_p95': _percentile(latencies, 95),
+            'latency_p99': _percentile(latencies, 99),
+        }
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+_lock = threading.Lock()
+_executor = None
+_breaker = None
+_stats = {}
+_in_flight = 0  # Calls submitted to the executor and not finished (queued or running)
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = futures.ThreadPoolExecutor(
+                max_workers=get_config()['MAX_WORKERS'], thread_name_prefix='llm'
+            )
+        return _executor
+
+
+def _has_idle_worker():
+    with _lock:
+        return _in_flight < get_config()['MAX_WORKERS']
+
+
+def _release_slot(future):
+    global _in_flight
+    with _lock:
+        _in_flight -= 1
+
+
+def get_breaker():
+    global _breaker
+    with _lock:
+        if _breaker is None:
+            config = get_config()
+            _breaker = CircuitBreaker(
+                window=config['BREAKER_WINDOW'],
+                min_calls=config['BREAKER_MIN_CALLS'],
+                error_rate=config['BREAKER_ERROR_RATE'],
+                cooldown=config['BREAKER_COOLDOWN'],
+            )
+        return _breaker
+
+
+def _get_stats(operation):
+    with _lock:
+        if operation not in _stats:
+            _stats[operation] = _OperationStats(get_config()['LATENCY_SAMPLES'])
+        return _stats[operation]
+
+
+def reset():
+    """Resets the pool, breaker and statistics (tests, config reloads)."""
+    global _executor, _breaker
+    with _lock:
+        if _executor is not None:
+            # Running calls finish on their own; the next call builds a pool with the current MAX_WORKERS
+            _executor.shutdown(wait=False)
+        _executor = None
+        _breaker = None
+        _stats.clear()
+
+
+def _hedge_delay(stats, config):
+    percentile = config['HEDGE_PERCENTILE']
+    if not percentile:
+        return None
+    with _lock:
+        if len(stats.latencies) < config['HEDGE_MIN_SAMPLES']:
+            return None
+        return _percentile(sorted(stats.latencies), percentile)
+
+
+def _call(model, prompt, timeout, kwargs):
+    return model.generate_content(prompt, request_options={'timeout': timeout}, **kwargs)
+
+
+class _Attempt:
+    """One pool submission; `started_at` is set when a thread picks it up."""
+
+    def __init__(self, model, prompt, timeout, kwargs):
+        global _in_flight
+        self.started = threading.Event()
+        self.started_at = None
+        with _lock:
+            _in_flight += 1
+        self.future = _get_executor().submit(self._run, model, prompt, timeout, kwargs)
+        self.future.add_done_callback(_release_slot)
+
+    def _run(self, model, prompt, timeout, kwargs):
+        self.started_at = time.monotonic()
+        self.started.set()
+        return _call(model, prompt, timeout, kwargs)
+
+
+class PendingCall:
+    """LLM call started by `submit()`; `result()` waits for its response."""
+
+    def __init__(self, model, prompt, operation, timeout, hedge, kwargs):
+        self.config = get_config()
+        self.model, self.prompt, self.kwargs = model, prompt, kwargs
+        self.timeout = timeout or self.config['TIMEOUT']
+        self.breaker = get_breaker()
+        self.stats = _get_stats(operation)
+        self.hedge = hedge
+
+        if not self.breaker.allow():
+            with _lock:
+                self.stats.rejected += 1
+            raise LLMUnavailableError("Le service de génération est temporairement indisponible.")
+        self.submitted_at = time.monotonic()
+        self.first = _Attempt(model, prompt, self.timeout, kwargs)
+
+    def _wait_started(self):
+        queue_deadline = self.submitted_at + self.config['QUEUE_TIMEOUT']
+        if self.first.started.wait(max(0.0, queue_deadline - time.monotonic())):
+            return
+        if not self.first.future.cancel():
+            # Picked up by a worker meanwhile
+            self.first.started.wait()
+            return
+        # Local saturation, the API was never contacted: not a breaker failure
+        self.breaker.release()
+        with _lock:
+            self.stats.rejected += 1
+        raise LLMUnavailableError("Le service de génération est saturé, réessayez dans un instant.")
+
+    def result(self):
+        """
+        Raises LLMUnavailableError if the pool stayed saturated, LLMTimeoutError
+        if the call exceeds its deadline; other API errors propagate.
+        """
+        self._wait_started()
+        started = self.first.started_at
+        deadline = started + self.timeout
+        pending = {self.first.future}
+        hedge_delay = _hedge_delay(self.stats, self.config) if self.hedge else None
+        hedged = False
+        error = None
+
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                wait_for = remaining
+                if hedge_delay is not None and not hedged:
+                    wait_for = min(remaining, max(0.0, started + hedge_delay - time.monotonic()))
+                done, pending = futures.wait(pending, timeout=wait_for, return_when=futures.FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        latency = time.monotonic() - started
+                        self.breaker.record_success()
+                        with _lock:
+                            self.stats.calls += 1
+                            self.stats.successes += 1
+                            self.stats.hedged += int(hedged)
+                            self.stats.latency_total += latency
+                            self.stats.latencies.append(latency)
+                        return future.result()
+                    error = future.exception()
+                if not done and hedge_delay is not None and not hedged:
+                    # Give up hedging rather than queue behind a busy pool
+                    hedged = _has_idle_worker()
+                    if hedged:
+                        pending.add(_Attempt(self.model, self.prompt, self.timeout, self.kwargs).future)
+                    else:
+                        hedge_delay = None
+        finally:
+            for future in pending:
+                future.cancel()
+
+        self.breaker.record_failure()
+        with _lock:
+            self.stats.calls += 1
+            self.stats.hedged += int(hedged)
+            if error is None:
+                self.stats.timeouts += 1
+            else:
+                self.stats.failures += 1
+        if error is None:
+            raise LLMTimeoutError(f"Aucune réponse du service de génération après {self.timeout:g} s.")
+        raise error
+
+
+def submit(model, prompt, operation='gemini', timeout=None, hedge=True, **kwargs):
+    """
+    Starts `model.generate_content(prompt)` on the pool without waiting and
+    returns a PendingCall. Raises LLMUnavailableError if the breaker is open.
+    """
+    return PendingCall(model, prompt, operation, timeout, hedge, kwargs)
+
+
+def generate_content(model, prompt, operation='gemini', timeout=None, hedge=True, **kwargs):
+    """
+    Calls `model.generate_content(prompt)` with deadline, breaker and hedging.
+
+    Raises LLMUnavailableError if the breaker is open or the pool saturated,
+    LLMTimeoutError if the deadline is exceeded; other API errors propagate
+    unchanged.
+    """
+    return submit(model, prompt, operation, timeout, hedge, **kwargs).result()
+
+
+def snapshot():
+    """Breaker state and per-operation statistics, for the metrics."""
+    breaker = get_breaker()
+    with _lock:
+        operations = {name: stats.as_dict() for name, stats in _stats.items()}
+    return {
+        'breaker': {
+            'state': breaker.state,
+            'error_rate': round(breaker.error_rate_observed(), 4),
+        },
+        'operations': operations,
+    }
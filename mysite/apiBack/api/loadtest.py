@@ -0,0 +1,206 @@
+"""
+"Virtual classroom" load test against an already running server.
+
+Each virtual student (one thread, one HTTP session) logs in through
+`login/activite/`, loads the activity, then answers each affirmation through
+`reponses/` with a random think time. Students start gradually over the
+ramp-up period. Meanwhile a virtual encadrant periodically polls the
+activity's responses and statistics.
+
+The report gives, per endpoint, the request count, throughput, p50/p95/p99/max
+latencies and error rate (network exception or HTTP status >= 400). Entry
+point: `manage.py loadtest`. With `lectures='async'`, reads go through the
+async views (`async/`, see api/async_views.py): playing the scenario in both
+modes against the same ASGI server compares the two paths.
+"""
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
+import requests
+
+
+@dataclass
+class Scenario:
+    base_url: str
+    code_activite: str
+    etudiants: int = 30
+    email_pattern: str = 'loadtest{i}@exemple.test'
+    montee: float = 10.0             # Seconds over which students join
+    reflexion: tuple = (2.0, 8.0)    # Think time between answers (min, max seconds)
+    encadrant_email: str = None
+    encadrant_password: str = None
+    intervalle_encadrant: float = 5.0
+    duree_max: float = None          # Stop everything after this many seconds
+    timeout: float = 30.0
+    lectures: str = 'sync'           # 'async' reads through the async/ views
+
+    def lecture(self, path):
+        return f'async/{path}' if self.lectures == 'async' else path
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+
+class Stats:
+    """Per-endpoint latencies and errors, shared between threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = defaultdict(list)
+        self._errors = defaultdict(int)
+        self._statuses = defaultdict(lambda: defaultdict(int))
+        self.started = time.monotonic()
+        self.finished = None
+
+    def record(self, endpoint, seconds, status_code):
+        with self._lock:
+            self._latencies[endpoint].append(seconds)
+            self._statuses[endpoint][status_code] += 1
+            if status_code is None or status_code >= 400:
+                self._errors[endpoint] += 1
+
+    def report(self):
+        elapsed = (self.finished or time.monotonic()) - self.started
+        rows = []
+        with self._lock:
+            for endpoint in sorted(self._latencies):
+                latencies = sorted(self._latencies[endpoint])
+                count = len(latencies)
+                rows.append({
+                    'endpoint': endpoint,
+                    'requetes': count,
+                    'erreurs': self._errors[endpoint],
+                    'taux_erreur': self._errors[endpoint] / count,
+                    'debit': count / elapsed if elapsed else 0.0,
+                    'p50_ms': percentile(latencies, 50) * 1000,
+                    'p95_ms': percentile(latencies, 95) * 1000,
+                    'p99_ms': percentile(latencies, 99) * 1000,
+                    'max_ms': latencies[-1] * 1000,
+                    'statuts': {str(code): n for code, n in sorted(self._statuses[endpoint].items(), key=str)},
+                })
+        return {'duree_s': elapsed, 'endpoints': rows}
+
+
+class VirtualClient:
+    """Timed HTTP session; `endpoint` is the name the request is counted under."""
+
+    def __init__(self, scenario, stats):
+        self.scenario = scenario
+        self.stats = stats
+        self.session = requests.Session()
+
+    def call(self, endpoint, method, path, **kwargs):
+        url = self.scenario.base_url.rstrip('/') + '/' + path.lstrip('/')
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, timeout=self.scenario.timeout, **kwargs)
+        except requests.RequestException:
+            self.stats.record(endpoint, time.perf_counter() - start, None)
+            return None
+        self.stats.record(endpoint, time.perf_counter() - start, response.status_code)
+        return response
+
+    def close(self):
+        self.session.close()
+
+
+def _answer(affirmation):
+    if affirmation.get('nbr_reponses') == 4:
+        return {'reponse_choisie_qcm': random.randint(1, 4)}
+    return {'reponse_vf': random.random() < 0.5}
+
+
+def _pause(stop, seconds):
+    """Waits `seconds`; returns False if a stop was requested meanwhile."""
+    return not stop.wait(seconds)
+
+
+def run_student(scenario, index, stats, stop):
+    code = scenario.code_activite
+    client = VirtualClient(scenario, stats)
+    try:
+        response = client.call('POST login/activite/', 'POST', 'login/activite/', json={
+            'email': scenario.email_pattern.format(i=index), 'code_activite': code,
+        })
+        if response is None or response.status_code != 200:
+            return
+        response = client.call(f"GET {scenario.lecture('activites/<code>/')}", 'GET',
+                               scenario.lecture(f'activites/{code}/'))
+        if response is None or response.status_code != 200:
+            return
+        affirmations = response.json().get('affirmations_associes', [])
+        random.shuffle(affirmations)
+        for affirmation in affirmations:
+            if not _pause(stop, random.uniform(*scenario.reflexion)):
+                return
+            client.call('POST reponses/', 'POST', 'reponses/', json={
+                'activite': code,
+                'affirmation': affirmation['id'],
+                'justification': f"Réponse de charge {index}",
+                **_answer(affirmation),
+            })
+    finally:
+        client.close()
+
+
+def run_encadrant(scenario, stats, stop):
+    code = scenario.code_activite
+    client = VirtualClient(scenario, stats)
+    try:
+        response = client.call('POST login/encadrant/', 'POST', 'login/encadrant/', json={
+            'email': scenario.encadrant_email, 'password': scenario.encadrant_password,
+        })
+        if response is None or response.status_code != 200:
+            return
+        while _pause(stop, scenario.intervalle_encadrant):
+            client.call(f"GET {scenario.lecture('reponses/?activity_code')}", 'GET', scenario.lecture('reponses/'),
+                        params={'activity_code': code})
+            client.call('GET activites/<code>/statistiques/', 'GET', f'activites/{code}/statistiques/')
+    finally:
+        client.close()
+
+
+def run(scenario, progress=None):
+    """Plays the scenario and returns its Stats. `progress(message)` receives progress updates."""
+    stats = Stats()
+    stop = threading.Event()
+    students_done = threading.Event()
+
+    students = [
+        threading.Thread(target=run_student, args=(scenario, i, stats, stop), daemon=True)
+        for i in range(scenario.etudiants)
+    ]
+    encadrant = None
+    if scenario.encadrant_email:
+        encadrant = threading.Thread(target=run_encadrant, args=(scenario, stats, students_done), daemon=True)
+        encadrant.start()
+
+    delay = scenario.montee / scenario.etudiants if scenario.etudiants else 0
+    deadline = time.monotonic() + scenario.duree_max if scenario.duree_max else None
+    for index, thread in enumerate(students):
+        thread.start()
+        if progress and (index + 1) % 10 == 0:
+            progress(f"{index + 1}/{scenario.etudiants} étudiants connectés")
+        if delay:
+            time.sleep(delay)
+    for thread in students:
+        if deadline is not None:
+            thread.join(max(deadline - time.monotonic(), 0))
+            if thread.is_alive():
+                stop.set()
+        thread.join()
+
+    students_done.set()
+    if encadrant is not None:
+        encadrant.join()
+    stats.finished = time.monotonic()
+    return stats
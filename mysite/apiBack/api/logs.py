@@ -0,0 +1,78 @@
+"""
+Non-blocking logging (configured by LOGGING in settings).
+
+Views never write to the output: `QueuedStreamHandler` puts the record in a
+bounded queue and a thread (`QueueListener`) writes it to stderr. A full
+queue drops and counts the record, rather than blocking a request behind a
+saturated pipe.
+
+Frequent events carry `extra={'event': '<name>'}`; `SamplingFilter` keeps
+only a fraction of them (LOG_SAMPLING), never for WARNING and above. Raw
+LLM responses are only logged when LOG_LLM_PAYLOADS is set.
+"""
+import atexit
+import datetime
+import json
+import logging
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+from django.conf import settings
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+
+class QueuedStreamHandler(QueueHandler):
+    """QueueHandler with its own QueueListener feeding a StreamHandler (stderr by default)."""
+
+    def __init__(self, maxsize=10000, stream=None):
+        super().__init__(queue.Queue(maxsize))
+        self.dropped = 0
+        self.target = logging.StreamHandler(stream or sys.stderr)
+        self.listener = QueueListener(self.queue, self.target)
+        self.listener.start()
+        atexit.register(self.listener.stop)
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON line per record: timestamp, level, logger, message and `extra` fields."""
+
+    def format(self, record):
+        data = {
+            'ts': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        data.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRS)
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of the events listed in LOG_SAMPLING ({event: rate between 0 and 1})."""
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = getattr(settings, 'LOG_SAMPLING', {}).get(getattr(record, 'event', None))
+        return rate is None or random.random() < rate
+
+
+payload_logger = logging.getLogger('api.llm.payloads')
+
+
+def log_llm_payload(operation, text):
+    """Logs a raw LLM response (api.llm.payloads logger), only when LOG_LLM_PAYLOADS is set."""
+    if getattr(settings, 'LOG_LLM_PAYLOADS', False):
+        payload_logger.info("Raw LLM response", extra={'event': 'llm_payload', 'operation': operation, 'payload': text})
@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import archives
+from api.models import Activite
+
+
+class Command(BaseCommand):
+    help = (
+        "Archive dans des fichiers compressés (ARCHIVES['DIR']) les réponses et débriefs des activités dépubliées "
+        "sans activité récente ; les compteurs et les statistiques restent en base. Avec --restaurer, remet "
+        "les réponses d'activités archivées en base."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--activite', action='append', dest='codes', metavar='CODE',
+                            help="Activité à traiter (répétable). Par défaut : toutes les activités froides.")
+        parser.add_argument('--inactives-depuis', type=int, dest='jours', metavar='JOURS',
+                            help="Jours sans réponse ni débrief modifiés (ARCHIVES['INACTIVE_DAYS'] par défaut).")
+        parser.add_argument('--restaurer', action='store_true',
+                            help="Restaure les activités archivées données par --activite (toutes sans --activite).")
+        parser.add_argument('--simulation', action='store_true', help="Liste les activités concernées sans rien modifier.")
+
+    def handle(self, *args, **options):
+        codes = [code.upper() for code in options['codes'] or []]
+        if codes:
+            activites = Activite.objects.filter(pk__in=codes).order_by('pk')
+            missing = set(codes) - set(activites.values_list('pk', flat=True))
+            if missing:
+                raise CommandError(f"Activité(s) introuvable(s) : {', '.join(sorted(missing))}.")
+        elif options['restaurer']:
+            activites = Activite.objects.filter(est_archivee=True).order_by('pk')
+        else:
+            activites = archives.candidates(options['jours'])
+
+        if options['simulation']:
+            for activite in activites:
+                self.stdout.write(f"{activite.pk} : {activite.titre}")
+            self.stdout.write(f"{len(activites)} activité(s) concernée(s).")
+            return
+
+        done, failed = 0, 0
+        for activite in activites:
+            try:
+                if options['restaurer']:
+                    restored = archives.rehydrater(activite)
+                    if restored is None:
+                        self.stdout.write(f"{activite.pk} : pas archivée.")
+                        continue
+                    self.stdout.write(f"{activite.pk} : {restored[0]} réponse(s), {restored[1]} débrief(s) restauré(s).")
+                else:
+                    archive = archives.archiver(activite)
+                    self.stdout.write(f"{activite.pk} : {archive.nombre_reponses} réponse(s), "
+                                      f"{archive.nombre_debriefs} débrief(s) archivé(s), {archive.taille} octets.")
+                done += 1
+            except archives.ArchiveError as e:
+                failed += 1
+                self.stderr.write(f"{activite.pk} : {e}")
+
+        verb = "restaurée(s)" if options['restaurer'] else "archivée(s)"
+        self.stdout.write(self.style.SUCCESS(f"{done} activité(s) {verb}."))
+        if failed:
+            raise CommandError(f"{failed} activité(s) en échec.")
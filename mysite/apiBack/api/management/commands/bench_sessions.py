@@ -0,0 +1,95 @@
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from api.models import Activite
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare, pour chaque SESSION_STRATEGY avec et sans utilisateur gardé en session, les requêtes SQL "
+        "d'un étudiant qui se connecte puis ouvre l'activité et répond (démarrage + réponse, en boucle). "
+        "Joué en mémoire contre la base locale, dans une transaction annulée à la fin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--code', default='LOADTEST', help="Activité publiée utilisée (voir loadtest --preparer).")
+        parser.add_argument('--email', help="Étudiant autorisé sur l'activité (le premier par défaut).")
+        parser.add_argument('--requetes', type=int, default=20, help="Requêtes jouées après la connexion.")
+        parser.add_argument('--json', dest='json_path', help="Écrit aussi les résultats dans ce fichier JSON.")
+
+    def handle(self, *args, **options):
+        code = options['code'].upper()
+        activite = Activite.objects.filter(pk=code, is_published=True).first()
+        if activite is None:
+            raise CommandError(f"Activité publiée '{code}' introuvable.")
+        etudiants = activite.etudiants_autorises.order_by('id')
+        etudiant = etudiants.filter(email=options['email']).first() if options['email'] else etudiants.first()
+        if etudiant is None:
+            raise CommandError("Aucun étudiant autorisé correspondant sur cette activité.")
+        affirmations = list(activite.affirmations_associes.order_by('id').values('id', 'nbr_reponses'))
+        if not affirmations:
+            raise CommandError("L'activité n'a aucune affirmation.")
+
+        rows = []
+        for strategy, engine in settings.SESSION_ENGINES.items():
+            for user_cache in (False, True):
+                ttl = settings.SESSION_USER_CACHE['TTL'] if user_cache else 0
+                with override_settings(SESSION_ENGINE=engine,
+                                       SESSION_USER_CACHE={**settings.SESSION_USER_CACHE, 'TTL': ttl}):
+                    rows.append({
+                        'strategie': strategy,
+                        'utilisateur_en_session': user_cache,
+                        **self.play(code, etudiant.email, affirmations, options['requetes']),
+                    })
+
+        self.stdout.write(f"{'stratégie':<16}{'user':>6}{'connexion':>11}{'req/requête':>13}"
+                          f"{'session':>9}{'users':>7}{'ms/requête':>12}")
+        for row in rows:
+            self.stdout.write(
+                f"{row['strategie']:<16}{'oui' if row['utilisateur_en_session'] else 'non':>6}"
+                f"{row['connexion']:>11}{row['requetes_par_requete']:>13.2f}"
+                f"{row['session_par_requete']:>9.2f}{row['users_par_requete']:>7.2f}{row['ms_par_requete']:>12.2f}"
+            )
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as handle:
+                json.dump(rows, handle, indent=2, ensure_ascii=False)
+
+    def play(self, code, email, affirmations, count):
+        with transaction.atomic():
+            client = Client()
+            with CaptureQueriesContext(connection) as login:
+                response = client.post(reverse('login_activite'), {'email': email, 'code_activite': code},
+                                       content_type='application/json')
+            if response.status_code != 200:
+                raise CommandError(f"Connexion refusée ({response.status_code}) : {response.content[:200]!r}")
+
+            queries = []
+            start = time.perf_counter()
+            for i in range(count):
+                with CaptureQueriesContext(connection) as captured:
+                    if i % 2 == 0:
+                        client.get(reverse('activite_demarrage', kwargs={'pk': code}))
+                    else:
+                        affirmation = affirmations[(i // 2) % len(affirmations)]
+                        answer = {'reponse_choisie_qcm': 1} if affirmation['nbr_reponses'] == 4 else {'reponse_vf': True}
+                        client.post(reverse('reponses_list'), {'activite': code, 'affirmation': affirmation['id'], **answer},
+                                    content_type='application/json')
+                queries.extend(query['sql'] for query in captured.captured_queries)
+            elapsed = time.perf_counter() - start
+
+            result = {
+                'connexion': len(login),
+                'requetes_par_requete': len(queries) / count,
+                'session_par_requete': sum('"django_session"' in sql for sql in queries) / count,
+                'users_par_requete': sum('FROM "api_users" WHERE "api_users"."id" =' in sql for sql in queries) / count,
+                'ms_par_requete': elapsed * 1000 / count,
+            }
+            transaction.set_rollback(True)
+        return result
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import counters
+from api.models import Activite
+
+
+class Command(BaseCommand):
+    help = "Vérifie ou recalcule depuis Reponse les compteurs de réponses (CompteurReponse, CompteurEtudiant)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verifier', action='store_true',
+                            help="Compare seulement les compteurs aux réponses, sans rien modifier.")
+        parser.add_argument('--activite', help="Code de l'activité à traiter (toutes par défaut).")
+
+    def handle(self, *args, **options):
+        code = options['activite']
+        if code and not Activite.objects.filter(pk=code).exists():
+            raise CommandError(f"Activité '{code}' introuvable.")
+
+        if options['verifier']:
+            differences = counters.verify(code)
+            for kind, key, stored, expected in differences:
+                self.stdout.write(f"{kind} {key}: stocké {stored}, attendu {expected}")
+            if differences:
+                raise CommandError(f"{len(differences)} compteur(s) incorrect(s). Relancer sans --verifier pour corriger.")
+            self.stdout.write(self.style.SUCCESS("Compteurs corrects."))
+            return
+
+        nb_reponses, nb_etudiants = counters.rebuild(code)
+        self.stdout.write(self.style.SUCCESS(
+            f"Compteurs recalculés : {nb_reponses} par choix, {nb_etudiants} par étudiant."
+        ))
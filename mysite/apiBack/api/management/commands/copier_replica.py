@@ -0,0 +1,40 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from api import routers
+
+
+class Command(BaseCommand):
+    help = (
+        "Recopie la base principale SQLite vers les réplicas locaux (DB_REPLICAS), par l'API de "
+        "sauvegarde de SQLite : schéma et données, sans arrêter le serveur. Pour tester le routage "
+        "des lectures avec deux fichiers ; en production la réplication est celle du moteur."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alias', action='append', help="Réplica à rafraîchir (tous par défaut).")
+
+    def handle(self, *args, **options):
+        aliases = options['alias'] or routers.get_config()['ALIASES']
+        if not aliases:
+            raise CommandError("Aucun réplica configuré (variable DB_REPLICAS).")
+        source = settings.DATABASES[DEFAULT_DB_ALIAS]
+        for alias in aliases:
+            if alias not in settings.DATABASES or alias == DEFAULT_DB_ALIAS:
+                raise CommandError(f"Réplica '{alias}' inconnu.")
+            target = settings.DATABASES[alias]
+            if source['ENGINE'] != 'django.db.backends.sqlite3' or target['ENGINE'] != source['ENGINE']:
+                raise CommandError(f"'{alias}' n'est pas une base SQLite : la réplication relève du moteur.")
+
+            # Django's connection to the replica must not hold the file during the copy
+            connections[alias].close()
+            src, dst = sqlite3.connect(source['NAME']), sqlite3.connect(target['NAME'])
+            try:
+                src.backup(dst)
+            finally:
+                dst.close()
+                src.close()
+            self.stdout.write(self.style.SUCCESS(f"{alias} : copie de {source['NAME']} vers {target['NAME']}."))
@@ -0,0 +1,138 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.models import Activite, Affirmation, Users
+
+SEED_ENCADRANT = 'loadtest-encadrant@exemple.test'
+
+
+class Command(BaseCommand):
+    help = (
+        "Simule une classe contre un serveur lancé (étudiants qui se connectent et répondent, "
+        "encadrant qui suit les résultats) et affiche débit, latences p50/p95/p99 et erreurs par endpoint. "
+        "--preparer crée l'activité et les comptes de test dans la base locale."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000/api/', help="URL de base de l'API.")
+        parser.add_argument('--code', default='LOADTEST', help="Code de l'activité jouée.")
+        parser.add_argument('--etudiants', type=int, default=30, help="Taille de la classe.")
+        parser.add_argument('--montee', type=float, default=10.0, help="Durée (s) sur laquelle les étudiants arrivent.")
+        parser.add_argument('--reflexion-min', type=float, default=2.0, help="Temps de réflexion minimal (s).")
+        parser.add_argument('--reflexion-max', type=float, default=8.0, help="Temps de réflexion maximal (s).")
+        parser.add_argument('--duree-max', type=float, help="Arrête le scénario après cette durée (s).")
+        parser.add_argument('--email-pattern', default='loadtest{i}@exemple.test',
+                            help="Email de l'étudiant n°{i} (à partir de 0).")
+        parser.add_argument('--encadrant-email', help="Encadrant qui suit les résultats (aucun si absent).")
+        parser.add_argument('--encadrant-password')
+        parser.add_argument('--intervalle-encadrant', type=float, default=5.0,
+                            help="Intervalle (s) entre deux consultations de l'encadrant.")
+        parser.add_argument('--lectures', choices=('sync', 'async'), default='sync',
+                            help="Chemin des lectures (activité, réponses) : vues synchrones ou async/ (serveur ASGI).")
+        parser.add_argument('--json', dest='json_path', help="Écrit aussi le rapport dans ce fichier JSON.")
+        parser.add_argument('--preparer', action='store_true',
+                            help="Crée (ou complète) l'activité, les étudiants et l'encadrant de test, puis quitte.")
+        parser.add_argument('--affirmations', type=int, default=10, help="Nombre d'affirmations créées par --preparer.")
+        parser.add_argument('--nettoyer', action='store_true', help="Supprime les données créées par --preparer, puis quitte.")
+
+    def handle(self, *args, **options):
+        if options['preparer']:
+            return self.seed(options)
+        if options['nettoyer']:
+            return self.cleanup(options)
+
+        try:
+            from api import loadtest
+        except ImportError as e:
+            raise CommandError(f"Dépendance manquante pour le test de charge : {e}")
+        if options['reflexion_min'] > options['reflexion_max']:
+            raise CommandError("--reflexion-min doit être inférieur ou égal à --reflexion-max.")
+
+        scenario = loadtest.Scenario(
+            base_url=options['url'],
+            code_activite=options['code'].upper(),
+            etudiants=options['etudiants'],
+            email_pattern=options['email_pattern'],
+            montee=options['montee'],
+            reflexion=(options['reflexion_min'], options['reflexion_max']),
+            encadrant_email=options['encadrant_email'],
+            encadrant_password=options['encadrant_password'],
+            intervalle_encadrant=options['intervalle_encadrant'],
+            duree_max=options['duree_max'],
+            lectures=options['lectures'],
+        )
+        self.stdout.write(f"Classe de {scenario.etudiants} étudiants sur {scenario.base_url} "
+                          f"({scenario.code_activite}, lectures {scenario.lectures})...")
+        stats = loadtest.run(scenario, progress=self.stdout.write)
+        report = stats.report()
+        self.print_report(report)
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+
+    def print_report(self, report):
+        header = f"{'endpoint':<38} {'req':>6} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'err%':>6}"
+        self.stdout.write(f"\nDurée : {report['duree_s']:.1f} s (latences en ms)")
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for row in report['endpoints']:
+            line = (
+                f"{row['endpoint']:<38} {row['requetes']:>6} {row['debit']:>7.2f} {row['p50_ms']:>8.1f} "
+                f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f} {row['taux_erreur'] * 100:>5.1f}%"
+            )
+            self.stdout.write(self.style.ERROR(line) if row['erreurs'] else line)
+
+    @transaction.atomic
+    def seed(self, options):
+        code = options['code'].upper()
+        password = options['encadrant_password'] or 'loadtest'
+        encadrant, created = Users.objects.get_or_create(
+            email=options['encadrant_email'] or SEED_ENCADRANT,
+            defaults={'username': 'loadtest-encadrant', 'role': 'encadrant'},
+        )
+        if created:
+            encadrant.set_password(password)
+            encadrant.save()
+        activite, _ = Activite.objects.get_or_create(
+            code_activite=code,
+            defaults={'titre': f"Test de charge {code}", 'encadrant': encadrant, 'is_published': True},
+        )
+
+        emails = [options['email_pattern'].format(i=i) for i in range(options['etudiants'])]
+        existing = set(Users.objects.filter(email__in=emails).values_list('email', flat=True))
+        Users.objects.bulk_create([
+            Users(username=email, email=email, role='etudiant')
+            for email in emails if email not in existing
+        ])
+        activite.etudiants_autorises.add(*Users.objects.filter(email__in=emails))
+
+        missing = options['affirmations'] - activite.affirmations_associes.count()
+        for i in range(max(missing, 0)):
+            affirmation = Affirmation.objects.create(
+                affirmation=f"Affirmation de charge {code} n°{i + 1}",
+                nbr_reponses=4 if i % 3 == 2 else 2,
+                encadrant=encadrant,
+            )
+            activite.affirmations_associes.add(affirmation)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Activité {code} prête : {len(emails)} étudiants, {activite.affirmations_associes.count()} affirmations. "
+            f"Encadrant : {encadrant.email} / {password if created else '(mot de passe inchangé)'}"
+        ))
+
+    @transaction.atomic
+    def cleanup(self, options):
+        code = options['code'].upper()
+        activite = Activite.objects.filter(pk=code).first()
+        if activite is None:
+            raise CommandError(f"Activité '{code}' introuvable.")
+        activite.affirmations_associes.all().delete()
+        encadrant = activite.encadrant
+        activite.delete()
+        emails = [options['email_pattern'].format(i=i) for i in range(options['etudiants'])]
+        deleted, _ = Users.objects.filter(email__in=emails, role='etudiant').delete()
+        if encadrant.email == (options['encadrant_email'] or SEED_ENCADRANT) and not encadrant.activites_crees.exists():
+            encadrant.delete()
+        self.stdout.write(self.style.SUCCESS(f"Activité {code} et comptes de test supprimés."))
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Supprime les sessions expirées des modes stockés en base (SESSION_STRATEGY db ou cached_db), "
+        "par lots pour ne pas bloquer les écritures des étudiants. Sans effet en signed_cookies."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lot', type=int, default=1000, help="Nombre de sessions supprimées par transaction.")
+
+    def handle(self, *args, **options):
+        if settings.SESSION_ENGINE == settings.SESSION_ENGINES['signed_cookies']:
+            self.stdout.write("Sessions en cookies signés : rien à purger côté serveur.")
+            return
+
+        # cached_db entries expire from the cache on their own: only the table needs purging
+        expired = Session.objects.filter(expire_date__lt=timezone.now())
+        deleted = 0
+        while True:
+            keys = list(expired.values_list('session_key', flat=True)[:options['lot']])
+            if not keys:
+                break
+            deleted += Session.objects.filter(session_key__in=keys).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f"{deleted} session(s) expirée(s) supprimée(s)."))
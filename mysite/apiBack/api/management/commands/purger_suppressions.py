@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api import sync
+
+
+class Command(BaseCommand):
+    help = "Supprime les traces de suppression plus anciennes que DELTA_SYNC['TOMBSTONE_RETENTION_DAYS'] (synchronisation ?since=)."
+
+    def handle(self, *args, **options):
+        deleted = sync.purge()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} trace(s) de suppression purgée(s)."))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api import search
+
+
+class Command(BaseCommand):
+    help = "Recrée l'index plein texte des affirmations (table FTS5 et triggers sur SQLite, index GIN sur PostgreSQL)."
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            self.stdout.write(self.style.WARNING(
+                f"Moteur '{connection.vendor}' non pris en charge : la recherche utilise le repli icontains."
+            ))
+            return
+        search.uninstall(connection)
+        search.install(connection)
+        self.stdout.write(self.style.SUCCESS("Index de recherche reconstruit."))
@@ -0,0 +1,242 @@
+"""
+In-memory HTTP metric aggregates, exported in the Prometheus text format.
+
+middleware/metrics.py calls `record()` on every request: counts per status,
+histograms of latency, SQL query count, render time and response size, per
+(method, route). Routes are the URL patterns (`api/activites/<str:pk>/`),
+not the paths, to bound cardinality.
+
+With several workers, each process writes its aggregates to
+METRICS['DIR']/metrics-<pid>.json at most every FLUSH_INTERVAL seconds; the
+scrape endpoint merges every file. A stopped worker's counters keep being
+counted: empty the directory when restarting the server. Without DIR, only
+the data of the process that answers is exposed.
+"""
+import atexit
+import bisect
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+from . import llm
+
+DEFAULTS = {
+    'ENABLED': True,
+    'DIR': None,
+    'FLUSH_INTERVAL': 5.0,
+}
+
+PREFIX = 'trap'
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Histogram name -> (buckets, help text)
+HISTOGRAMS = {
+    'http_request_duration_seconds': (LATENCY_BUCKETS, "Durée de traitement des requêtes HTTP."),
+    'http_request_db_queries': (QUERY_BUCKETS, "Requêtes SQL exécutées par requête HTTP."),
+    'http_response_render_seconds': (LATENCY_BUCKETS, "Durée de rendu (sérialisation JSON) des réponses."),
+    'http_response_size_bytes': (SIZE_BUCKETS, "Taille des réponses non streamées."),
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'METRICS', {})}
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def as_dict(self):
+        return {'counts': list(self.counts), 'sum': self.sum}
+
+
+class RouteStats:
+    """Aggregates of one (method, route) pair."""
+
+    def __init__(self):
+        self.statuses = {}
+        self.db_seconds = 0.0
+        self.histograms = {name: Histogram(buckets) for name, (buckets, _) in HISTOGRAMS.items()}
+
+    def as_dict(self):
+        return {
+            'statuses': dict(self.statuses),
+            'db_seconds': self.db_seconds,
+            'histograms': {name: histogram.as_dict() for name, histogram in self.histograms.items()},
+        }
+
+
+_lock = threading.Lock()
+_routes = {}
+_last_flush = time.monotonic()
+
+
+def record(method, route, status, seconds, queries, db_seconds, render_seconds=None, size=None):
+    global _last_flush
+    with _lock:
+        stats = _routes.get((method, route))
+        if stats is None:
+            stats = _routes[(method, route)] = RouteStats()
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+        stats.histograms['http_request_duration_seconds'].observe(seconds)
+        if queries is not None:  # Not measured for async views
+            stats.db_seconds += db_seconds
+            stats.histograms['http_request_db_queries'].observe(queries)
+        if render_seconds is not None:
+            stats.histograms['http_response_render_seconds'].observe(render_seconds)
+        if size is not None:
+            stats.histograms['http_response_size_bytes'].observe(size)
+        due = time.monotonic() - _last_flush >= get_config()['FLUSH_INTERVAL']
+        if due:
+            _last_flush = time.monotonic()
+    if due:
+        flush()
+
+
+def snapshot():
+    """This process's aggregates, JSON-serializable."""
+    with _lock:
+        routes = {f'{method} {route}': stats.as_dict() for (method, route), stats in _routes.items()}
+    return {'routes': routes, 'llm': llm.snapshot()}
+
+
+def _worker_file(directory):
+    return Path(directory) / f'metrics-{os.getpid()}.json'
+
+
+def flush():
+    """Writes the process's aggregates to METRICS['DIR'] (atomic write)."""
+    directory = get_config()['DIR']
+    if not directory:
+        return
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.metrics-', suffix='.tmp')
+    with os.fdopen(fd, 'w') as handle:
+        json.dump(snapshot(), handle)
+    os.replace(tmp, _worker_file(directory))
+
+
+atexit.register(flush)
+
+
+def collect():
+    """{pid: snapshot} of every known worker, with the current process up to date."""
+    directory = get_config()['DIR']
+    workers = {}
+    if directory and Path(directory).is_dir():
+        for path in Path(directory).glob('metrics-*.json'):
+            try:
+                workers[path.stem.split('-', 1)[1]] = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue  # Being replaced or truncated: skipped for this scrape
+    workers[str(os.getpid())] = snapshot()
+    return workers
+
+
+def _merge_routes(workers):
+    merged = {}
+    for data in workers.values():
+        for key, stats in data['routes'].items():
+            target = merged.setdefault(key, {
+                'statuses': {}, 'db_seconds': 0.0,
+                'histograms': {name: {'counts': [0] * (len(buckets) + 1), 'sum': 0.0}
+                               for name, (buckets, _) in HISTOGRAMS.items()},
+            })
+            for status, count in stats['statuses'].items():
+                target['statuses'][str(status)] = target['statuses'].get(str(status), 0) + count
+            target['db_seconds'] += stats['db_seconds']
+            for name, histogram in stats['histograms'].items():
+                merged_histogram = target['histograms'][name]
+                merged_histogram['counts'] = [a + b for a, b in zip(merged_histogram['counts'], histogram['counts'])]
+                merged_histogram['sum'] += histogram['sum']
+    return merged
+
+
+def _labels(**labels):
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(workers=None):
+    """Texte d'exposition Prometheus (version 0.0.4) de tous les workers."""
+    workers = collect() if workers is None else workers
+    routes = _merge_routes(workers)
+    lines = []
+
+    def header(name, kind, help_text):
+        lines.append(f'# HELP {PREFIX}_{name} {help_text}')
+        lines.append(f'# TYPE {PREFIX}_{name} {kind}')
+
+    header('http_requests_total', 'counter', "Requêtes HTTP par méthode, route et statut.")
+    for key in sorted(routes):
+        method, route = key.split(' ', 1)
+        for status, count in sorted(routes[key]['statuses'].items()):
+            lines.append(f'{PREFIX}_http_requests_total{_labels(method=method, route=route, status=status)} {count}')
+
+    header('http_request_db_seconds_total', 'counter', "Temps passé dans les requêtes SQL.")
+    for key in sorted(routes):
+        method, route = key.split(' ', 1)
+        value = _format_number(routes[key]['db_seconds'])
+        lines.append(f'{PREFIX}_http_request_db_seconds_total{_labels(method=method, route=route)} {value}')
+
+    for name, (buckets, help_text) in HISTOGRAMS.items():
+        header(name, 'histogram', help_text)
+        for key in sorted(routes):
+            method, route = key.split(' ', 1)
+            histogram = routes[key]['histograms'][name]
+            total = 0
+            for bound, count in zip(buckets + ('+Inf',), histogram['counts']):
+                total += count
+                labels = _labels(method=method, route=route, le=bound)
+                lines.append(f'{PREFIX}_{name}_bucket{labels} {total}')
+            labels = _labels(method=method, route=route)
+            lines.append(f'{PREFIX}_{name}_sum{labels} {_format_number(histogram["sum"])}')
+            lines.append(f'{PREFIX}_{name}_count{labels} {total}')
+
+    _render_llm(workers, header, lines)
+    return '\n'.join(lines) + '\n'
+
+
+LLM_COUNTERS = ('calls', 'successes', 'failures', 'timeouts', 'rejected', 'hedged', 'latency_seconds_total')
+
+
+def _render_llm(workers, header, lines):
+    operations = {}
+    for data in workers.values():
+        for operation, stats in data['llm']['operations'].items():
+            totals = operations.setdefault(operation, dict.fromkeys(LLM_COUNTERS, 0))
+            for field in LLM_COUNTERS:
+                totals[field] += stats[field]
+    for field in LLM_COUNTERS:
+        name = f'llm_{field}' if field.endswith('_total') else f'llm_{field}_total'
+        header(name, 'counter', f"Appels LLM : {field}.")
+        for operation in sorted(operations):
+            lines.append(f'{PREFIX}_{name}{_labels(operation=operation)} {_format_number(operations[operation][field])}')
+
+    # The breaker is per process: one gauge per worker
+    header('llm_breaker_open', 'gauge', "1 si le disjoncteur LLM du worker est ouvert.")
+    for pid in sorted(workers):
+        breaker = workers[pid]['llm']['breaker']
+        lines.append(f'{PREFIX}_llm_breaker_open{_labels(pid=pid)} {int(breaker["state"] != "closed")}')
+    header('llm_breaker_error_rate', 'gauge', "Taux d'erreur observé par le disjoncteur LLM du worker.")
+    for pid in sorted(workers):
+        lines.append(f'{PREFIX}_llm_breaker_error_rate{_labels(pid=pid)} {workers[pid]["llm"]["breaker"]["error_rate"]}')
@@ -0,0 +1,59 @@
+from django.db import migrations
+
+# Frozen copy of the DDL: api/search.py may change, this migration must not
+SQLITE_INSTALL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS api_affirmation_fts USING fts5(
+        affirmation, explication,
+        content='api_affirmation', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS api_affirmation_fts_ai AFTER INSERT ON api_affirmation BEGIN
+        INSERT INTO api_affirmation_fts(rowid, affirmation, explication) VALUES (new.id, new.affirmation, new.explication);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS api_affirmation_fts_ad AFTER DELETE ON api_affirmation BEGIN
+        INSERT INTO api_affirmation_fts(api_affirmation_fts, rowid, affirmation, explication) VALUES ('delete', old.id, old.affirmation, old.explication);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS api_affirmation_fts_au AFTER UPDATE ON api_affirmation BEGIN
+        INSERT INTO api_affirmation_fts(api_affirmation_fts, rowid, affirmation, explication) VALUES ('delete', old.id, old.affirmation, old.explication);
+        INSERT INTO api_affirmation_fts(rowid, affirmation, explication) VALUES (new.id, new.affirmation, new.explication);
+    END""",
+    "INSERT INTO api_affirmation_fts(api_affirmation_fts) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS api_affirmation_fts_ai",
+    "DROP TRIGGER IF EXISTS api_affirmation_fts_ad",
+    "DROP TRIGGER IF EXISTS api_affirmation_fts_au",
+    "DROP TABLE IF EXISTS api_affirmation_fts",
+]
+
+POSTGRES_INSTALL = [
+    "CREATE INDEX IF NOT EXISTS api_affirmation_search_idx ON api_affirmation USING GIN "
+    "(to_tsvector('french', coalesce(affirmation, '') || ' ' || coalesce(explication, '')))",
+]
+
+POSTGRES_UNINSTALL = ["DROP INDEX IF EXISTS api_affirmation_search_idx"]
+
+
+def _run(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement, params=None)
+
+
+def install_search_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_INSTALL, 'postgresql': POSTGRES_INSTALL})
+
+
+def uninstall_search_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_UNINSTALL, 'postgresql': POSTGRES_UNINSTALL})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_neutralize_affirmations'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
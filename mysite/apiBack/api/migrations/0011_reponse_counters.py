@@ -0,0 +1,40 @@
+# Generated by Django 5.1.2 on 2026-10-19 02:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_affirmation_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompteurEtudiant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.IntegerField(default=0)),
+                ('activite', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='compteurs_etudiants', to='api.activite')),
+                ('etudiant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('activite', 'etudiant')},
+            },
+        ),
+        migrations.CreateModel(
+            name='CompteurReponse',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('choix', models.CharField(choices=[('vrai', 'Vrai'), ('faux', 'Faux'), ('1', 'Choix 1'), ('2', 'Choix 2'), ('3', 'Choix 3'), ('4', 'Choix 4'), ('aucun', 'Sans réponse')], max_length=5)),
+                ('total', models.IntegerField(default=0)),
+                ('activite', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='compteurs_reponses', to='api.activite')),
+                ('affirmation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.affirmation')),
+            ],
+            options={
+                'unique_together': {('activite', 'affirmation', 'choix')},
+            },
+        ),
+    ]
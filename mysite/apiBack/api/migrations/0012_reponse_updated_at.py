@@ -0,0 +1,28 @@
+# Generated by Django 5.1.2 on 2026-10-19 02:46
+
+from django.db import migrations, models
+
+
+def backfill_updated_at(apps, schema_editor):
+    Reponse = apps.get_model('api', 'Reponse')
+    Reponse.objects.update(updated_at=models.F('timestamp'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_reponse_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reponse',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='reponse',
+            index=models.Index(fields=['activite', 'updated_at', 'id'], name='api_reponse_feed_idx'),
+        ),
+    ]
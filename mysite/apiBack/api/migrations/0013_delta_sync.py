@@ -0,0 +1,47 @@
+# Generated by Django 5.1.2 on 2026-10-19 02:52
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_updated_at(apps, schema_editor):
+    Activite = apps.get_model('api', 'Activite')
+    Activite.objects.update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_reponse_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activite',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='debrief',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.CreateModel(
+            name='Suppression',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modele', models.CharField(choices=[('activite', 'Activité'), ('reponse', 'Réponse'), ('debrief', 'Débrief')], max_length=10)),
+                ('objet_id', models.CharField(max_length=20)),
+                ('activite_code', models.CharField(blank=True, default='', max_length=9)),
+                ('supprime_le', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('encadrant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('etudiant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['modele', 'supprime_le'], name='api_suppression_sync_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.2 on 2026-10-19 03:34
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_delta_sync'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveActivite',
+            fields=[
+                ('activite', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='archive', serialize=False, to='api.activite')),
+                ('fichier', models.CharField(help_text="Chemin relatif à ARCHIVES['DIR'].", max_length=255)),
+                ('taille', models.PositiveIntegerField(help_text='Taille du fichier compressé, en octets.')),
+                ('sha256', models.CharField(max_length=64)),
+                ('nombre_reponses', models.PositiveIntegerField()),
+                ('nombre_debriefs', models.PositiveIntegerField()),
+                ('statistiques', models.JSONField()),
+                ('archive_le', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='activite',
+            name='est_archivee',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
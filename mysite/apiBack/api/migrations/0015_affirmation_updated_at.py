@@ -0,0 +1,60 @@
+# Generated by Django 5.1.2 on 2026-10-19 04:03
+
+from django.db import migrations, models
+
+# Frozen copy of 0010's SQLite DDL: adding (or removing) a column makes SQLite's
+# schema editor rebuild api_affirmation, which drops the full-text search triggers
+SQLITE_REINSTALL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS api_affirmation_fts USING fts5(
+        affirmation, explication,
+        content='api_affirmation', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS api_affirmation_fts_ai AFTER INSERT ON api_affirmation BEGIN
+        INSERT INTO api_affirmation_fts(rowid, affirmation, explication) VALUES (new.id, new.affirmation, new.explication);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS api_affirmation_fts_ad AFTER DELETE ON api_affirmation BEGIN
+        INSERT INTO api_affirmation_fts(api_affirmation_fts, rowid, affirmation, explication) VALUES ('delete', old.id, old.affirmation, old.explication);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS api_affirmation_fts_au AFTER UPDATE ON api_affirmation BEGIN
+        INSERT INTO api_affirmation_fts(api_affirmation_fts, rowid, affirmation, explication) VALUES ('delete', old.id, old.affirmation, old.explication);
+        INSERT INTO api_affirmation_fts(rowid, affirmation, explication) VALUES (new.id, new.affirmation, new.explication);
+    END""",
+    "INSERT INTO api_affirmation_fts(api_affirmation_fts) VALUES ('rebuild')",
+]
+
+
+def backfill_updated_at(apps, schema_editor):
+    Affirmation = apps.get_model('api', 'Affirmation')
+    Affirmation.objects.filter(created_at__isnull=False).update(updated_at=models.F('created_at'))
+
+
+def reinstall_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in SQLITE_REINSTALL:
+        schema_editor.execute(statement, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_archives_activites'),
+    ]
+
+    operations = [
+        # Unapplying removes the column (another table rebuild): reinstall last
+        migrations.RunPython(migrations.RunPython.noop, reinstall_search_triggers),
+        migrations.AddField(
+            model_name='affirmation',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='suppression',
+            name='modele',
+            field=models.CharField(choices=[('activite', 'Activité'), ('reponse', 'Réponse'), ('debrief', 'Débrief'), ('affirmation', 'Affirmation')], max_length=12),
+        ),
+        migrations.RunPython(reinstall_search_triggers, migrations.RunPython.noop),
+    ]
@@ -4,6 +4,7 @@ from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import RegexValidator
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 
 # --- User Model ---
 class Users(AbstractUser):
@@ -64,6 +65,10 @@ class Activite(models.Model):
     )
     is_published = models.BooleanField(default=False, help_text="Indique si l'activité est lancée et visible par les étudiants.")
     created_at = models.DateTimeField(auto_now_add=True)
+    # Also bumped when students/affirmations are linked or an affirmation is edited (api/signals.py)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Responses and debriefs moved to a compressed file (api/archives.py, ArchiveActivite)
+    est_archivee = models.BooleanField(default=False, editable=False)
 
     @property
     def nbr_affirmations_associe(self):
@@ -131,6 +136,8 @@ class Affirmation(models.Model):
     # REMOVED option_1, option_2, option_3, option_4 fields
 
     created_at = models.DateTimeField(auto_now_add=True, editable=False, null=True)
+    # Near-duplicate index resync in every worker (api/similarity.py)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def clean(self):
         # Validation simplifiée : les affirmations sont maintenant neutres
@@ -174,9 +181,12 @@ class Reponse(models.Model):
     )
     justification = models.TextField(blank=True, null=True)
     timestamp = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = (('activite', 'affirmation', 'etudiant'),)
+        # Live feed cursor (api/feed.py): rows of an activity changed after (updated_at, id)
+        indexes = [models.Index(fields=['activite', 'updated_at', 'id'], name='api_reponse_feed_idx')]
 
     def clean(self):
         if not self.affirmation_id: 
@@ -197,6 +207,20 @@ class Reponse(models.Model):
             raise ValidationError(f"Type d'affirmation invalide ({affirmation.nbr_reponses}).")
         super().clean()
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored row so counters can apply the right delta on change
+        instance._etat_initial = instance.etat_compteurs()
+        return instance
+
+    def etat_compteurs(self):
+        """Fields the counters depend on (api/counters.py), or None if they are not loaded."""
+        fields = ('activite_id', 'affirmation_id', 'etudiant_id', 'reponse_vf', 'reponse_choisie_qcm')
+        if any(field not in self.__dict__ for field in fields):
+            return None
+        return tuple(self.__dict__[field] for field in fields)
+
     def save(self, *args, **kwargs):
         self.full_clean()
         super().save(*args, **kwargs)
@@ -215,6 +239,37 @@ class Reponse(models.Model):
         except Exception as e:
              return f"Réponse incomplète (ID: {self.id}, Erreur: {e})"
 
+# --- Response Counters (denormalized, maintained by api/counters.py) ---
+class CompteurReponse(models.Model):
+    """Number of responses per (activity, affirmation, choice)."""
+    CHOIX = [
+        ('vrai', 'Vrai'), ('faux', 'Faux'),
+        ('1', 'Choix 1'), ('2', 'Choix 2'), ('3', 'Choix 3'), ('4', 'Choix 4'),
+        ('aucun', 'Sans réponse'),
+    ]
+    activite = models.ForeignKey(Activite, on_delete=models.CASCADE, related_name='compteurs_reponses')
+    affirmation = models.ForeignKey(Affirmation, on_delete=models.CASCADE, related_name='+')
+    choix = models.CharField(max_length=5, choices=CHOIX)
+    total = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = (('activite', 'affirmation', 'choix'),)
+
+    def __str__(self):
+        return f"{self.activite_id} / affirmation {self.affirmation_id} / {self.choix}: {self.total}"
+
+class CompteurEtudiant(models.Model):
+    """Number of responses of one student in one activity."""
+    activite = models.ForeignKey(Activite, on_delete=models.CASCADE, related_name='compteurs_etudiants')
+    etudiant = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    total = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = (('activite', 'etudiant'),)
+
+    def __str__(self):
+        return f"{self.activite_id} / étudiant {self.etudiant_id}: {self.total}"
+
 # --- Debrief Model ---
 class Debrief(models.Model):
     feedback = models.TextField()
@@ -223,6 +278,8 @@ class Debrief(models.Model):
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
         limit_choices_to={'role': 'encadrant'}
     )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
     def __str__(self):
         try:
             encadrant_str = str(self.encadrant)
@@ -230,3 +287,43 @@ class Debrief(models.Model):
             return f"Debrief de {encadrant_str} pour {reponse_str}"
         except Exception as e:
              return f"Debrief incomplet (ID: {self.id}, Erreur: {e})"
+
+# --- Tombstones for delta sync (?since=) ---
+class Suppression(models.Model):
+    """
+    Tombstone of a deleted object (or one removed from a student's view), so
+    that incrementally syncing clients drop it from their copy.
+    """
+    MODELES = [('activite', 'Activité'), ('reponse', 'Réponse'), ('debrief', 'Débrief'), ('affirmation', 'Affirmation')]
+    modele = models.CharField(max_length=12, choices=MODELES)
+    objet_id = models.CharField(max_length=20)
+    activite_code = models.CharField(max_length=9, blank=True, default='')
+    # Who may see the tombstone: the owning encadrant and/or one student
+    encadrant = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    etudiant = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    supprime_le = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['modele', 'supprime_le'], name='api_suppression_sync_idx')]
+
+    def __str__(self):
+        return f"{self.modele} {self.objet_id} supprimé le {self.supprime_le:%Y-%m-%d %H:%M}"
+
+# --- Archived responses of cold activities (api/archives.py) ---
+class ArchiveActivite(models.Model):
+    """
+    An activity's responses and debriefs moved to a compressed JSON file.
+    The counters stay in the database; `statistiques` keeps the analytics
+    result at archiving time.
+    """
+    activite = models.OneToOneField(Activite, on_delete=models.CASCADE, primary_key=True, related_name='archive')
+    fichier = models.CharField(max_length=255, help_text="Chemin relatif à ARCHIVES['DIR'].")
+    taille = models.PositiveIntegerField(help_text="Taille du fichier compressé, en octets.")
+    sha256 = models.CharField(max_length=64)
+    nombre_reponses = models.PositiveIntegerField()
+    nombre_debriefs = models.PositiveIntegerField()
+    statistiques = models.JSONField()
+    archive_le = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Archive {self.activite_id} ({self.nombre_reponses} réponses, {self.archive_le:%Y-%m-%d})"
@@ -0,0 +1,93 @@
+"""
+Reads on replicas (DATABASE_ROUTERS, READ_REPLICAS settings).
+
+Writes always go to `default`. A read only goes to a replica inside a view
+marked `@replica_reads` (lists, affirmation bank, statistics); everything
+else reads the primary. These also stay on the primary:
+
+- unsafe requests (POST, PUT...) and reads inside an open transaction on
+  `default`;
+- sessions (a login that was just written must be read back);
+- for STICKY_SECONDS after a request that wrote, whatever its method (a GET
+  that writes counts): the cookie set by middleware/replica.py makes the
+  client read its own writes from the primary, with no state shared
+  between nodes.
+
+Locally, DB_REPLICAS="path1,path2" declares SQLite replicas (replica1,
+replica2...) that `manage.py copier_replica` refreshes from the main
+database.
+"""
+import contextvars
+import functools
+import random
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+DEFAULTS = {
+    'ALIASES': [],
+    'STICKY_SECONDS': 10,
+    'COOKIE': 'lectures_primaire',
+}
+
+# Apps always read from the primary
+PRIMARY_APPS = {'sessions'}
+
+_replica_allowed = contextvars.ContextVar('replica_allowed', default=False)
+# Per-request write marker, set by middleware/replica.py (a list so that
+# sync_to_async threads, which get a copy of the context, share it)
+_writes = contextvars.ContextVar('replica_writes', default=None)
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'READ_REPLICAS', {})}
+
+
+def read_db():
+    """Read alias for the current request: a replica when allowed, else `default`."""
+    aliases = get_config()['ALIASES']
+    if not aliases or not _replica_allowed.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return DEFAULT_DB_ALIAS
+    return random.choice(aliases)
+
+
+def track_writes():
+    """Starts tracking the current request's writes; returns the marker (empty until it writes)."""
+    writes = []
+    _writes.set(writes)
+    return writes
+
+
+def replica_reads(method):
+    """View method decorator (self, request, ...): its reads may go to a replica."""
+    @functools.wraps(method)
+    def wrapper(view, request, *args, **kwargs):
+        allowed = request.method in SAFE_METHODS and not getattr(request, 'lectures_primaire', False)
+        token = _replica_allowed.set(allowed)
+        try:
+            return method(view, request, *args, **kwargs)
+        finally:
+            _replica_allowed.reset(token)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_APPS:
+            return DEFAULT_DB_ALIAS
+        return read_db()
+
+    def db_for_write(self, model, **hints):
+        writes = _writes.get()
+        if writes is not None and not writes and model._meta.app_label not in PRIMARY_APPS:
+            writes.append(model._meta.label)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema with their data (copier_replica or the engine's replication)
+        return db == DEFAULT_DB_ALIAS
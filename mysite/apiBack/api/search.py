@@ -0,0 +1,181 @@
+"""
+Full-text search over the affirmations (text + explanation).
+
+- SQLite: FTS5 virtual table `api_affirmation_fts` (external content) kept
+  up to date by triggers on `api_affirmation`, bm25 ranking.
+- PostgreSQL: GIN index on the tsvector expression, always in sync,
+  ts_rank ranking.
+- Other backends: `icontains` fallback, unranked.
+
+The SQLite triggers are dropped whenever a migration makes Django rebuild
+the `api_affirmation` table: such a migration must reinstall them (see
+0015), and `manage.py rebuild_search_index` reinstalls them and reindexes.
+"""
+import html
+import re
+
+from django.db import connection, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .routers import read_db
+
+FTS_TABLE = 'api_affirmation_fts'
+PG_INDEX = 'api_affirmation_search_idx'
+PG_DOCUMENT = "to_tsvector('french', coalesce(affirmation, '') || ' ' || coalesce(explication, ''))"
+
+# Highlight markers, replaced by <mark> once the snippet text has been escaped
+_START, _STOP = '\x02', '\x03'
+
+SQLITE_INSTALL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        affirmation, explication,
+        content='api_affirmation', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON api_affirmation BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, affirmation, explication) VALUES (new.id, new.affirmation, new.explication);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON api_affirmation BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, affirmation, explication) VALUES ('delete', old.id, old.affirmation, old.explication);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON api_affirmation BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, affirmation, explication) VALUES ('delete', old.id, old.affirmation, old.explication);
+        INSERT INTO {FTS_TABLE}(rowid, affirmation, explication) VALUES (new.id, new.affirmation, new.explication);
+    END""",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+POSTGRES_INSTALL = [f"CREATE INDEX IF NOT EXISTS {PG_INDEX} ON api_affirmation USING GIN ({PG_DOCUMENT})"]
+POSTGRES_UNINSTALL = [f"DROP INDEX IF EXISTS {PG_INDEX}"]
+
+
+def _run(schema_connection, statements):
+    with schema_connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def install(schema_connection=connection):
+    """Creates the index (and the SQLite triggers), then indexes the existing rows."""
+    if schema_connection.vendor == 'sqlite':
+        _run(schema_connection, SQLITE_INSTALL)
+    elif schema_connection.vendor == 'postgresql':
+        _run(schema_connection, POSTGRES_INSTALL)
+
+
+def uninstall(schema_connection=connection):
+    if schema_connection.vendor == 'sqlite':
+        _run(schema_connection, SQLITE_UNINSTALL)
+    elif schema_connection.vendor == 'postgresql':
+        _run(schema_connection, POSTGRES_UNINSTALL)
+
+
+def _fts5_query(text):
+    """Turns free input into a safe FTS5 query (implicit AND, prefix match on the last word)."""
+    tokens = re.findall(r'\w+', text)
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _highlight(snippet):
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(_START, '<mark>').replace(_STOP, '</mark>')
+
+
+def matching_ids_sql(text):
+    """Subquery (RawSQL) of the ids of affirmations matching `text`, or None (fallback)."""
+    if connection.vendor == 'sqlite':
+        match = _fts5_query(text)
+        if match is None:
+            return None
+        return RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+    if connection.vendor == 'postgresql':
+        return RawSQL(
+            f"SELECT id FROM api_affirmation WHERE {PG_DOCUMENT} @@ websearch_to_tsquery('french', %s)", [text]
+        )
+    return None
+
+
+def filter_queryset(queryset, text):
+    """Restricts an Affirmation queryset to the rows matching `text`."""
+    subquery = matching_ids_sql(text)
+    if subquery is None:
+        return queryset.filter(Q(affirmation__icontains=text) | Q(explication__icontains=text))
+    return queryset.filter(pk__in=subquery)
+
+
+def search_affirmations(text, offset=0, limit=20):
+    """
+    Ranked search. Returns (total, results); each result holds id,
+    affirmation, nbr_reponses, score (higher is more relevant) and the
+    highlighted snippets (escaped HTML, matched terms wrapped in <mark>).
+    """
+    if connection.vendor == 'sqlite':
+        match = _fts5_query(text)
+        if match is None:
+            return 0, []
+        count_sql = f"SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+        count_params = [match]
+        sql = f"""
+            SELECT a.id, a.affirmation, a.nbr_reponses,
+                   snippet({FTS_TABLE}, 0, %s, %s, '…', 16),
+                   snippet({FTS_TABLE}, 1, %s, %s, '…', 16),
+                   bm25({FTS_TABLE}) AS rang
+            FROM {FTS_TABLE} JOIN api_affirmation a ON a.id = {FTS_TABLE}.rowid
+            WHERE {FTS_TABLE} MATCH %s
+            ORDER BY rang LIMIT %s OFFSET %s
+        """
+        params = [_START, _STOP, _START, _STOP, match, limit, offset]
+    elif connection.vendor == 'postgresql':
+        headline = f"'StartSel={_START}, StopSel={_STOP}, MaxFragments=2, MaxWords=24, MinWords=8'"
+        count_sql = f"SELECT count(*) FROM api_affirmation WHERE {PG_DOCUMENT} @@ websearch_to_tsquery('french', %s)"
+        count_params = [text]
+        sql = f"""
+            SELECT id, affirmation, nbr_reponses,
+                   ts_headline('french', affirmation, q, {headline}),
+                   ts_headline('french', coalesce(explication, ''), q, {headline}),
+                   -ts_rank({PG_DOCUMENT}, q) AS rang
+            FROM api_affirmation, websearch_to_tsquery('french', %s) q
+            WHERE {PG_DOCUMENT} @@ q
+            ORDER BY rang LIMIT %s OFFSET %s
+        """
+        params = [text, limit, offset]
+    else:
+        from .models import Affirmation
+        queryset = filter_queryset(Affirmation.objects.order_by('id'), text)
+        rows = queryset.values_list('id', 'affirmation', 'nbr_reponses', 'explication')[offset:offset + limit]
+        return queryset.count(), [
+            {'id': row[0], 'affirmation': row[1], 'nbr_reponses': row[2],
+             'extrait_affirmation': html.escape(row[1]), 'extrait_explication': html.escape(row[3] or ''),
+             'score': None}
+            for row in rows
+        ]
+
+    with connections[read_db()].cursor() as cursor:
+        cursor.execute(count_sql, count_params)
+        total = cursor.fetchone()[0]
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return total, [
+        {
+            'id': row[0],
+            'affirmation': row[1],
+            'nbr_reponses': row[2],
+            'extrait_affirmation': _highlight(row[3]),
+            'extrait_explication': _highlight(row[4]),
+            'score': round(-row[5], 6),  # Higher is better on both backends
+        }
+        for row in rows
+    ]
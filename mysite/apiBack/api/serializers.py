@@ -1,11 +1,20 @@
 # serializers.py
+import logging
+
 from rest_framework import serializers
 from django.conf import settings
 from django.contrib.auth import get_user_model
 
-from .models import Activite, Affirmation, Reponse, Debrief, Categorie
+from .models import Activite, Affirmation, ArchiveActivite, Reponse, Debrief, Categorie, code_activite_validator
 
 Users = get_user_model()
+logger = logging.getLogger(__name__)
+
+
+def with_related(queryset, serializer_class):
+    """Applies the serializer's SELECT_RELATED/PREFETCH_RELATED so nested output costs a fixed number of queries."""
+    return (queryset.select_related(*serializer_class.SELECT_RELATED)
+            .prefetch_related(*serializer_class.PREFETCH_RELATED))
 
 class UsersSerializer(serializers.ModelSerializer):
     class Meta:
@@ -44,6 +53,9 @@ class AffirmationSerializer(serializers.ModelSerializer):
     """Serializer pour le modèle Affirmation mis à jour (Approach 1)."""
     activites_codes = serializers.SerializerMethodField(read_only=True)
 
+    SELECT_RELATED = ()
+    PREFETCH_RELATED = ('activites',)
+
     class Meta:
         model = Affirmation
         fields = [
@@ -121,11 +133,14 @@ class ActiviteSerializer(serializers.ModelSerializer):
     nbr_affirmations_associe = serializers.IntegerField(read_only=True)
     type_affirmation_requise_display = serializers.CharField(source='get_type_affirmation_requise_display', read_only=True)
 
+    SELECT_RELATED = ('destine_a', 'encadrant')
+    PREFETCH_RELATED = ('etudiants_autorises', 'affirmations_associes__activites')
+
     class Meta:
         model = Activite
         fields = [
             'code_activite', 'titre', 'presentation_publique', 'description',
-            'created_at', 'encadrant',
+            'created_at', 'updated_at', 'encadrant',
             'destine_a', 'destine_a_id',
             'etudiants_autorises', # Readable uses EtudiantListSerializer now
             'etudiants_autorises_ids', # Writable uses PKs
@@ -135,9 +150,10 @@ class ActiviteSerializer(serializers.ModelSerializer):
             'affirmations_associes',
             'affirmations_associes_ids',
             'nbr_affirmations_associe',
-            'is_published' # Added is_published
+            'is_published', # Added is_published
+            'est_archivee',
         ]
-        read_only_fields = ['encadrant', 'created_at', 'nbr_affirmations_associe', 'type_affirmation_requise_display']
+        read_only_fields = ['encadrant', 'created_at', 'updated_at', 'nbr_affirmations_associe', 'type_affirmation_requise_display']
         extra_kwargs = {
             'code_activite': {'validators': []}
         }
@@ -184,9 +200,9 @@ class ActiviteSerializer(serializers.ModelSerializer):
                         last_name=''
                     )
                     student_users.append(user)
-                    print(f"Created new student user: {email} (username: {username})")
+                    logger.info("Created new student user %s", username, extra={'event': 'etudiant_created'})
                 except Exception as e:
-                    print(f"Error creating student user for {email}: {e}")
+                    logger.exception("Error creating student user for %s", email)
                     continue
         
         return student_users
@@ -250,9 +266,9 @@ class ReponseSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'activite', 'affirmation', 'etudiant',
             'reponse_vf', 'reponse_choisie_qcm',
-            'justification', 'timestamp'
+            'justification', 'timestamp', 'updated_at'
         ]
-        read_only_fields = ['id', 'etudiant', 'timestamp']
+        read_only_fields = ['id', 'etudiant', 'timestamp', 'updated_at']
 
     def validate(self, data):
         affirmation = data.get('affirmation', getattr(self.instance, 'affirmation', None))
@@ -277,24 +293,55 @@ class ReponseSerializerGET(serializers.ModelSerializer):
     etudiant = UsersSerializer(read_only=True)
     activite = ActiviteSerializer(read_only=True)
     affirmation = AffirmationSerializer(read_only=True)
+
+    SELECT_RELATED = ('etudiant', 'affirmation', 'activite__destine_a', 'activite__encadrant')
+    PREFETCH_RELATED = (
+        'affirmation__activites', 'activite__etudiants_autorises', 'activite__affirmations_associes__activites',
+    )
+
     class Meta:
         model = Reponse
         fields = [
             'id', 'activite', 'affirmation', 'etudiant',
             'reponse_vf', 'reponse_choisie_qcm',
-            'justification', 'timestamp'
+            'justification', 'timestamp', 'updated_at'
         ]
         read_only_fields = fields
 
+class ActiviteCloneSerializer(serializers.Serializer):
+    """Parameters of an activity copy (ActiviteCloneAPIView)."""
+    code_activite = serializers.CharField(max_length=9)
+    titre = serializers.CharField(max_length=255, required=False)
+    etudiants = serializers.BooleanField(default=True, help_text="Copier les étudiants autorisés.")
+    affirmations = serializers.BooleanField(default=True, help_text="Copier les affirmations associées.")
+
+    def validate_code_activite(self, value):
+        value = value.upper()
+        code_activite_validator(value)
+        if Activite.objects.filter(pk=value).exists():
+            raise serializers.ValidationError("Ce code d'activité existe déjà.")
+        return value
+
+# --- Archive Serializer ---
+class ArchiveActiviteSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchiveActivite
+        fields = ['activite', 'nombre_reponses', 'nombre_debriefs', 'taille', 'archive_le']
+        read_only_fields = fields
+
 # --- Debrief Serializer --- 
 class DebriefSerializer(serializers.ModelSerializer):
     encadrant = UsersSerializer(read_only=True)
     reponse = ReponseSerializerGET(read_only=True)
     reponse_id = serializers.PrimaryKeyRelatedField(queryset=Reponse.objects.all(), source='reponse', write_only=True)
+
+    SELECT_RELATED = ('encadrant',) + tuple('reponse__' + field for field in ReponseSerializerGET.SELECT_RELATED)
+    PREFETCH_RELATED = tuple('reponse__' + field for field in ReponseSerializerGET.PREFETCH_RELATED)
+
     class Meta:
         model = Debrief
-        fields = ['id', 'feedback', 'reponse', 'reponse_id', 'encadrant']
-        read_only_fields = ['id', 'encadrant']
+        fields = ['id', 'feedback', 'reponse', 'reponse_id', 'encadrant', 'updated_at']
+        read_only_fields = ['id', 'encadrant', 'updated_at']
 
     def validate_reponse_id(self, reponse_instance):
         request = self.context.get('request')
@@ -0,0 +1,101 @@
+"""
+Authenticated user kept in the session, for high-traffic roles.
+
+Django reads the `Users` row again on every authenticated request. For the
+roles in SESSION_USER_CACHE['ROLES'] (students), the useful fields are
+copied into the session at login and `request.user` is rebuilt from them
+for TTL seconds (middleware/cached_user.py); the row is then read once more
+and the copy renewed. The other fields stay deferred: accessing them runs
+the usual query.
+
+A role change or deactivation is therefore only seen after at most TTL
+seconds for these roles. With SESSION_STRATEGY='signed_cookies', the
+session is not read from the database either: a student request makes no
+query at all for authentication.
+
+`update_last_login` replaces Django's: for the same roles, last_login is
+only rewritten when older than LAST_LOGIN_RESOLUTION seconds, which avoids
+one write per login during bursts.
+"""
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+DEFAULTS = {
+    'ROLES': ('etudiant',),
+    'TTL': 300,
+    'LAST_LOGIN_RESOLUTION': 3600,
+}
+
+CACHE_KEY = '_utilisateur'
+FIELDS = ('username', 'email', 'first_name', 'last_name', 'role', 'is_active', 'is_staff', 'is_superuser')
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'SESSION_USER_CACHE', {})}
+
+
+def remember(session, user):
+    """Copies `user` into the session if its role qualifies (and removes the copy otherwise)."""
+    config = get_config()
+    if config['TTL'] <= 0 or user.role not in config['ROLES']:
+        session.pop(CACHE_KEY, None)
+        return
+    session[CACHE_KEY] = {
+        'id': user.pk,
+        'hash': session.get(HASH_SESSION_KEY),
+        'expire': time.time() + config['TTL'],
+        'fields': {field: getattr(user, field) for field in FIELDS},
+    }
+
+
+def cached_user(session):
+    """User rebuilt from the session, or None if absent, expired or from another login."""
+    data = session.get(CACHE_KEY)
+    if not data or data['expire'] < time.time():
+        return None
+    if str(data['id']) != session.get(SESSION_KEY) or data['hash'] != session.get(HASH_SESSION_KEY):
+        return None
+    user = build_user({'id': data['id'], **data['fields']})
+    user.backend = session.get(BACKEND_SESSION_KEY)
+    return user
+
+
+def build_user(values):
+    """Users instance built from `values` without a query; missing fields stay deferred."""
+    model = auth.get_user_model()
+    # from_db() expects values in model field order
+    names = [field.attname for field in model._meta.concrete_fields if field.attname in values]
+    return model.from_db(DEFAULT_DB_ALIAS, names, [values[name] for name in names])
+
+
+def get_user(request):
+    if not hasattr(request, '_cached_user'):
+        user = cached_user(request.session)
+        if user is None:
+            user = auth.get_user(request)
+            if user.is_authenticated:
+                remember(request.session, user)
+        request._cached_user = user
+    return request._cached_user
+
+
+async def aget_user(request):
+    # One thread hop covers both the session load and the (possibly cached) user
+    return await sync_to_async(get_user)(request)
+
+
+def update_last_login(sender, user, **kwargs):
+    """user_logged_in receiver: last_login, at most once per LAST_LOGIN_RESOLUTION for ROLES."""
+    config = get_config()
+    now = timezone.now()
+    if (user.role in config['ROLES'] and user.last_login is not None
+            and (now - user.last_login).total_seconds() < config['LAST_LOGIN_RESOLUTION']):
+        return
+    user.last_login = now
+    user.save(update_fields=['last_login'])
@@ -0,0 +1,144 @@
+"""Signal receivers keeping derived data (indexes, caches) in sync with the models."""
+from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import analytics, archives, counters, session_user, sync
+from .models import Activite, Affirmation, ArchiveActivite, Debrief, Reponse, Suppression
+from .similarity import get_corpus_index
+
+
+@receiver(user_logged_in)
+def remember_session_user(sender, request, user, **kwargs):
+    # Saves the Users lookup on the next requests of this session
+    if request is not None and hasattr(request, 'session'):
+        session_user.remember(request.session, user)
+
+
+@receiver(post_save, sender=Affirmation)
+def index_affirmation(sender, instance, created, **kwargs):
+    index = get_corpus_index()
+    if index.loaded:
+        index.add(instance.pk, instance.affirmation)
+    if not created:
+        codes = list(instance.activites.values_list('pk', flat=True))
+        for code_activite in codes:
+            analytics.invalidate(code_activite)
+        if codes:
+            # Activities embed their affirmations: delta-sync clients must refetch them
+            Activite.objects.filter(pk__in=codes).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Affirmation)
+def unindex_affirmation(sender, instance, **kwargs):
+    index = get_corpus_index()
+    if index.loaded:
+        index.remove(instance.pk)
+    # Other worker processes drop it from their index at their next resync
+    sync.record('affirmation', instance.pk)
+
+
+@receiver(post_save, sender=Reponse)
+@receiver(post_delete, sender=Reponse)
+def reponse_changed(sender, instance, **kwargs):
+    analytics.invalidate(instance.activite_id)
+
+
+@receiver(post_save, sender=Reponse)
+def touch_debrief(sender, instance, created, **kwargs):
+    # Debriefs embed their response
+    if not created:
+        Debrief.objects.filter(reponse=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Reponse)
+def record_deleted_reponse(sender, instance, **kwargs):
+    sync.record('reponse', instance.pk, activite_code=instance.activite_id, etudiant_id=instance.etudiant_id)
+
+
+@receiver(post_delete, sender=Debrief)
+def record_deleted_debrief(sender, instance, **kwargs):
+    sync.record('debrief', instance.pk, encadrant_id=instance.encadrant_id)
+
+
+@receiver(post_delete, sender=ArchiveActivite)
+def remove_archive_file(sender, instance, **kwargs):
+    # Rehydrated or activity deleted: the file is only dropped once the rows are committed
+    transaction.on_commit(lambda: archives.remove_file(instance.fichier))
+
+
+@receiver(pre_delete, sender=Activite)
+def remember_activite_students(sender, instance, **kwargs):
+    instance._etudiants_supprimes = list(instance.etudiants_autorises.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Activite)
+def record_deleted_activite(sender, instance, **kwargs):
+    code = instance.pk
+    tombstones = [Suppression(modele='activite', objet_id=code, activite_code=code, encadrant_id=instance.encadrant_id)]
+    tombstones += [
+        Suppression(modele='activite', objet_id=code, activite_code=code, etudiant_id=etudiant_id)
+        for etudiant_id in getattr(instance, '_etudiants_supprimes', ())
+    ]
+    Suppression.objects.bulk_create(tombstones)
+
+
+@receiver(pre_save, sender=Reponse)
+def load_reponse_state(sender, instance, **kwargs):
+    # Instances built by hand (not loaded from the DB) don't know what is stored yet
+    if instance._state.adding or getattr(instance, '_etat_initial', None) is not None:
+        return
+    stored = Reponse.objects.filter(pk=instance.pk).first()
+    instance._etat_initial = stored.etat_compteurs() if stored else None
+
+
+@receiver(post_save, sender=Reponse)
+def count_saved_reponse(sender, instance, created, **kwargs):
+    new_state = instance.etat_compteurs()
+    counters.apply(None if created else getattr(instance, '_etat_initial', None), new_state)
+    instance._etat_initial = new_state
+
+
+@receiver(post_delete, sender=Reponse)
+def count_deleted_reponse(sender, instance, **kwargs):
+    counters.apply(getattr(instance, '_etat_initial', None) or instance.etat_compteurs(), None)
+    instance._etat_initial = None
+
+
+def _linked_pks(sender, instance, reverse):
+    """Current pks on the other side of the relation (activity codes when `reverse`)."""
+    if reverse:
+        return set(sender.objects.filter(**{f'{instance._meta.model_name}_id': instance.pk})
+                   .values_list('activite_id', flat=True))
+    other = 'users_id' if sender is Activite.etudiants_autorises.through else 'affirmation_id'
+    return set(sender.objects.filter(activite_id=instance.pk).values_list(other, flat=True))
+
+
+@receiver(m2m_changed, sender=Activite.affirmations_associes.through)
+@receiver(m2m_changed, sender=Activite.etudiants_autorises.through)
+def activite_relations_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # post_clear gets no pk_set: remember what is about to be unlinked
+        instance.__dict__.setdefault('_m2m_cleared', {})[sender] = _linked_pks(sender, instance, reverse)
+        return
+    if not action.startswith('post_'):
+        return
+    if action == 'post_clear':
+        pk_set = instance.__dict__.get('_m2m_cleared', {}).pop(sender, set())
+    # Changed from the Affirmation/Users side: pk_set holds activity codes
+    codes = pk_set if reverse else {instance.pk}
+    if not codes:
+        return
+    for code_activite in codes:
+        analytics.invalidate(code_activite)
+    Activite.objects.filter(pk__in=codes).update(updated_at=timezone.now())
+
+    if sender is Activite.etudiants_autorises.through and action in ('post_remove', 'post_clear') and pk_set:
+        # The activity leaves these students' lists: tombstone it for them
+        pairs = [(code, instance.pk) for code in pk_set] if reverse else [(instance.pk, pk) for pk in pk_set]
+        Suppression.objects.bulk_create([
+            Suppression(modele='activite', objet_id=code, activite_code=code, etudiant_id=etudiant_id)
+            for code, etudiant_id in pairs
+        ])
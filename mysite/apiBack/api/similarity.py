@@ -0,0 +1,187 @@
+"""
+Near-duplicate index (MinHash + LSH) over the affirmations' text.
+
+Each text is reduced to the set of its words and word bigrams, then to a
+MinHash signature of NUM_PERM values cut into BANDS bands. Two texts sharing
+a band are candidates; the exact Jaccard similarity of the sets then decides
+between them. A lookup costs one signature and a few dictionary reads.
+
+`SimilarityIndex` is an in-memory structure independent of the database;
+`get_corpus_index()` returns the index of the `Affirmation` corpus, loaded on
+first use and kept up to date by the signals (api/signals.py) in the writing
+process. Other processes resync at most every RESYNC_SECONDS: rows whose
+`updated_at` changed (created or edited) and deletions recorded in
+`Suppression` (api/sync.py). Past the tombstone retention, the index is
+rebuilt. A `QuerySet.update()` of the text does not touch `updated_at`: it
+must set it itself.
+"""
+import datetime
+import random
+import re
+import threading
+import time
+import zlib
+
+from django.conf import settings
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+_MASK64 = (1 << 64) - 1
+
+# Multiply-shift hash family h(x) = ((a*x + b) mod 2^64) >> 32, with a odd.
+# Fixed seed: signatures must be stable across processes.
+_rng = random.Random(20240517)
+_PERMUTATIONS = [(_rng.getrandbits(64) | 1, _rng.getrandbits(64)) for _ in range(NUM_PERM)]
+
+DEFAULT_THRESHOLD = 0.6
+
+
+def get_threshold():
+    return getattr(settings, 'SIMILARITY_THRESHOLD', DEFAULT_THRESHOLD)
+
+
+def normalize_text(text):
+    """Canonical form of a text (case, punctuation, whitespace)."""
+    return ' '.join(re.sub(r'[^\w\s]', ' ', (text or '').lower()).split())
+
+
+def shingles(text):
+    words = normalize_text(text).split()
+    result = set(words)
+    result.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    return frozenset(result)
+
+
+def signature(shingle_set):
+    hashes = [zlib.crc32(s.encode('utf-8')) for s in shingle_set]
+    if not hashes:
+        return ()
+    return tuple(
+        min([((a * h + b) & _MASK64) >> 32 for h in hashes])
+        for a, b in _PERMUTATIONS
+    )
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class SimilarityIndex:
+    """In-memory LSH index: identifier -> text."""
+
+    def __init__(self):
+        self._docs = {}  # id -> (shingles, signature)
+        self._buckets = [{} for _ in range(BANDS)]
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    @staticmethod
+    def _bands(sig):
+        return [hash(sig[i * ROWS:(i + 1) * ROWS]) for i in range(BANDS)]
+
+    def add(self, doc_id, text):
+        shingle_set = shingles(text)
+        sig = signature(shingle_set)
+        with self._lock:
+            self._remove(doc_id)
+            if not sig:
+                return
+            self._docs[doc_id] = (shingle_set, sig)
+            for band, key in zip(self._buckets, self._bands(sig)):
+                band.setdefault(key, set()).add(doc_id)
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        entry = self._docs.pop(doc_id, None)
+        if entry is None:
+            return
+        for band, key in zip(self._buckets, self._bands(entry[1])):
+            members = band.get(key)
+            if members is not None:
+                members.discard(doc_id)
+                if not members:
+                    del band[key]
+
+    def query(self, text, threshold=None, exclude=None, limit=10):
+        """[(id, similarity)] of the texts close to `text`, closest first."""
+        threshold = get_threshold() if threshold is None else threshold
+        shingle_set = shingles(text)
+        sig = signature(shingle_set)
+        if not sig:
+            return []
+        with self._lock:
+            candidates = set()
+            for band, key in zip(self._buckets, self._bands(sig)):
+                candidates.update(band.get(key, ()))
+            candidates.discard(exclude)
+            scored = [
+                (doc_id, jaccard(shingle_set, self._docs[doc_id][0]))
+                for doc_id in candidates
+            ]
+        matches = sorted(
+            ((doc_id, round(score, 3)) for doc_id, score in scored if score >= threshold),
+            key=lambda item: -item[1],
+        )
+        return matches[:limit]
+
+
+class CorpusIndex(SimilarityIndex):
+    """Index of the `Affirmation` corpus, lazily loaded from the database."""
+    RESYNC_SECONDS = 60
+
+    def __init__(self):
+        super().__init__()
+        self._loaded = False
+        self._synced_at = 0.0
+        self._last_sync = None  # database time of the last (re)load
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def ensure_loaded(self):
+        if self._loaded and time.monotonic() - self._synced_at < self.RESYNC_SECONDS:
+            return
+        from django.utils import timezone
+
+        from . import sync
+        from .models import Affirmation, Suppression
+        with self._lock:
+            # Taken before reading, minus the delta-sync overlap: a write committed
+            # meanwhile is read again next time rather than missed
+            started = timezone.now() - datetime.timedelta(seconds=sync.get_config()['OVERLAP'])
+            rows = Affirmation.objects.values_list('id', 'affirmation')
+            if self._last_sync is None or self._last_sync < sync.retention_limit():
+                self._docs.clear()
+                for band in self._buckets:
+                    band.clear()
+            else:
+                # Rows created, edited or deleted by other worker processes since the last sync
+                rows = rows.filter(updated_at__gt=self._last_sync)
+                deleted = Suppression.objects.filter(modele='affirmation', supprime_le__gt=self._last_sync)
+                for doc_id in deleted.values_list('objet_id', flat=True):
+                    self._remove(int(doc_id))
+            for doc_id, text in rows.iterator():
+                self.add(doc_id, text)
+            self._loaded = True
+            self._last_sync = started
+            self._synced_at = time.monotonic()
+
+    def query(self, text, threshold=None, exclude=None, limit=10):
+        self.ensure_loaded()
+        return super().query(text, threshold=threshold, exclude=exclude, limit=limit)
+
+
+_corpus_index = CorpusIndex()
+
+
+def get_corpus_index():
+    return _corpus_index
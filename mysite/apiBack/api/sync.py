@@ -0,0 +1,82 @@
+"""
+Incremental sync of the lists (`?since=<cursor>` parameter).
+
+The cursor is an instant (microseconds since the epoch, "0" to receive
+everything). A delta response holds the rows whose `updated_at` is later
+than the cursor, the ids deleted since then (`Suppression` model, fed by
+api/signals.py) and the cursor to send back on the next call.
+
+The returned cursor is taken before reading, minus OVERLAP seconds: a write
+committed during the request is sent again on the next call, at the cost of
+a few duplicates the client overwrites. After TOMBSTONE_RETENTION days the
+tombstones are purged (`manage.py purger_suppressions`) and an older cursor
+is refused: the client must reload everything.
+"""
+import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Suppression
+
+DEFAULTS = {
+    'OVERLAP': 1.0,
+    'TOMBSTONE_RETENTION_DAYS': 30,
+}
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+class CursorExpired(Exception):
+    """Cursor older than the tombstone retention."""
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'DELTA_SYNC', {})}
+
+
+def format_cursor(instant):
+    return str((instant - EPOCH) // _MICROSECOND)
+
+
+def parse_cursor(value):
+    """Text cursor -> datetime. Raises ValueError if invalid, CursorExpired if too old."""
+    micros = int(value)
+    if micros < 0:
+        raise ValueError(value)
+    if micros == 0:
+        return EPOCH
+    instant = EPOCH + micros * _MICROSECOND
+    if instant < retention_limit():
+        raise CursorExpired(value)
+    return instant
+
+
+def retention_limit():
+    return timezone.now() - datetime.timedelta(days=get_config()['TOMBSTONE_RETENTION_DAYS'])
+
+
+def next_cursor():
+    """Cursor to return to the client; call it before reading the data."""
+    return format_cursor(timezone.now() - datetime.timedelta(seconds=get_config()['OVERLAP']))
+
+
+def deleted_ids(since, modele, **scope):
+    """Ids (as text) of the `modele` objects deleted after `since` and visible within `scope`."""
+    if since == EPOCH:
+        return []  # Full download: nothing to remove on the client side
+    return list(
+        Suppression.objects.filter(modele=modele, supprime_le__gt=since, **scope)
+        .values_list('objet_id', flat=True).distinct()
+    )
+
+
+def record(modele, objet_id, **scope):
+    Suppression.objects.create(modele=modele, objet_id=str(objet_id), **scope)
+
+
+def purge():
+    """Deletes the tombstones older than the retention; returns how many."""
+    deleted, _ = Suppression.objects.filter(supprime_le__lt=retention_limit()).delete()
+    return deleted
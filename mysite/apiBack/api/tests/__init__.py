@@ -0,0 +1,40 @@
+"""
+Tests of the api app.
+
+- test_budgets: per-endpoint SQL query and time budgets;
+- test_<module>: behaviour of the matching api/<module>.py module.
+
+`small_class()` creates the minimal data set shared by the behaviour tests.
+Tests that write to the database use TEST_CACHES: a cache shared like in
+production (files), outside the project directory.
+"""
+import os
+import tempfile
+import uuid
+
+from ..models import Activite, Affirmation, Users
+
+PASSWORD = 'motdepasse-test'
+
+TEST_CACHES = {'default': {
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': os.path.join(tempfile.gettempdir(), f'api-cache-{uuid.uuid4().hex}'),
+}}
+
+
+def small_class(code='TEST01', etudiants=2, published=True):
+    """An encadrant, `etudiants` authorized students and an activity with one true/false and one QCM affirmation."""
+    encadrant = Users.objects.create_user(username=f'enc-{code}', email=f'enc-{code.lower()}@test.fr',
+                                          password=PASSWORD, role='encadrant')
+    eleves = [
+        Users.objects.create_user(username=f'etu{i}-{code}', email=f'etu{i}-{code.lower()}@test.fr',
+                                  password=PASSWORD, role='etudiant')
+        for i in range(etudiants)
+    ]
+    activite = Activite.objects.create(code_activite=code, titre='Activité de test', encadrant=encadrant,
+                                       is_published=published)
+    vf = Affirmation.objects.create(affirmation='Le cœur a quatre cavités.', nbr_reponses=2, encadrant=encadrant)
+    qcm = Affirmation.objects.create(affirmation='Le foie produit la bile.', nbr_reponses=4, encadrant=encadrant)
+    activite.etudiants_autorises.set(eleves)
+    activite.affirmations_associes.set([vf, qcm])
+    return {'encadrant': encadrant, 'etudiants': eleves, 'activite': activite, 'vf': vf, 'qcm': qcm}
@@ -0,0 +1,72 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from .. import analytics
+from ..models import Reponse
+from . import TEST_CACHES, small_class
+
+
+@override_settings(CACHES=TEST_CACHES)
+class AnswerDistributionCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        data = small_class()
+        cls.activite, cls.vf, cls.etudiants = data['activite'], data['vf'], data['etudiants']
+
+    def setUp(self):
+        cache.clear()
+
+    def answer(self, etudiant, reponse_vf):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Reponse.objects.create(activite=self.activite, affirmation=self.vf, etudiant=etudiant,
+                                          reponse_vf=reponse_vf)
+
+    def repartition(self):
+        return analytics.get_answer_distribution(self.activite)['affirmations'][0]['repartition']
+
+    def test_served_from_cache_until_an_answer_changes(self):
+        reponse = self.answer(self.etudiants[0], True)
+        self.assertEqual(self.repartition(), {'vrai': 1, 'faux': 0})
+        with self.assertNumQueries(0):
+            self.repartition()
+
+        self.answer(self.etudiants[1], False)
+        self.assertEqual(self.repartition(), {'vrai': 1, 'faux': 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reponse.delete()
+        self.assertEqual(self.repartition(), {'vrai': 0, 'faux': 1})
+
+    def test_affirmation_changes_invalidate(self):
+        self.answer(self.etudiants[0], True)
+        self.repartition()
+        self.vf.affirmation = 'Le cœur a deux oreillettes.'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vf.save()
+        self.assertEqual(analytics.get_answer_distribution(self.activite)['affirmations'][0]['affirmation'],
+                         'Le cœur a deux oreillettes.')
+
+    def test_invalidation_waits_for_commit(self):
+        self.answer(self.etudiants[0], True)
+        self.repartition()
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Reponse.objects.create(activite=self.activite, affirmation=self.vf, etudiant=self.etudiants[1],
+                                       reponse_vf=False)
+                # Not committed yet: the cached statistics are still current
+                with self.assertNumQueries(0):
+                    self.assertEqual(self.repartition(), {'vrai': 1, 'faux': 0})
+        self.assertEqual(self.repartition(), {'vrai': 1, 'faux': 1})
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_process_local_cache_is_not_used(self):
+        self.answer(self.etudiants[0], True)
+        with mock.patch.object(analytics, '_warned_local_cache', True):
+            self.repartition()
+            with mock.patch.object(analytics, 'compute_answer_distribution',
+                                   wraps=analytics.compute_answer_distribution) as compute:
+                self.repartition()
+        compute.assert_called_once()
@@ -0,0 +1,115 @@
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .. import archives, counters
+from ..models import ArchiveActivite, CompteurEtudiant, Debrief, Reponse, Suppression
+from . import TEST_CACHES, small_class
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ArchiveRoundTripTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        data = small_class(published=False)
+        cls.activite, cls.encadrant, cls.etudiants = data['activite'], data['encadrant'], data['etudiants']
+        cls.reponses = [
+            Reponse.objects.create(activite=cls.activite, affirmation=data['vf'], etudiant=etudiant, reponse_vf=bool(i))
+            for i, etudiant in enumerate(cls.etudiants)
+        ] + [Reponse.objects.create(activite=cls.activite, affirmation=data['qcm'], etudiant=cls.etudiants[0],
+                                    reponse_choisie_qcm=4, justification='Parce que.')]
+        cls.debrief = Debrief.objects.create(reponse=cls.reponses[0], encadrant=cls.encadrant, feedback='Revoir le cours.')
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        settings = override_settings(ARCHIVES={'DIR': directory})
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def snapshot(self):
+        return (
+            list(Reponse.objects.filter(activite=self.activite).order_by('id').values(*archives.REPONSE_FIELDS[:-1])),
+            list(Debrief.objects.order_by('id').values('id', 'reponse_id', 'encadrant_id', 'feedback')),
+        )
+
+    def test_archive_then_rehydrate_restores_every_row(self):
+        before = self.snapshot()
+        counts = dict(CompteurEtudiant.objects.values_list('etudiant_id', 'total'))
+
+        archive = archives.archiver(self.activite)
+        self.activite.refresh_from_db()
+        self.assertTrue(self.activite.est_archivee)
+        self.assertEqual((archive.nombre_reponses, archive.nombre_debriefs), (3, 1))
+        self.assertFalse(Reponse.objects.filter(activite=self.activite).exists())
+        self.assertTrue(os.path.exists(archives._path(archive.fichier)))
+        # Counters and statistics stay available while archived
+        self.assertEqual(dict(CompteurEtudiant.objects.values_list('etudiant_id', 'total')), counts)
+        self.assertEqual(counters.verify(self.activite.pk), [])
+        # Delta-sync clients drop the archived rows
+        self.assertEqual(
+            sorted(Suppression.objects.filter(activite_code=self.activite.pk).values_list('modele', 'objet_id', 'etudiant_id')),
+            sorted(('reponse', str(reponse.pk), reponse.etudiant_id) for reponse in self.reponses),
+        )
+        self.assertEqual(list(Suppression.objects.filter(modele='debrief').values_list('objet_id', 'encadrant_id')),
+                         [(str(self.debrief.pk), self.encadrant.pk)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(archives.rehydrater(self.activite), (3, 1))
+        self.activite.refresh_from_db()
+        self.assertFalse(self.activite.est_archivee)
+        self.assertEqual(self.snapshot(), before)
+        self.assertFalse(ArchiveActivite.objects.exists())
+        self.assertFalse(os.path.exists(archives._path(archive.fichier)))
+        self.assertEqual(counters.verify(self.activite.pk), [])
+
+    def test_refuses_published_or_archived_activity(self):
+        archives.archiver(self.activite)
+        with self.assertRaises(archives.ArchiveError):
+            archives.archiver(self.activite)
+
+    def test_tampered_file_is_refused(self):
+        archive = archives.archiver(self.activite)
+        with open(archives._path(archive.fichier), 'ab') as handle:
+            handle.write(b'x')
+        with self.assertRaises(archives.ArchiveError):
+            archives.rehydrater(self.activite)
+        self.assertEqual(Reponse.objects.filter(activite=self.activite).count(), 0)
+
+    def test_reading_never_restores_only_the_explicit_post(self):
+        archives.archiver(self.activite)
+        client = APIClient()
+        client.force_login(self.encadrant)
+
+        response = client.get(reverse('activite_detail', kwargs={'pk': self.activite.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['est_archivee'])
+        client.get(reverse('reponses_list'), {'activity_code': self.activite.pk})
+        self.assertFalse(Reponse.objects.filter(activite=self.activite).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(reverse('activite_restore', kwargs={'pk': self.activite.pk}))
+        self.assertEqual((response.status_code, response.data), (200, {'reponses': 3, 'debriefs': 1}))
+        self.assertEqual(Reponse.objects.filter(activite=self.activite).count(), 3)
+        response = client.post(reverse('activite_restore', kwargs={'pk': self.activite.pk}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_edits_of_an_archived_activity_are_refused(self):
+        archives.archiver(self.activite)
+        client = APIClient()
+        client.force_login(self.encadrant)
+        url = reverse('activite_detail', kwargs={'pk': self.activite.pk})
+
+        for method in (client.put, client.patch):
+            response = method(url, {'titre': 'Titre modifié'}, format='json')
+            self.assertEqual(response.status_code, 409)
+            self.assertTrue(response.data['restore'].endswith(
+                reverse('activite_restore', kwargs={'pk': self.activite.pk})))
+        self.activite.refresh_from_db()
+        self.assertTrue(self.activite.est_archivee)
+        self.assertNotEqual(self.activite.titre, 'Titre modifié')
+        self.assertFalse(Reponse.objects.filter(activite=self.activite).exists())
@@ -0,0 +1,530 @@
+"""
+Per-endpoint performance budgets.
+
+Every route of api/urls.py has at least one entry in BUDGETS: the request
+is played against a database seeded at the scale of a real class, and the
+test fails if it exceeds its maximum number of SQL queries or its time
+budget. The failure message diffs the queries (normalized and grouped)
+against the reference recorded in query_baseline.json, which points straight
+at an N+1 or an added query.
+
+    python manage.py test api                               # check
+    PERF_BUDGET_RECORD=1 python manage.py test api          # rewrite the reference
+    PERF_BUDGET_TIME_FACTOR=3 python manage.py test api     # slow machine
+
+ImportTimeBudgetTests likewise bounds the cold start (importing the routes).
+
+A budget exceeded on purpose is raised in BUDGETS, in the same commit as the
+change that justifies it, with the reference re-recorded.
+"""
+import difflib
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .. import archives, counters, urls as api_urls
+from ..authentication import issue_token
+from ..models import Activite, Affirmation, Categorie, Debrief, Reponse, Users
+from . import TEST_CACHES
+
+BASELINE_PATH = Path(__file__).with_name('query_baseline.json')
+RECORD = os.environ.get('PERF_BUDGET_RECORD') == '1'
+TIME_FACTOR = float(os.environ.get('PERF_BUDGET_TIME_FACTOR', 1))
+
+PASSWORD = 'motdepasse-test'
+CODE = 'PERF01'
+CODE_BROUILLON = 'PERF02'
+CODE_ARCHIVE = 'PERF04'
+
+# Data volumes: one class answering one activity, plus the shared bank
+ETUDIANTS = 30
+AFFIRMATIONS_ACTIVITE = 15
+AFFIRMATIONS_BANQUE = 200
+DEBRIEFS = 40
+
+
+@dataclass(frozen=True)
+class Budget:
+    """
+    One request and its limits. `kwargs`, `params` and `data` are functions
+    of the test case (to refer to the created objects) or fixed values;
+    `role` is 'encadrant', 'etudiant', 'admin', None or 'jeton' (the student
+    authenticated by CODE's activity token).
+    """
+    route: str
+    queries: int
+    ms: float
+    method: str = 'get'
+    role: str = 'encadrant'
+    status: int = 200
+    kwargs: object = None
+    params: object = None
+    data: object = None
+    label: str = ''
+
+    @property
+    def key(self):
+        return ':'.join(filter(None, (self.route, self.method, self.role or 'anonyme', self.label)))
+
+
+BUDGETS = [
+    # Authentication
+    Budget('encadrant_login_alias', 10, 150, method='post', role=None,
+           data={'email': 'encadrant0@perf.test', 'password': PASSWORD}),
+    Budget('login_encadrant', 10, 150, method='post', role=None,
+           data={'email': 'encadrant0@perf.test', 'password': PASSWORD}),
+    Budget('login_activite', 11, 150, method='post', role=None,
+           data={'email': 'etudiant0@perf.test', 'code_activite': CODE}),
+    Budget('login_activite', 3, 150, method='post', role=None, label='jeton',
+           data={'email': 'etudiant0@perf.test', 'code_activite': CODE, 'session': False}),
+    Budget('logout', 4, 100, method='post'),
+
+    # Activities
+    Budget('activites_list', 6, 200),
+    Budget('activites_list', 5, 200, role='etudiant'),
+    Budget('activites_list', 6, 200, label='since', params={'since': '0'}),
+    Budget('activites_list', 9, 200, method='post', status=201, data=lambda t: {
+        'code_activite': 'PERF03', 'titre': 'Nouvelle activité',
+        'etudiants_autorises': [e.pk for e in t.etudiants[:10]],
+        'affirmations_associes': [a.pk for a in t.affirmations[:5]],
+    }),
+    Budget('activite_detail', 6, 200, kwargs={'pk': CODE}),
+    Budget('activite_detail', 6, 200, role='etudiant', kwargs={'pk': CODE}),
+    Budget('activite_detail', 4, 200, role='jeton', kwargs={'pk': CODE}),
+    # Reading an archived activity leaves it archived (restoring is activite_restore)
+    Budget('activite_detail', 6, 200, label='archivee', kwargs={'pk': CODE_ARCHIVE}),
+    Budget('activite_statistiques', 7, 150, kwargs={'pk': CODE}),
+    Budget('activite_statistiques', 4, 100, label='archivee', kwargs={'pk': CODE_ARCHIVE}),
+    # Incremental roster / affirmation changes (only the through rows involved)
+    Budget('activite_etudiants', 9, 100, method='post', kwargs={'pk': CODE_BROUILLON},
+           data=lambda t: {'ids': [e.pk for e in t.etudiants[10:15]]}),
+    Budget('activite_etudiants', 9, 100, method='delete', kwargs={'pk': CODE},
+           data=lambda t: {'ids': [e.pk for e in t.etudiants[:5]]}),
+    Budget('activite_affirmations', 9, 100, method='post', kwargs={'pk': CODE},
+           data=lambda t: {'ids': [a.pk for a in t.affirmations[100:105]]}),
+    Budget('activite_affirmations', 8, 100, method='delete', kwargs={'pk': CODE},
+           data=lambda t: {'ids': [a.pk for a in t.affirmations[:2]]}),
+    Budget('activite_cloner', 15, 200, method='post', status=201, kwargs={'pk': CODE},
+           data={'code_activite': 'perf05', 'titre': 'Cardiologie (reprise)'}),
+    Budget('activite_archive', 3, 100, kwargs={'pk': CODE_ARCHIVE}),
+    Budget('activite_archive', 16, 200, method='post', status=201, kwargs={'pk': CODE_BROUILLON}),
+    Budget('activite_restore', 18, 300, method='post', kwargs={'pk': CODE_ARCHIVE}),
+    Budget('activite_progression', 6, 100, kwargs={'pk': CODE}),
+    Budget('activite_demarrage', 4, 100, role='etudiant', kwargs={'pk': CODE}),
+    Budget('activite_demarrage', 3, 100, role='jeton', kwargs={'pk': CODE}),
+
+    # Affirmations
+    Budget('affirmations_list', 4, 300),
+    Budget('affirmations_import', 13, 1000, method='post', status=201, data={
+        'activity_code': CODE,
+        'affirmations': [
+            {'affirmation': f"Le débit cardiaque importé numéro {i} augmente à l'effort.", 'nbr_reponses': 2,
+             'is_correct_vf': bool(i % 2)}
+            for i in range(500)
+        ] + [{'affirmation': 'Ligne invalide sans format.'}],
+    }),
+    Budget('affirmations_search', 4, 100, params={'q': 'tension artérielle'}),
+    Budget('affirmations_similar', 3, 400, params={'texte': 'La tension artérielle baisse pendant le sommeil'}),
+    Budget('affirmation_detail', 4, 100, kwargs=lambda t: {'pk': t.affirmations[0].pk}),
+
+    # Responses
+    Budget('reponses_list', 8, 4000, params={'activity_code': CODE}),
+    Budget('reponses_list', 6, 300, role='etudiant', params={'activity_code': CODE}),
+    Budget('reponses_list', 8, 4000, label='since', params={'activity_code': CODE, 'since': '0'}),
+    Budget('reponses_list', 19, 200, method='post', role='etudiant', data=lambda t: {
+        'activite': CODE, 'affirmation': t.affirmations[1].pk, 'reponse_vf': False, 'justification': 'Modifiée',
+    }),
+    Budget('reponses_list', 13, 200, method='post', role='jeton', data=lambda t: {
+        'activite': CODE, 'affirmation': t.affirmations[1].pk, 'reponse_vf': True, 'justification': 'Par jeton',
+    }),
+    Budget('reponse_detail', 6, 200, role='etudiant', kwargs=lambda t: {'pk': t.reponse.pk}),
+
+    # Async read paths (same payloads as their sync counterparts)
+    Budget('async_activite_detail', 6, 200, kwargs={'pk': CODE}),
+    Budget('async_activite_detail', 5, 200, role='etudiant', kwargs={'pk': CODE}),
+    Budget('async_activite_detail', 4, 200, role='jeton', kwargs={'pk': CODE}),
+    Budget('async_activite_demarrage', 4, 100, role='etudiant', kwargs={'pk': CODE}),
+    Budget('async_activite_demarrage', 3, 100, role='jeton', kwargs={'pk': CODE}),
+    Budget('async_reponses_list', 8, 4000, params={'activity_code': CODE}),
+    Budget('async_reponses_list', 6, 300, role='etudiant', params={'activity_code': CODE}),
+
+    # Debriefs
+    Budget('debriefs_list', 7, 1000),
+    # The created debrief is serialized from the view's instances, without the list's prefetching
+    Budget('debriefs_list', 32, 300, method='post', status=201, data=lambda t: {
+        'reponse_id': t.reponse_sans_debrief.pk, 'feedback': 'Bien argumenté.',
+    }),
+    Budget('debrief_detail', 7, 200, kwargs=lambda t: {'pk': t.debrief.pk}),
+    # Half of the class already debriefed (updated), half not yet (created)
+    Budget('debriefs_lot', 4, 300, method='post', data=lambda t: {'debriefs': [
+        {'reponse_id': reponse.pk, 'feedback': f"Débrief groupé {k}."}
+        for k, reponse in enumerate(t.reponses[DEBRIEFS - ETUDIANTS:DEBRIEFS + ETUDIANTS])
+    ]}),
+
+    # Generation (the LLM is replaced by fake_generate_content / fake_submit)
+    Budget('chatbot', 2, 300, method='post', data={'nombre': 12, 'question': 'Quels sont les effets du sel ?'}),
+    Budget('generate', 2, 300, method='post', data={'number': 5, 'question': 'Quels sont les effets du sel ?'}),
+    Budget('generate_affirmations', 2, 300, method='post', data={'question': 'Quels sont les effets du sel ?'}),
+    Budget('make_harder', 2, 100, method='post', data={
+        'affirmation': 'Le sel fait baisser la tension.', 'explanation': 'Il la fait monter.',
+    }),
+    Budget('llm_status', 2, 100, role='admin'),
+    Budget('metrics', 2, 100, role='admin'),
+
+    # Misc
+    Budget('email_to_id_resolver', 3, 100, method='post', data={
+        'emails': [f'etudiant{i}@perf.test' for i in range(ETUDIANTS)],
+    }),
+    Budget('categories_list', 3, 100),
+    Budget('auth-test', 2, 100, method='post', role=None,
+           data={'email': 'encadrant0@perf.test', 'password': PASSWORD}),
+]
+
+
+# --- Query capture and reporting ---
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"IN \(\?(?:, \?)*\)")
+# bulk_update(): one WHEN per row
+_CASE_LISTS = re.compile(r"(WHEN \([^()]*\) THEN \? )(?:WHEN \([^()]*\) THEN \? )+")
+
+
+def normalize_sql(sql):
+    """Replaces literals with '?' so that two runs of the same N+1 query group together."""
+    return _CASE_LISTS.sub(r'\1... ', _IN_LISTS.sub('IN (...)', _LITERALS.sub('?', sql)))
+
+
+def group_queries(captured):
+    """Lines "<count> x <normalized query>", sorted by query."""
+    counts = Counter(normalize_sql(query['sql']) for query in captured)
+    return [f"{count:4d} x {sql}" for sql, count in sorted(counts.items())]
+
+
+def load_baseline():
+    if BASELINE_PATH.exists():
+        return json.loads(BASELINE_PATH.read_text(encoding='utf-8'))
+    return {}
+
+
+def queries_report(key, grouped, baseline):
+    reference = baseline.get(key)
+    if reference is None:
+        return "Pas de référence enregistrée ; requêtes exécutées :\n" + '\n'.join(grouped)
+    diff = list(difflib.unified_diff(reference['queries'], grouped, 'reference', 'actuel', lineterm='', n=0))
+    if not diff:
+        return "Requêtes identiques à la référence (budget abaissé ?) :\n" + '\n'.join(grouped)
+    return "Diff des requêtes par rapport à la référence :\n" + '\n'.join(diff)
+
+
+# --- Fake LLM ---
+
+class FakeLLMResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+def _unique_sentence():
+    # Distinct random words, so the generation dedup keeps every statement
+    return ' '.join(uuid.uuid4().hex[i:i + 6] for i in range(0, 30, 6)) + '.'
+
+
+def fake_generate_content(model, prompt, operation='gemini', **kwargs):
+    """Instant responses in the format each operation of api/generation.py expects."""
+    if operation == 'generate_affirmations':
+        count = int(re.search(r'exactement (\d+)', prompt).group(1))
+        return FakeLLMResponse(json.dumps({'affirmations': [
+            {'affirmation': _unique_sentence(), 'is_correct_vf': False, 'explication': 'Explication.'}
+            for _ in range(count)
+        ]}))
+    if operation == 'make_harder':
+        return FakeLLMResponse("Affirmation améliorée : Plus difficile.\nExplication améliorée : Plus précise.")
+    if operation == 'make_multiple_harder':
+        return FakeLLMResponse(json.dumps({'statements': []}))
+    return FakeLLMResponse("Une affirmation plus difficile.")
+
+
+def fake_submit(model, prompt, operation='gemini', **kwargs):
+    response = fake_generate_content(model, prompt, operation, **kwargs)
+    return mock.Mock(result=lambda: response)
+
+
+# --- Seed data ---
+
+def seed():
+    """A class of ETUDIANTS students who answered a whole published activity."""
+    categories = Categorie.objects.bulk_create([Categorie(nom=f'Catégorie {i}') for i in range(5)])
+    encadrants = [
+        Users.objects.create_user(username=f'encadrant{i}', email=f'encadrant{i}@perf.test',
+                                  password=PASSWORD, role='encadrant')
+        for i in range(2)
+    ]
+    admin = Users.objects.create_superuser(username='admin', email='admin@perf.test', password=PASSWORD,
+                                           role='encadrant')
+    etudiants = Users.objects.bulk_create([
+        Users(username=f'etudiant{i}', email=f'etudiant{i}@perf.test', role='etudiant')
+        for i in range(ETUDIANTS)
+    ])
+    affirmations = Affirmation.objects.bulk_create([
+        Affirmation(
+            affirmation=f"La tension artérielle {'baisse' if i % 2 else 'monte'} après l'effort numéro {i}.",
+            explication=f"Explication détaillée de l'affirmation {i}.",
+            nbr_reponses=4 if i % 3 == 0 else 2,
+            reponse_correcte_qcm=1 if i % 3 == 0 else None,
+            is_correct_vf=None if i % 3 == 0 else bool(i % 2),
+            encadrant=encadrants[i % 2],
+        )
+        for i in range(AFFIRMATIONS_BANQUE)
+    ])
+    activite = Activite.objects.create(
+        code_activite=CODE, titre='Cardiologie', description='Activité de référence',
+        encadrant=encadrants[0], destine_a=categories[0], is_published=True,
+    )
+    brouillon = Activite.objects.create(
+        code_activite=CODE_BROUILLON, titre='Brouillon', encadrant=encadrants[0], destine_a=categories[1],
+    )
+    activite.etudiants_autorises.set(etudiants)
+    activite.affirmations_associes.set(affirmations[:AFFIRMATIONS_ACTIVITE])
+    brouillon.etudiants_autorises.set(etudiants[:10])
+    brouillon.affirmations_associes.set(affirmations[AFFIRMATIONS_ACTIVITE:2 * AFFIRMATIONS_ACTIVITE])
+
+    reponses = Reponse.objects.bulk_create([
+        Reponse(
+            activite=activite, affirmation=affirmation, etudiant=etudiant,
+            reponse_vf=None if affirmation.nbr_reponses == 4 else bool((i + j) % 2),
+            reponse_choisie_qcm=(i + j) % 4 + 1 if affirmation.nbr_reponses == 4 else None,
+            justification=f"Justification de l'étudiant {i}.",
+        )
+        for i, etudiant in enumerate(etudiants)
+        for j, affirmation in enumerate(affirmations[:AFFIRMATIONS_ACTIVITE])
+    ])
+    debriefs = Debrief.objects.bulk_create([
+        Debrief(reponse=reponse, encadrant=encadrants[0], feedback=f"Débrief {k}.")
+        for k, reponse in enumerate(reponses[:DEBRIEFS])
+    ])
+    counters.rebuild(CODE)
+
+    # A cold activity whose responses were moved to an archive file
+    archivee = Activite.objects.create(
+        code_activite=CODE_ARCHIVE, titre='Archivée', encadrant=encadrants[0], destine_a=categories[2],
+    )
+    archivee.etudiants_autorises.set(etudiants)
+    archivee.affirmations_associes.set(affirmations[:AFFIRMATIONS_ACTIVITE])
+    reponses_archivees = Reponse.objects.bulk_create([
+        Reponse(
+            activite=archivee, affirmation=affirmation, etudiant=etudiant,
+            reponse_vf=None if affirmation.nbr_reponses == 4 else bool(i % 2),
+            reponse_choisie_qcm=j % 4 + 1 if affirmation.nbr_reponses == 4 else None,
+            justification=f"Ancienne justification {i}.",
+        )
+        for i, etudiant in enumerate(etudiants)
+        for j, affirmation in enumerate(affirmations[:AFFIRMATIONS_ACTIVITE])
+    ])
+    Debrief.objects.bulk_create([
+        Debrief(reponse=reponse, encadrant=encadrants[0], feedback="Ancien débrief.")
+        for reponse in reponses_archivees[:DEBRIEFS]
+    ])
+    counters.rebuild(CODE_ARCHIVE)
+    archives.archiver(archivee)
+    return {
+        'encadrant': encadrants[0], 'admin': admin, 'etudiants': etudiants, 'affirmations': affirmations,
+        'activite': activite, 'reponses': reponses, 'reponse': reponses[0], 'reponse_sans_debrief': reponses[DEBRIEFS],
+        'debrief': debriefs[0],
+    }
+
+
+def _resolve(value, test):
+    return value(test) if callable(value) else value
+
+
+BUDGET_SETTINGS = {
+    'PASSWORD_HASHERS': ['django.contrib.auth.hashers.MD5PasswordHasher'],
+    'GENERATION_POOL': {'ENABLED': False},
+    'ARCHIVES': {'DIR': os.path.join(tempfile.gettempdir(), f'api-archives-{uuid.uuid4().hex}')},
+    'CACHES': TEST_CACHES,
+}
+
+
+@override_settings(**BUDGET_SETTINGS)
+class EndpointBudgetTests(TestCase):
+    """One test per BUDGETS entry (generated below)."""
+
+    recorded = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        for name, value in seed().items():
+            setattr(cls, name, value)
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.baseline = load_baseline()
+        cls.llm_patches = [
+            mock.patch('api.llm.generate_content', side_effect=fake_generate_content),
+            mock.patch('api.llm.submit', side_effect=fake_submit),
+        ]
+        for patch in cls.llm_patches:
+            patch.start()
+        # First request pays for lazy imports (renderers, parsers...): keep it out of the timings
+        client = APIClient()
+        client.force_login(cls.encadrant)
+        client.get(reverse('categories_list'))
+
+    @classmethod
+    def tearDownClass(cls):
+        for patch in cls.llm_patches:
+            patch.stop()
+        super().tearDownClass()
+        if RECORD and cls.recorded:
+            baseline = load_baseline()
+            baseline.update(cls.recorded)
+            BASELINE_PATH.write_text(json.dumps(baseline, indent=1, sort_keys=True, ensure_ascii=False) + '\n',
+                                     encoding='utf-8')
+
+    def setUp(self):
+        cache.clear()
+
+    def client_for(self, role):
+        client = APIClient()
+        user = {'encadrant': self.encadrant, 'admin': self.admin}.get(role)
+        if role == 'etudiant':
+            user = self.etudiants[0]
+        if user is not None:
+            client.force_login(user)
+        if role == 'jeton':
+            client.credentials(HTTP_AUTHORIZATION=f'Activite {issue_token(self.etudiants[0], CODE)}')
+        return client
+
+    def check_budget(self, budget):
+        client = self.client_for(budget.role)
+        url = reverse(budget.route, kwargs=_resolve(budget.kwargs, self))
+        params = _resolve(budget.params, self)
+        if params:
+            url += '?' + '&'.join(f'{k}={v}' for k, v in params.items())
+        data = _resolve(budget.data, self)
+
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            if budget.method == 'get':
+                response = client.get(url)
+            else:
+                response = getattr(client, budget.method)(url, data, format='json')
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+        self.assertEqual(response.status_code, budget.status,
+                         f"{budget.key} : statut {response.status_code} ({getattr(response, 'data', '')})")
+        grouped = group_queries(captured.captured_queries)
+        if RECORD:
+            self.recorded[budget.key] = {'count': len(captured), 'ms': round(elapsed_ms, 1), 'queries': grouped}
+        self.assertLessEqual(
+            len(captured), budget.queries,
+            f"{budget.key} : {len(captured)} requêtes SQL pour un budget de {budget.queries}.\n"
+            + queries_report(budget.key, grouped, self.baseline)
+        )
+        if TIME_FACTOR:
+            self.assertLessEqual(
+                elapsed_ms, budget.ms * TIME_FACTOR,
+                f"{budget.key} : {elapsed_ms:.0f} ms pour un budget de {budget.ms * TIME_FACTOR:.0f} ms."
+            )
+
+    def test_every_route_has_a_budget(self):
+        routes = {pattern.name for pattern in api_urls.urlpatterns}
+        covered = {budget.route for budget in BUDGETS} | {'activite_flux'}
+        self.assertEqual(routes - covered, set(), "Routes sans budget dans api/tests/test_budgets.py")
+        self.assertEqual(covered - routes, set(), "Budgets pour des routes inexistantes")
+
+    def test_budget_keys_are_unique(self):
+        keys = [budget.key for budget in BUDGETS]
+        self.assertEqual(len(keys), len(set(keys)))
+
+
+def _make_test(budget):
+    def test(self):
+        self.check_budget(budget)
+    test.__doc__ = f"Budget {budget.key} : {budget.queries} requêtes, {budget.ms} ms."
+    return test
+
+
+for _budget in BUDGETS:
+    setattr(EndpointBudgetTests, 'test_budget_' + re.sub(r'\W', '_', _budget.key), _make_test(_budget))
+
+
+@override_settings(**BUDGET_SETTINGS, LIVE_FEED={'SETTLE': 0, 'LONG_POLL_TIMEOUT': 0.1})
+class LiveFeedBudgetTests(TransactionTestCase):
+    """
+    The feed reads the database from a separate thread (sync_to_async not
+    bound to the thread): it needs committed data, hence a
+    TransactionTestCase. Only the view thread's queries (session,
+    permissions) are counted.
+    """
+    QUERIES = 5
+    MS = 500
+
+    def setUp(self):
+        data = seed()
+        self.client = APIClient()
+        self.client.force_login(data['encadrant'])
+
+    def test_budget_activite_flux_poll(self):
+        url = reverse('activite_flux', kwargs={'pk': CODE}) + '?mode=poll'
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = self.client.get(url)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json.loads(response.content)['reponses']), ETUDIANTS * AFFIRMATIONS_ACTIVITE)
+        self.assertLessEqual(len(captured), self.QUERIES, '\n'.join(group_queries(captured.captured_queries)))
+        if TIME_FACTOR:
+            self.assertLessEqual(elapsed_ms, self.MS * TIME_FACTOR)
+
+
+class ImportTimeBudgetTests(SimpleTestCase):
+    """
+    Cold start of the API (`python -X importtime`, new process): importing
+    the routes must load no module of HEAVY_MODULES (the Gemini SDK is
+    imported on the first generation, see generation.py) and stay under MS
+    milliseconds after django.setup().
+    """
+    MS = 250
+    HEAVY_MODULES = ('google.generativeai', 'google.api_core', 'google.protobuf', 'grpc')
+    CODE = 'import django; django.setup(); import api.urls'
+
+    def test_budget_import_api_urls(self):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', self.CODE],
+            cwd=Path(__file__).resolve().parents[2], capture_output=True, text=True,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'apiBack.settings')},
+        )
+        self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+        # "import time: self [us] | cumulative | module", nesting shown by indentation
+        timings = {}
+        for match in re.finditer(r'^import time:\s+\d+ \|\s+(\d+) \| ( *)(\S+)$', result.stderr, re.M):
+            timings.setdefault(match.group(3), (int(match.group(1)) / 1000, len(match.group(2))))
+
+        heavy = [root for root in self.HEAVY_MODULES if any(name.split('.')[:root.count('.') + 1] == root.split('.')
+                                                             for name in timings)]
+        self.assertEqual(heavy, [], "Modules lourds importés au démarrage.")
+        if TIME_FACTOR:
+            top = sorted(((ms, name) for name, (ms, depth) in timings.items() if depth <= 4 and name != 'api.urls'),
+                         reverse=True)[:10]
+            self.assertLessEqual(
+                timings['api.urls'][0], self.MS * TIME_FACTOR,
+                f"import api.urls : {timings['api.urls'][0]:.0f} ms pour un budget de {self.MS * TIME_FACTOR:.0f} ms.\n"
+                + '\n'.join(f"{ms:8.1f} ms  {name}" for ms, name in top)
+            )
@@ -0,0 +1,80 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.paginator import EmptyPage
+from django.test import TestCase, override_settings
+
+from ..changelist import EstimatedCountPaginator
+from ..models import Categorie, Reponse, Users
+from . import TEST_CACHES, small_class
+
+
+@override_settings(CACHES=TEST_CACHES)
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Categorie.objects.bulk_create([Categorie(nom=f'Catégorie {i}') for i in range(5)])
+
+    def paginator(self, estimate):
+        patcher = mock.patch('api.changelist.estimated_count', return_value=estimate)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return EstimatedCountPaginator(Categorie.objects.order_by('id'), 2)
+
+    def test_exact_count_without_estimate_or_when_filtered(self):
+        self.assertEqual(self.paginator(None).count, 5)
+        self.assertEqual(EstimatedCountPaginator(Categorie.objects.filter(nom__endswith='4'), 2).count, 1)
+
+    def test_overestimate_is_clamped_to_the_last_page(self):
+        paginator = self.paginator(1_000_000)
+        self.assertEqual(paginator.num_pages, 500_000)
+        page = paginator.page(40)
+        self.assertEqual((page.number, len(page.object_list)), (3, 1))
+        self.assertEqual((paginator.count, paginator.num_pages), (5, 3))
+
+    def test_underestimate_reaches_the_real_pages(self):
+        with mock.patch('api.changelist.EXACT_COUNT_BELOW', 0):
+            paginator = self.paginator(2)
+            self.assertEqual(paginator.page(3).number, 3)
+            self.assertEqual(paginator.count, 5)
+            with self.assertRaises(EmptyPage):
+                paginator.page(0)
+
+    def test_large_table_count_is_cached_without_engine_estimate(self):
+        self.addCleanup(cache.clear)
+        with mock.patch('api.changelist.EXACT_COUNT_BELOW', 3):
+            self.assertEqual(self.paginator(None).count, 5)
+            Categorie.objects.filter(nom__endswith='4').delete()
+            paginator = EstimatedCountPaginator(Categorie.objects.order_by('id'), 2)
+            with self.assertNumQueries(0):
+                self.assertEqual(paginator.count, 5)
+            page = paginator.page(3)
+            self.assertEqual((page.number, paginator.count), (2, 4))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ChangelistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        data = small_class()
+        for etudiant in data['etudiants']:
+            Reponse.objects.create(activite=data['activite'], affirmation=data['vf'], etudiant=etudiant,
+                                   reponse_vf=True)
+        cls.admin = Users.objects.create_superuser('admin', 'admin@test.fr', 'motdepasse', role='encadrant')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_page_past_a_stale_estimate_is_served(self):
+        with mock.patch('api.changelist.estimated_count', return_value=1_000_000), \
+                mock.patch('api.changelist.EXACT_COUNT_BELOW', 0):
+            response = self.client.get('/admin/api/reponse/?p=50')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['cl'].result_list), 2)
+
+    def test_autocomplete_filter_narrows_the_list(self):
+        reponse = Reponse.objects.first()
+        response = self.client.get(f'/admin/api/reponse/?etudiant__id__exact={reponse.etudiant_id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row.pk for row in response.context['cl'].result_list], [reponse.pk])
+        self.assertContains(response, 'id="filtre_etudiant"')
@@ -0,0 +1,49 @@
+from django.test import TestCase, override_settings
+
+from .. import counters
+from ..models import CompteurEtudiant, CompteurReponse, Reponse
+from . import TEST_CACHES, small_class
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CountersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        data = small_class()
+        cls.activite, cls.vf, cls.qcm = data['activite'], data['vf'], data['qcm']
+        cls.etudiants = data['etudiants']
+
+    def totals(self):
+        return (
+            dict(CompteurReponse.objects.filter(total__gt=0).values_list('choix', 'total')),
+            dict(CompteurEtudiant.objects.values_list('etudiant_id', 'total')),
+        )
+
+    def test_signals_keep_counters_in_step(self):
+        reponse = Reponse.objects.create(activite=self.activite, affirmation=self.vf, etudiant=self.etudiants[0],
+                                         reponse_vf=True)
+        Reponse.objects.create(activite=self.activite, affirmation=self.qcm, etudiant=self.etudiants[0],
+                               reponse_choisie_qcm=3)
+        self.assertEqual(self.totals(), ({'vrai': 1, '3': 1}, {self.etudiants[0].pk: 2}))
+
+        reponse.reponse_vf = False
+        reponse.save()
+        self.assertEqual(self.totals()[0], {'faux': 1, '3': 1})
+        reponse.delete()
+        self.assertEqual(self.totals(), ({'3': 1}, {self.etudiants[0].pk: 1}))
+        self.assertEqual(counters.verify(self.activite.pk), [])
+
+    def test_verify_reports_and_rebuild_repairs_bulk_writes(self):
+        Reponse.objects.create(activite=self.activite, affirmation=self.vf, etudiant=self.etudiants[0],
+                               reponse_vf=True)
+        # bulk_create sends no signal: the counters miss this answer
+        Reponse.objects.bulk_create([
+            Reponse(activite=self.activite, affirmation=self.vf, etudiant=self.etudiants[1], reponse_vf=True),
+        ])
+        differences = counters.verify(self.activite.pk)
+        self.assertIn(('reponse', (self.activite.pk, self.vf.pk, 'vrai'), 1, 2), differences)
+        self.assertIn(('etudiant', (self.activite.pk, self.etudiants[1].pk), 0, 1), differences)
+
+        self.assertEqual(counters.rebuild(self.activite.pk), (1, 2))
+        self.assertEqual(counters.verify(self.activite.pk), [])
+        self.assertEqual(self.totals()[0], {'vrai': 2})
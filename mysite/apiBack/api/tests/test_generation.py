@@ -0,0 +1,59 @@
+import itertools
+import json
+import re
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from .. import generation, llm
+from ..similarity import SimilarityIndex
+
+
+class FakeAffirmationsModel:
+    """Answers with as many affirmations as the prompt asks for and measures concurrency."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = self.max_active = 0
+        self.sizes = []
+        self.ids = itertools.count()
+
+    def generate_content(self, prompt, **kwargs):
+        count = int(re.search(r'exactement (\d+) affirmations', prompt).group(1))
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.sizes.append(count)
+            ids = [next(self.ids) for _ in range(count)]
+        time.sleep(0.01)
+        with self.lock:
+            self.active -= 1
+        affirmations = [{'affirmation': ' '.join(f'mot{i}x{k}' for k in range(6)), 'explication': '.'} for i in ids]
+        return mock.Mock(text=json.dumps({'affirmations': affirmations}))
+
+
+@override_settings(LLM_RESILIENCE={'MAX_WORKERS': 8, 'MAX_FANOUT': 2, 'HEDGE_PERCENTILE': None})
+class GenerateManyTests(SimpleTestCase):
+    def setUp(self):
+        llm.reset()
+        self.addCleanup(llm.reset)
+        self.model = FakeAffirmationsModel()
+        for target, value in (('_affirmations_model', lambda: self.model), ('get_corpus_index', SimilarityIndex)):
+            patcher = mock.patch.object(generation, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_split_chunks_never_exceeds_chunk_size(self):
+        for number in (1, 10, 11, 37, generation.MAX_AFFIRMATIONS):
+            chunks = generation._split_chunks(number)
+            self.assertEqual(sum(chunks), number)
+            self.assertLessEqual(max(chunks), generation.CHUNK_SIZE)
+            self.assertLessEqual(max(chunks) - min(chunks), 1)
+
+    def test_large_requests_run_in_waves_of_max_fanout(self):
+        affirmations, errors = generation.generate_many_false_affirmations('Question ?', 45)
+        self.assertEqual((len(affirmations), errors), (45, []))
+        self.assertEqual(sorted(self.model.sizes), [9] * 5)
+        self.assertLessEqual(self.model.max_active, 2)
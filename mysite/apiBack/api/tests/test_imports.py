@@ -0,0 +1,41 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import Activite
+from . import TEST_CACHES, small_class
+
+
+@override_settings(CACHES=TEST_CACHES)
+class AffirmationImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        data = small_class(published=False)
+        cls.activite, cls.encadrant = data['activite'], data['encadrant']
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_login(self.encadrant)
+
+    def test_options_come_from_the_body(self):
+        before = Activite.objects.get(pk=self.activite.pk).updated_at
+        texte = 'La trachée conduit l air inspiré jusqu aux bronches souches.'
+        response = self.client.post(reverse('affirmations_import'), {
+            'activity_code': self.activite.pk,
+            'rejeter_doublons': True,
+            'affirmations': [{'affirmation': texte, 'nbr_reponses': 2, 'is_correct_vf': True}] * 2,
+        }, format='json')
+        self.assertEqual((response.status_code, response.data['crees']), (201, 1))
+        self.assertEqual([erreur['ligne'] for erreur in response.data['erreurs']], [2])
+        # The m2m_changed receivers ran for the new links
+        self.assertIn(response.data['ids'][0], self.activite.affirmations_associes.values_list('pk', flat=True))
+        self.assertGreater(Activite.objects.get(pk=self.activite.pk).updated_at, before)
+
+    def test_csv_body_takes_options_from_the_query_string(self):
+        url = f"{reverse('affirmations_import')}?activity_code={self.activite.pk}&rejeter_doublons=1"
+        body = ('affirmation;nbr_reponses;is_correct_vf\nLe cœur a quatre cavités.;2;vrai\n'
+                'Le pancréas sécrète l insuline dans le sang.;2;vrai\n')
+        response = self.client.post(url, body, content_type='text/csv')
+        self.assertEqual((response.status_code, response.data['crees'], response.data['activite']),
+                         (201, 1, self.activite.pk))
+        self.assertEqual([erreur['ligne'] for erreur in response.data['erreurs']], [2])
@@ -0,0 +1,105 @@
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from .. import llm
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch('api.llm.time.monotonic', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = llm.CircuitBreaker(window=4, min_calls=4, error_rate=0.5, cooldown=30)
+
+    def trip(self):
+        for _ in range(4):
+            self.breaker.record_failure()
+
+    def test_stays_closed_below_min_calls(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, llm.CircuitBreaker.CLOSED)
+        self.assertTrue(self.breaker.allow())
+
+    def test_opens_at_error_rate(self):
+        self.breaker.record_success()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, llm.CircuitBreaker.CLOSED)
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, llm.CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_half_open_after_cooldown_allows_one_probe(self):
+        self.trip()
+        self.now += 29
+        self.assertFalse(self.breaker.allow())
+        self.now += 1
+        self.assertEqual(self.breaker.state, llm.CircuitBreaker.HALF_OPEN)
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+
+    def test_probe_success_closes(self):
+        self.trip()
+        self.now += 30
+        self.breaker.allow()
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, llm.CircuitBreaker.CLOSED)
+        self.assertEqual(self.breaker.error_rate_observed(), 0)
+
+    def test_probe_failure_reopens(self):
+        self.trip()
+        self.now += 30
+        self.breaker.allow()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, llm.CircuitBreaker.OPEN)
+        self.now += 29
+        self.assertFalse(self.breaker.allow())
+
+    def test_release_frees_the_probe(self):
+        self.trip()
+        self.now += 30
+        self.assertTrue(self.breaker.allow())
+        self.breaker.release()
+        self.assertTrue(self.breaker.allow())
+
+
+class BlockingModel:
+    """Fake model whose calls wait for `release`."""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def generate_content(self, prompt, **kwargs):
+        self.release.wait(5)
+        return 'ok'
+
+
+@override_settings(LLM_RESILIENCE={'MAX_WORKERS': 1, 'QUEUE_TIMEOUT': 0.05, 'TIMEOUT': 0.05,
+                                   'BREAKER_MIN_CALLS': 1, 'HEDGE_PERCENTILE': None})
+class GenerateContentTests(SimpleTestCase):
+    def setUp(self):
+        llm.reset()
+        self.addCleanup(llm.reset)
+        self.model = BlockingModel()
+        self.addCleanup(self.model.release.set)
+
+    def test_timeout_counts_against_the_breaker(self):
+        with self.assertRaises(llm.LLMTimeoutError):
+            llm.generate_content(self.model, 'prompt')
+        self.assertEqual(llm.snapshot()['operations']['gemini']['timeouts'], 1)
+        self.assertEqual(llm.get_breaker().state, llm.CircuitBreaker.OPEN)
+
+    def test_saturated_pool_is_rejected_without_tripping(self):
+        busy = llm.submit(self.model, 'occupe le seul thread', timeout=5)
+        with self.assertRaises(llm.LLMUnavailableError):
+            llm.generate_content(self.model, 'en file')
+        self.model.release.set()
+        self.assertEqual(busy.result(), 'ok')
+
+        stats = llm.snapshot()['operations']['gemini']
+        self.assertEqual((stats['rejected'], stats['timeouts'], stats['successes']), (1, 0, 1))
+        self.assertEqual(llm.get_breaker().state, llm.CircuitBreaker.CLOSED)
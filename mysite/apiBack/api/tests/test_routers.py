@@ -0,0 +1,91 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from middleware.replica import StickyPrimaryMiddleware
+
+from ..models import Activite, Reponse
+from . import TEST_CACHES, small_class
+
+REPLICA = 'replica_test'
+COOKIE = 'lectures_primaire'
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Two real databases: the replica is a SQLite copy of the primary taken by
+    `replicate()`, so it lags behind every later write. Not a TestCase: reads
+    inside a transaction on `default` never go to a replica. The alias is
+    declared once the test databases exist: the runner must not create it.
+    """
+    databases = {DEFAULT_DB_ALIAS}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.mkdtemp()
+        path = os.path.join(cls.directory, 'replica.sqlite3')
+        connections.settings[REPLICA] = {**connections.settings[DEFAULT_DB_ALIAS], 'NAME': path}
+        cls.databases = {DEFAULT_DB_ALIAS, REPLICA}
+        cls.settings = override_settings(CACHES=TEST_CACHES, READ_REPLICAS={'ALIASES': [REPLICA]})
+        cls.settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+        shutil.rmtree(cls.directory, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        data = small_class(published=False)
+        self.activite = data['activite']
+        Reponse.objects.create(activite=self.activite, affirmation=data['vf'], etudiant=data['etudiants'][0],
+                               reponse_vf=True)
+        self.client = APIClient()
+        self.client.force_login(data['encadrant'])
+        self.url = reverse('activite_detail', kwargs={'pk': self.activite.pk})
+        self.replicate()
+
+    def replicate(self):
+        connections[REPLICA].close()
+        primary = connections[DEFAULT_DB_ALIAS]
+        primary.ensure_connection()
+        target = sqlite3.connect(connections.settings[REPLICA]['NAME'])
+        try:
+            primary.connection.backup(target)
+        finally:
+            target.close()
+
+    def test_reads_go_to_the_replica_until_the_client_writes(self):
+        Activite.objects.filter(pk=self.activite.pk).update(titre='Titre modifié')
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['titre'], 'Activité de test')
+        self.assertNotIn(COOKIE, response.cookies)
+
+        self.client.cookies[COOKIE] = '1'
+        self.assertEqual(self.client.get(self.url).data['titre'], 'Titre modifié')
+
+    def test_any_request_that_wrote_is_sticky(self):
+        def view(write):
+            def get_response(request):
+                if write:
+                    Activite.objects.filter(pk=self.activite.pk).update(titre='Titre modifié')
+                else:
+                    Activite.objects.get(pk=self.activite.pk)
+                return HttpResponse()
+            return StickyPrimaryMiddleware(get_response)
+
+        request = RequestFactory().get(self.url)
+        self.assertNotIn(COOKIE, view(write=False)(request).cookies)
+        self.assertIn(COOKIE, view(write=True)(request).cookies)
@@ -0,0 +1,46 @@
+from django.contrib import admin
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import Affirmation, Users
+from . import TEST_CACHES
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SearchIndexTests(TestCase):
+    """Runs on the migrated test DB: the search index must follow ORM writes through the triggers."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.encadrant = Users.objects.create_user('enc-search', 'enc-search@test.fr', 'motdepasse', role='encadrant')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_login(self.encadrant)
+
+    def api_ids(self, query):
+        response = self.client.get(reverse('affirmations_search'), {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def admin_ids(self, query):
+        model_admin = admin.site._registry[Affirmation]
+        request = RequestFactory().get('/admin/api/affirmation/', {'q': query})
+        queryset, _ = model_admin.get_search_results(request, Affirmation.objects.all(), query)
+        return list(queryset.values_list('pk', flat=True))
+
+    def test_created_edited_and_deleted_rows_are_searchable(self):
+        affirmation = Affirmation.objects.create(affirmation='La pénicilline est un antibiotique.', nbr_reponses=2)
+        self.assertEqual(self.api_ids('penicilline'), [affirmation.pk])
+        self.assertEqual(self.admin_ids('pénicilline'), [affirmation.pk])
+
+        affirmation.affirmation = "L'insuline est sécrétée par le pancréas."
+        affirmation.save()
+        self.assertEqual(self.api_ids('pénicilline'), [])
+        self.assertEqual(self.api_ids('insuline'), [affirmation.pk])
+        self.assertEqual(self.admin_ids('pancréas'), [affirmation.pk])
+
+        affirmation.delete()
+        self.assertEqual(self.api_ids('insuline'), [])
+        self.assertEqual(self.admin_ids('insuline'), [])
@@ -0,0 +1,71 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from ..models import Affirmation, Suppression
+from ..similarity import CorpusIndex, SimilarityIndex
+from . import TEST_CACHES
+
+COEUR = 'Le cœur humain possède quatre cavités distinctes et deux valves principales.'
+FOIE = 'Le foie produit la bile qui est stockée dans la vésicule biliaire.'
+REIN = 'Les reins filtrent le sang et produisent l urine en continu.'
+
+
+class SimilarityIndexTests(SimpleTestCase):
+    def test_add_replace_and_remove(self):
+        index = SimilarityIndex()
+        index.add(1, COEUR)
+        index.add(2, FOIE)
+        self.assertEqual(index.query(COEUR.upper() + ' !')[0], (1, 1.0))
+
+        index.add(1, REIN)  # same id, new text
+        self.assertEqual(index.query(COEUR), [])
+        self.assertEqual([doc_id for doc_id, _ in index.query(REIN)], [1])
+
+        index.remove(2)
+        self.assertEqual((index.query(FOIE), len(index)), ([], 1))
+
+    def test_exclude_and_empty_text(self):
+        index = SimilarityIndex()
+        index.add(1, COEUR)
+        index.add(2, '...')
+        self.assertEqual(index.query(COEUR, exclude=1), [])
+        self.assertEqual(len(index), 1)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CorpusIndexTests(TestCase):
+    """A fresh CorpusIndex stands for another worker process: the signals only update the global one."""
+
+    def setUp(self):
+        self.coeur = Affirmation.objects.create(affirmation=COEUR, nbr_reponses=2)
+        self.foie = Affirmation.objects.create(affirmation=FOIE, nbr_reponses=2)
+        self.index = CorpusIndex()
+        self.assertEqual(len(self.index.query(COEUR)), 1)
+        patcher = mock.patch.object(CorpusIndex, 'RESYNC_SECONDS', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def matches(self, text):
+        return [doc_id for doc_id, _ in self.index.query(text)]
+
+    def test_resync_picks_up_inserts_edits_and_deletes(self):
+        rein = Affirmation.objects.create(affirmation=REIN, nbr_reponses=2)
+        self.coeur.affirmation = 'Le cœur humain possède deux oreillettes et deux ventricules.'
+        self.coeur.save()
+        foie_id = self.foie.pk
+        self.foie.delete()
+
+        self.assertEqual(self.matches(REIN), [rein.pk])
+        self.assertEqual(self.matches(COEUR), [])
+        self.assertEqual(self.matches(self.coeur.affirmation), [self.coeur.pk])
+        self.assertEqual(self.matches(FOIE), [])
+        self.assertNotIn(foie_id, self.index._docs)
+
+    def test_rebuilds_when_tombstones_may_have_been_purged(self):
+        Affirmation.objects.filter(pk=self.foie.pk).delete()
+        Suppression.objects.filter(modele='affirmation').delete()
+        with mock.patch('api.sync.retention_limit', return_value=timezone.now()):
+            self.assertEqual(self.matches(FOIE), [])
+        self.assertEqual(len(self.index), 1)
@@ -0,0 +1,62 @@
+import datetime
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .. import sync
+from ..models import Reponse, Suppression
+from . import TEST_CACHES, small_class
+
+
+@override_settings(CACHES=TEST_CACHES)
+class DeltaSyncTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        data = small_class()
+        cls.encadrant, cls.activite, cls.vf, cls.qcm = data['encadrant'], data['activite'], data['vf'], data['qcm']
+        cls.etudiant = data['etudiants'][0]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_login(self.encadrant)
+        self.url = reverse('reponses_list')
+
+    def since(self, cursor):
+        return self.client.get(self.url, {'activity_code': self.activite.pk, 'since': cursor})
+
+    def answer(self, affirmation, **values):
+        return Reponse.objects.create(activite=self.activite, affirmation=affirmation, etudiant=self.etudiant,
+                                      **values)
+
+    def test_changes_and_tombstones_since_cursor(self):
+        gardee = self.answer(self.vf, reponse_vf=True)
+        supprimee = self.answer(self.qcm, reponse_choisie_qcm=2)
+        first = self.since('0')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual({row['id'] for row in first.data['results']}, {gardee.pk, supprimee.pk})
+        self.assertEqual(first.data['supprimes'], [])
+
+        # Older than the returned cursor's overlap, so only the later writes are listed
+        Reponse.objects.filter(pk=gardee.pk).update(updated_at=timezone.now() - datetime.timedelta(seconds=5))
+        supprimee_id = str(supprimee.pk)
+        supprimee.delete()
+        self.assertTrue(Suppression.objects.filter(modele='reponse', objet_id=supprimee_id).exists())
+
+        second = self.since(first.data['cursor'])
+        self.assertEqual(second.data['results'], [])
+        self.assertEqual(second.data['supprimes'], [supprimee_id])
+
+    def test_expired_and_invalid_cursors(self):
+        too_old = timezone.now() - datetime.timedelta(days=sync.get_config()['TOMBSTONE_RETENTION_DAYS'] + 1)
+        self.assertEqual(self.since(sync.format_cursor(too_old)).status_code, 410)
+        self.assertEqual(self.since('hier').status_code, 400)
+        self.assertEqual(self.since('-5').status_code, 400)
+
+    def test_purge_drops_tombstones_past_retention(self):
+        sync.record('reponse', 1, activite_code=self.activite.pk)
+        ancienne = Suppression.objects.create(modele='reponse', objet_id='2', activite_code=self.activite.pk)
+        Suppression.objects.filter(pk=ancienne.pk).update(supprime_le=sync.retention_limit() - datetime.timedelta(hours=1))
+        self.assertEqual(sync.purge(), 1)
+        self.assertEqual(list(Suppression.objects.values_list('objet_id', flat=True)), ['1'])
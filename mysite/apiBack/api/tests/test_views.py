@@ -0,0 +1,94 @@
+import re
+
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..authentication import ActivityToken, issue_token
+from ..models import Reponse
+from . import TEST_CACHES, small_class
+
+
+@override_settings(CACHES=TEST_CACHES)
+class DemarrageETagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        data = small_class()
+        cls.activite, cls.vf, cls.etudiant = data['activite'], data['vf'], data['etudiants'][0]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_login(self.etudiant)
+        self.url = reverse('activite_demarrage', kwargs={'pk': self.activite.pk})
+
+    def test_unchanged_activity_gets_304(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first['Cache-Control'], 'private, no-cache')
+        again = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again['ETag'], first['ETag'])
+        self.assertEqual(again.content, b'')
+
+    def test_new_answer_or_edit_changes_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        Reponse.objects.create(activite=self.activite, affirmation=self.vf, etudiant=self.etudiant, reponse_vf=True)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(str(self.vf.pk), response.data['reponses'])
+
+        etag = response['ETag']
+        self.activite.titre = 'Nouveau titre'
+        self.activite.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['activite']['titre'], 'Nouveau titre')
+
+
+@override_settings(CACHES=TEST_CACHES)
+class AuthenticationOrderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        data = small_class()
+        cls.activite, cls.etudiant = data['activite'], data['etudiants'][0]
+
+    def test_anonymous_requests_are_forbidden_not_challenged(self):
+        response = APIClient().get(reverse('debriefs_list'))
+        self.assertEqual(response.status_code, 403)
+        self.assertNotIn('WWW-Authenticate', response)
+
+    def test_token_wins_over_the_session_on_student_views(self):
+        client = APIClient()
+        client.force_login(self.etudiant)
+        client.credentials(HTTP_AUTHORIZATION=f'Activite {issue_token(self.etudiant, self.activite.pk)}')
+        response = client.get(reverse('activite_detail', kwargs={'pk': self.activite.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.wsgi_request.auth, ActivityToken)
+
+
+@override_settings(CACHES=TEST_CACHES, LIVE_FEED={'SETTLE': 0, 'LONG_POLL_TIMEOUT': 0.1})
+class ActiviteFluxWSGITests(TransactionTestCase):
+    """The test client is a WSGI handler: the SSE feed must answer one batch and close."""
+
+    def setUp(self):
+        data = small_class()
+        self.client = APIClient()
+        self.client.force_login(data['encadrant'])
+        self.url = reverse('activite_flux', kwargs={'pk': data['activite'].pk})
+        self.reponse = Reponse.objects.create(activite=data['activite'], affirmation=data['vf'],
+                                              etudiant=data['etudiants'][0], reponse_vf=True)
+
+    def test_sse_degrades_to_a_single_batch(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = response.content.decode()
+        self.assertIn('event: reponses', body)
+        self.assertIn(f'"id": {self.reponse.pk}', body)
+
+        last_event_id = re.search(r'^id: (\S+)$', body, re.M).group(1)
+        response = self.client.get(self.url, HTTP_LAST_EVENT_ID=last_event_id)
+        self.assertEqual(response.content.decode(), 'retry: 0\n\n: keep-alive\n\n')
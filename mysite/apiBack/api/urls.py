@@ -4,8 +4,12 @@ from .views import (
     ActiviteAPIView, AffirmationAPIView, ReponseAPIView, DebriefAPIView,
     Generate, ChatbotAPIView, GeminiGenerateAffirmationsAPIView,
     GeminiMakeHarderAPIView, AuthTestView, EmailToIdResolverView,
-    CategorieAPIView
+    CategorieAPIView, LLMStatusAPIView, AffirmationSimilarAPIView,
+    AffirmationSearchAPIView, ActiviteStatistiquesAPIView, ActiviteProgressionAPIView,
+    ActiviteFluxView, ActiviteDemarrageAPIView, ActiviteArchiveAPIView, ActiviteRestoreAPIView, ActiviteCloneAPIView, ActiviteRelationAPIView,
+    AffirmationImportAPIView, DebriefBulkAPIView, MetricsAPIView,
 )
+from .async_views import AsyncActiviteDetailView, AsyncActiviteDemarrageView, AsyncReponseListView
 
 urlpatterns = [
     # Support legacy path for encadrant login
@@ -19,7 +23,20 @@ urlpatterns = [
     # Activity & Affirmation endpoints
     path('activites/', ActiviteAPIView.as_view(), name='activites_list'),
     path('activites/<str:pk>/', ActiviteAPIView.as_view(), name='activite_detail'),
+    path('activites/<str:pk>/statistiques/', ActiviteStatistiquesAPIView.as_view(), name='activite_statistiques'),
+    path('activites/<str:pk>/progression/', ActiviteProgressionAPIView.as_view(), name='activite_progression'),
+    path('activites/<str:pk>/flux/', ActiviteFluxView.as_view(), name='activite_flux'),
+    path('activites/<str:pk>/etudiants/', ActiviteRelationAPIView.as_view(relation='etudiants'), name='activite_etudiants'),
+    path('activites/<str:pk>/affirmations/', ActiviteRelationAPIView.as_view(relation='affirmations'),
+         name='activite_affirmations'),
+    path('activites/<str:pk>/cloner/', ActiviteCloneAPIView.as_view(), name='activite_cloner'),
+    path('activites/<str:pk>/archive/', ActiviteArchiveAPIView.as_view(), name='activite_archive'),
+    path('activites/<str:pk>/restore/', ActiviteRestoreAPIView.as_view(), name='activite_restore'),
+    path('activites/<str:pk>/demarrage/', ActiviteDemarrageAPIView.as_view(), name='activite_demarrage'),
     path('affirmations/', AffirmationAPIView.as_view(), name='affirmations_list'),
+    path('affirmations/import/', AffirmationImportAPIView.as_view(), name='affirmations_import'),
+    path('affirmations/search/', AffirmationSearchAPIView.as_view(), name='affirmations_search'),
+    path('affirmations/similar/', AffirmationSimilarAPIView.as_view(), name='affirmations_similar'),
     path('affirmations/<int:pk>/', AffirmationAPIView.as_view(), name='affirmation_detail'),
     
     # Student response endpoints
@@ -28,6 +45,7 @@ urlpatterns = [
     
     # Debrief endpoints
     path('debriefs/', DebriefAPIView.as_view(), name='debriefs_list'),
+    path('debriefs/lot/', DebriefBulkAPIView.as_view(), name='debriefs_lot'),
     path('debriefs/<int:pk>/', DebriefAPIView.as_view(), name='debrief_detail'),
     
     # Generation endpoints
@@ -35,6 +53,15 @@ urlpatterns = [
     path('generate/', Generate.as_view(), name='generate'),
     path('gemini/generate-affirmations/', GeminiGenerateAffirmationsAPIView.as_view(), name='generate_affirmations'),
     path('gemini/make-harder/', GeminiMakeHarderAPIView.as_view(), name='make_harder'),
+    path('llm/status/', LLMStatusAPIView.as_view(), name='llm_status'),
+
+    # Async read paths for ASGI workers (see async_views.py)
+    path('async/activites/<str:pk>/', AsyncActiviteDetailView.as_view(), name='async_activite_detail'),
+    path('async/activites/<str:pk>/demarrage/', AsyncActiviteDemarrageView.as_view(), name='async_activite_demarrage'),
+    path('async/reponses/', AsyncReponseListView.as_view(), name='async_reponses_list'),
+
+    # Monitoring
+    path('metrics/', MetricsAPIView.as_view(), name='metrics'),
 
     # User management endpoints
     path('users/get_ids_by_email/', EmailToIdResolverView.as_view(), name='email_to_id_resolver'),
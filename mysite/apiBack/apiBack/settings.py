@@ -32,17 +32,19 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'middleware.metrics.RequestMetrics', # First, so it times the whole stack
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware', # Moved higher
     'django.middleware.common.CommonMiddleware',
     # 'django.middleware.csrf.CsrfViewMiddleware',
     'middleware.disable_csrf.DisableCSRF',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'middleware.cached_user.CachedUserAuthenticationMiddleware', # AuthenticationMiddleware + user kept in session
+    'middleware.replica.StickyPrimaryMiddleware', # Reads stay on the primary shortly after a client writes
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     # 'corsheaders.middleware.CorsMiddleware', # Original position (removed)
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'middleware.static.AsyncWhiteNoiseMiddleware', # WhiteNoise, async-capable so ASGI requests stay on the event loop
 ]
 
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
@@ -80,6 +82,50 @@ CORS_ALLOW_CREDENTIALS = True
 
 SESSION_EXPIRE_AT_BROWSER_CLOSE = False
 
+# Cache shared by every worker process (Django's default LocMemCache is per
+# process): analytics invalidation, student start-up payloads, cached_db
+# sessions. Files under CACHE_DIR on one host; REDIS_URL across hosts.
+if os.environ.get('REDIS_URL'):
+    CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    }}
+else:
+    CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_DIR') or os.path.join(BASE_DIR, 'cache'),
+    }}
+
+# Session storage, selectable with the SESSION_STRATEGY env var:
+# - db: one django_session read per request (Django default)
+# - cached_db: read from the cache, database only on a cache miss (use a
+#   shared cache such as Redis/Memcached with several workers)
+# - signed_cookies: no server-side storage; logout cannot revoke a copied cookie
+# `manage.py bench_sessions` compares their per-request queries, and
+# `manage.py purger_sessions` deletes expired rows of the database modes.
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_STRATEGY = os.environ.get('SESSION_STRATEGY', 'db')
+SESSION_ENGINE = SESSION_ENGINES[SESSION_STRATEGY]
+
+# Roles whose user is kept in the session for TTL seconds instead of being
+# reloaded on each request, and whose last_login is written at most every
+# LAST_LOGIN_RESOLUTION seconds (see api/session_user.py)
+SESSION_USER_CACHE = {
+    'ROLES': ('etudiant',),
+    'TTL': 300,
+    'LAST_LOGIN_RESOLUTION': 3600,
+}
+
+# Stateless signed token returned by the activity login and accepted as
+# "Authorization: Activite <token>" (see api/authentication.py)
+ACTIVITY_TOKEN = {
+    'MAX_AGE': int(os.environ.get('ACTIVITY_TOKEN_MAX_AGE', 4 * 3600)),
+}
+
 # CSRF_TRUSTED_ORIGINS = ['http://*', 'https://*']
 
 # CSRF_COOKIE_SECURE = False  # Set to False if using HTTP (not recommended for production)
@@ -91,12 +137,101 @@ AUTH_USER_MODEL = 'api.Users'
 
 REST_FRAMEWORK = {
         'DEFAULT_AUTHENTICATION_CLASSES': (
+            # Session first: anonymous requests get 403, not a 401 asking for an
+            # activity token. Views that use the token list it first themselves.
             'rest_framework.authentication.SessionAuthentication',
+            'api.authentication.ActivityTokenAuthentication',
             # 'rest_framework.authentication.TokenAuthentication',
         )
     }
 
 
+# Gemini API key, never committed: export GEMINI_API_KEY (generation is disabled without it)
+GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY', '')
+
+# Resilience settings for Gemini calls (see api/llm.py for all keys and defaults)
+LLM_RESILIENCE = {
+    'TIMEOUT': float(os.environ.get('LLM_TIMEOUT', 30)),
+    'BREAKER_ERROR_RATE': 0.5,
+    'BREAKER_COOLDOWN': 30.0,
+    'HEDGE_PERCENTILE': 95,  # Set to None to disable hedged requests
+}
+
+# Background pre-generation pool for GeminiGenerateAffirmationsAPIView (see api/generation_pool.py)
+GENERATION_POOL = {
+    'ENABLED': True,
+    'SIZE': 2,
+    'TTL': 6 * 3600,
+}
+
+# Jaccard similarity (0-1) above which two affirmations are flagged as near-duplicates (see api/similarity.py)
+SIMILARITY_THRESHOLD = 0.6
+
+# Live response feed for the debrief screen, served over ASGI (see api/feed.py)
+LIVE_FEED = {
+    'POLL_INTERVAL': 1.0,
+    'HEARTBEAT': 15.0,
+    'LONG_POLL_TIMEOUT': 25.0,
+}
+
+# Delta sync of list endpoints with ?since= (see api/sync.py). Run
+# `manage.py purger_suppressions` periodically to drop expired tombstones.
+DELTA_SYNC = {
+    'OVERLAP': 1.0,
+    'TOMBSTONE_RETENTION_DAYS': 30,
+}
+
+# Archives of cold activities' responses (see api/archives.py): one gzip JSON
+# file per activity, written by `manage.py archiver_activites`
+ARCHIVES = {
+    'DIR': os.environ.get('ARCHIVES_DIR') or os.path.join(BASE_DIR, 'archives'),
+    'INACTIVE_DAYS': int(os.environ.get('ARCHIVES_INACTIVE_DAYS', 180)),
+}
+
+# Request metrics scraped on api/metrics/ (see api/metrics.py). With several
+# workers, point DIR to a directory shared by them (emptied at startup).
+METRICS = {
+    'ENABLED': True,
+    'DIR': os.environ.get('METRICS_DIR') or None,
+    'FLUSH_INTERVAL': 5.0,
+}
+
+# Logging: JSON lines written to stderr by a background thread (see api/logs.py).
+# Levels per logger; LOG_SAMPLING keeps a fraction of frequent INFO events
+# (by their `event` extra); raw LLM responses are only logged when
+# LOG_LLM_PAYLOADS is set (they may be large and hold user content).
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+LOG_SAMPLING = {
+    'reponse_saved': 0.1,
+}
+LOG_LLM_PAYLOADS = os.environ.get('LOG_LLM_PAYLOADS') == '1'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'api.logs.JsonFormatter'},
+    },
+    'filters': {
+        'sampling': {'()': 'api.logs.SamplingFilter'},
+    },
+    'handlers': {
+        'queue': {
+            '()': 'api.logs.QueuedStreamHandler',
+            'formatter': 'json',
+            'filters': ['sampling'],
+        },
+    },
+    'root': {'handlers': ['queue'], 'level': 'WARNING'},
+    'loggers': {
+        'django': {'level': 'INFO'},
+        'django.db.backends': {'level': 'WARNING'},
+        'api': {'level': LOG_LEVEL},
+        'api.llm.payloads': {'level': 'INFO'},
+    },
+}
+
+
 ROOT_URLCONF = 'apiBack.urls'
 
 TEMPLATES = [
@@ -116,6 +251,7 @@ TEMPLATES = [
 ]
 
 # WSGI_APPLICATION = 'apiBack.wsgi.application'
+ASGI_APPLICATION = 'apiBack.asgi.application'
 # AUTH_USER_MODEL = 'api.User'
 
 # Database
@@ -125,9 +261,30 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock when a transaction starts: with the default deferred
+            # mode, concurrent read-then-write transactions (update_or_create on
+            # responses) fail at once with "database is locked" instead of waiting.
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
+# Read replicas. DB_REPLICAS="path1,path2" declares local SQLite copies
+# (replica1, replica2...) refreshed by `manage.py copier_replica`; views marked
+# @replica_reads read from them (see api/routers.py)
+READ_REPLICAS = {
+    'ALIASES': [],
+    'STICKY_SECONDS': int(os.environ.get('DB_REPLICA_STICKY_SECONDS', 10)),
+    'COOKIE': 'lectures_primaire',
+}
+for _index, _name in enumerate(filter(None, os.environ.get('DB_REPLICAS', '').split(',')), start=1):
+    DATABASES[f'replica{_index}'] = {**DATABASES['default'], 'NAME': _name, 'TEST': {'MIRROR': 'default'}}
+    READ_REPLICAS['ALIASES'].append(f'replica{_index}')
+
+DATABASE_ROUTERS = ['api.routers.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -0,0 +1,19 @@
+from functools import partial
+
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.functional import SimpleLazyObject
+
+from api import session_user
+
+
+class CachedUserAuthenticationMiddleware(AuthenticationMiddleware):
+    """
+    AuthenticationMiddleware whose `request.user` (and `request.auser()` for
+    async views) comes first from the copy kept in the session
+    (api/session_user.py), without reading the Users table.
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: session_user.get_user(request))
+        request.auser = partial(session_user.aget_user, request)
@@ -1,6 +1,14 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+
 class DisableCSRF:
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
         setattr(request, '_dont_enforce_csrf_checks', True)
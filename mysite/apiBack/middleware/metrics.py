@@ -0,0 +1,82 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from api import metrics
+
+
+class QueryCounter:
+    """SQL execute wrapper: counts the queries and their duration."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+class RequestMetrics:
+    """
+    Measures each request (duration, SQL queries, rendering, size, status)
+    and records it in api/metrics.py. Put it first in MIDDLEWARE. SQL queries
+    run outside the request thread (SSE feed, async views) are not counted;
+    for a streamed response, the duration stops at the first byte.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not metrics.get_config()['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - start, counter)
+        return response
+
+    async def __acall__(self, request):
+        # The ORM runs in sync_to_async threads, out of reach of execute_wrapper
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - start, None)
+        return response
+
+    @staticmethod
+    def record(request, response, elapsed, counter):
+        match = request.resolver_match
+        metrics.record(
+            request.method,
+            match.route if match else '<unmatched>',
+            response.status_code,
+            elapsed,
+            counter.count if counter else None,
+            counter.seconds if counter else None,
+            render_seconds=getattr(request, '_metrics_render_seconds', None),
+            size=None if response.streaming else len(response.content),
+        )
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered by the handler right after this hook
+        start = time.perf_counter()
+
+        def rendered(response):
+            request._metrics_render_seconds = time.perf_counter() - start
+
+        response.add_post_render_callback(rendered)
+        return response
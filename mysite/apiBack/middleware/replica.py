@@ -0,0 +1,47 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.core.exceptions import MiddlewareNotUsed
+from rest_framework.permissions import SAFE_METHODS
+
+from api import routers
+
+
+class StickyPrimaryMiddleware:
+    """
+    After a successful request that wrote to the database (or used an unsafe
+    method), sets a STICKY_SECONDS cookie; while it is present,
+    `request.lectures_primaire` keeps the client's reads on the primary (see
+    api/routers.py). Inactive without a configured replica.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not routers.get_config()['ALIASES']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        self.process_request(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        self.process_request(request)
+        return self.process_response(request, await self.get_response(request))
+
+    @staticmethod
+    def process_request(request):
+        request.lectures_primaire = routers.get_config()['COOKIE'] in request.COOKIES
+        request.ecritures = routers.track_writes()
+
+    @staticmethod
+    def process_response(request, response):
+        wrote = request.method not in SAFE_METHODS or request.ecritures
+        if wrote and response.status_code < 400:
+            config = routers.get_config()
+            response.set_cookie(config['COOKIE'], '1', max_age=config['STICKY_SECONDS'],
+                                httponly=True, samesite='Lax')
+        return response